@@ -0,0 +1,182 @@
+# backend/app/alignment.py
+import os
+
+import cv2
+import numpy as np
+
+# Set PAGE_ALIGNMENT=0 to use uploads exactly as received
+PAGE_ALIGNMENT = os.environ.get("PAGE_ALIGNMENT", "1") != "0"
+
+# The transform is estimated on a copy downscaled to this width
+ALIGNMENT_WIDTH = 800
+# Skew search range, and the smallest rotation worth resampling the page for
+MAX_SKEW_DEGREES = 5.0
+MIN_SKEW_DEGREES = 0.2
+# A page outline found in a photo must cover this share of the frame
+MIN_PAGE_AREA = 0.3
+MAX_PAGE_AREA = 0.95
+# ...stand clear of the frame edges by this share of it, with background this much darker around it
+PAGE_INSET = 0.01
+BACKGROUND_CONTRAST = 40
+# Colour distance (per channel) within which pixels count as the same background
+BACKGROUND_TOLERANCE = 30
+# Skew is measured on blobs no larger than a line of text (shares of the page size)
+TEXT_MAX_HEIGHT = 0.06
+TEXT_MAX_WIDTH = 0.3
+MIN_TEXT_PIXELS = 500
+
+
+class PageAlignment:
+    """One transform from an upload to the upright page that the config ROIs describe.
+
+    Estimated once per upload; every stage then crops the same aligned
+    image, so a skewed scan or a photo of the page is corrected once
+    rather than by each stage separately.
+    """
+
+    def __init__(self, matrix=None, size=None, method="none", angle=0.0):
+        self.matrix = matrix
+        self.size = size
+        self.method = method
+        self.angle = angle
+
+    @property
+    def is_identity(self):
+        return self.matrix is None
+
+    def apply(self, image):
+        if self.is_identity:
+            return image
+        return cv2.warpPerspective(image, self.matrix, self.size, flags=cv2.INTER_LINEAR,
+                                   borderMode=cv2.BORDER_REPLICATE)
+
+    def as_dict(self):
+        return {"method": self.method, "angle": round(self.angle, 2)}
+
+
+def order_corners(points):
+    """Quadrilateral corners as top-left, top-right, bottom-right, bottom-left"""
+    points = points.reshape(4, 2).astype(np.float32)
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array([points[np.argmin(sums)], points[np.argmin(diffs)],
+                     points[np.argmax(sums)], points[np.argmax(diffs)]], dtype=np.float32)
+
+
+def find_page_quad(small, gray):
+    """Corners of a page photographed against a background, or None.
+
+    The background is flood-filled in from the frame corners, so artwork
+    printed along the page edge stays part of the page.
+    """
+    height, width = gray.shape
+    blurred = cv2.medianBlur(small, 5)
+    background = np.zeros((height + 2, width + 2), dtype=np.uint8)
+    tolerance = (BACKGROUND_TOLERANCE,) * 3
+    for seed in ((0, 0), (width - 1, 0), (width - 1, height - 1), (0, height - 1)):
+        if not background[seed[1] + 1, seed[0] + 1]:
+            cv2.floodFill(blurred, background, seed, 0, tolerance, tolerance,
+                          cv2.FLOODFILL_MASK_ONLY | cv2.FLOODFILL_FIXED_RANGE | (255 << 8))
+    page_mask = cv2.bitwise_not(background[1:-1, 1:-1])
+    contours, _ = cv2.findContours(page_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+
+    page = max(contours, key=cv2.contourArea)
+    share = cv2.contourArea(page) / float(height * width)
+    if not MIN_PAGE_AREA <= share <= MAX_PAGE_AREA:
+        return None
+
+    # The hull bridges dark artwork along the page edge; simplify it until four corners are left
+    hull = cv2.convexHull(page)
+    perimeter = cv2.arcLength(hull, True)
+    for epsilon in (0.02, 0.04, 0.06, 0.08):
+        outline = cv2.approxPolyDP(hull, epsilon * perimeter, True)
+        if len(outline) <= 4:
+            break
+    if len(outline) != 4:
+        return None
+
+    corners = order_corners(outline)
+    height, width = gray.shape
+    # A photographed page has background on every side; a scan's own border or edge art does not
+    inset = np.minimum(corners, np.array([width - 1, height - 1]) - corners)
+    if (inset < PAGE_INSET * np.array([width, height])).any():
+        return None
+    inside = np.zeros_like(gray)
+    cv2.fillConvexPoly(inside, corners.astype(np.int32), 255)
+    if cv2.mean(gray, mask=cv2.bitwise_not(inside))[0] > cv2.mean(gray, mask=inside)[0] - BACKGROUND_CONTRAST:
+        return None
+    return corners
+
+
+def text_ink(gray):
+    """Coordinates (x, y) of ink in text-sized blobs; seals, QR codes and artwork are left out"""
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    height, width = gray.shape
+    sizes = stats[:, cv2.CC_STAT_HEIGHT], stats[:, cv2.CC_STAT_WIDTH]
+    keep = (sizes[0] <= TEXT_MAX_HEIGHT * height) & (sizes[1] <= TEXT_MAX_WIDTH * width) & (stats[:, cv2.CC_STAT_AREA] >= 4)
+    keep[0] = False
+    ys, xs = np.nonzero(keep[labels])
+    return xs.astype(np.float32), ys.astype(np.float32)
+
+
+def projection_score(xs, ys, angle, center):
+    """How sharply the ink falls into rows after rotating by angle (higher is straighter)"""
+    theta = np.deg2rad(angle)
+    # Row of each ink pixel after cv2.getRotationMatrix2D(center, angle) is applied
+    rows = (-np.sin(theta) * (xs - center[0]) + np.cos(theta) * (ys - center[1])).astype(np.int32)
+    counts = np.bincount(rows - rows.min())
+    return float(np.dot(counts, counts))
+
+
+def estimate_skew(gray):
+    """Rotation (degrees, counter-clockwise) that levels the text lines, by projection profile.
+
+    A coarse 1° sweep over ±MAX_SKEW_DEGREES is refined in 0.1° steps
+    around the best angle.
+    """
+    xs, ys = text_ink(gray)
+    if len(xs) < MIN_TEXT_PIXELS:
+        return 0.0
+
+    center = (gray.shape[1] / 2, gray.shape[0] / 2)
+    coarse = np.arange(-MAX_SKEW_DEGREES, MAX_SKEW_DEGREES + 0.5, 1.0)
+    best = max(coarse, key=lambda angle: projection_score(xs, ys, angle, center))
+    fine = np.arange(best - 0.9, best + 0.95, 0.1)
+    return float(max(fine, key=lambda angle: projection_score(xs, ys, angle, center)))
+
+
+def estimate_alignment(image):
+    """PageAlignment for a decoded BGR (or grayscale) certificate"""
+    height, width = image.shape[:2]
+    scale = min(1.0, ALIGNMENT_WIDTH / float(width))
+    small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR) if scale < 1.0 else image
+    if len(small.shape) == 2:
+        small = cv2.cvtColor(small, cv2.COLOR_GRAY2BGR)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    corners = find_page_quad(small, gray)
+    if corners is not None:
+        corners /= scale
+        top_left, top_right, bottom_right, bottom_left = corners
+        page_width = int(round(max(np.linalg.norm(top_right - top_left), np.linalg.norm(bottom_right - bottom_left))))
+        page_height = int(round(max(np.linalg.norm(bottom_left - top_left), np.linalg.norm(bottom_right - top_right))))
+        target = np.array([[0, 0], [page_width - 1, 0], [page_width - 1, page_height - 1], [0, page_height - 1]],
+                          dtype=np.float32)
+        return PageAlignment(cv2.getPerspectiveTransform(corners, target), (page_width, page_height), "page")
+
+    angle = estimate_skew(gray)
+    if abs(angle) < MIN_SKEW_DEGREES:
+        return PageAlignment()
+    matrix = np.vstack([cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0), [0, 0, 1]])
+    return PageAlignment(matrix, (width, height), "deskew", angle)
+
+
+def align_page(image):
+    """(aligned image, PageAlignment); the image itself when it is already upright"""
+    if not PAGE_ALIGNMENT:
+        return image, PageAlignment()
+    alignment = estimate_alignment(image)
+    return alignment.apply(image), alignment
@@ -1,70 +1,253 @@
 # backend/app/api.py
-from fastapi import FastAPI, UploadFile, File
+from functools import partial
+from typing import List
+
+from fastapi import FastAPI, UploadFile, File, Response
 from fastapi.middleware.cors import CORSMiddleware
-from PIL import Image
-import io
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import datetime
 
-from ocr import extract_certificate_info, validate_certificate_fuzzy
-from forgery import detect_forgery
-
-import pandas as pd
+from .config import INSTITUTION_NAME_TO_CODE
+from .metrics import NULL_TIMER, PROMETHEUS_CONTENT_TYPE, StageTimer, expose_metrics
+from .near_duplicates import NEAR_DUPLICATE_CACHE, IndexServer, NearDuplicateIndex, fingerprint
+from .ocr import extract_certificate_info_regions, ocr_cache, validate_certificate_fuzzy
+from .ocr_backend import ocr_backend_stats, start_ocr_backend
+from .ocr_cache import cached_extract
+from .registry_store import live_registry
+from .batch import iter_batch_items, stream_batch
+from .executor import WorkerPoolFull, verification_pool
+from .institutions import institutions
+from .startup import build_seal_index, compile_institutions, import_pipeline, warm_up_in_background
+from .verdict_cache import VERDICT_CACHE, VerdictCache
 
 app = FastAPI()
 
+# Verdicts of recent OCR-path uploads, reused for re-scans of the same certificate
+near_duplicates = NearDuplicateIndex()
+# Complete results per upload, dropped per certificate as the registry changes
+verdict_cache = VerdictCache("api", ocr_cache.version, live_registry)
+
 # CORS for local frontend
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],  # frontend URL
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
-# Load DB
-DB_PATH = "/Users/jigyasaverma/Desktop/backend/Edu_cred_verify/EduCred-Verify/datasets/ocr_dataset.csv"
-db = pd.read_csv(DB_PATH)
+
+@app.on_event("startup")
+def on_startup():
+    warm_up_in_background(import_pipeline, live_registry.current, compile_institutions, build_seal_index,
+                          start_ocr_backend)
+
+
+def qr_verified_response(qr_result):
+    """Result for a certificate authenticated by its QR code; OCR and forgery detection did not run"""
+    record = qr_result["matched_record"]
+    extracted_info = {
+        "certificate_no": record["certificate_no"],
+        "name": record.get("name"),
+        "institution": record.get("institution"),
+        "course": record.get("course"),
+        "year": str(record.get("year")),
+        "processing_timestamp": datetime.datetime.now().isoformat(),
+    }
+    return {
+        "success": True,
+        "extracted_info": extracted_info,
+        "qr_validation": qr_result,
+        "ocr_validation": {"is_valid": True, "status": "SKIPPED", "matched_record": record},
+        "forgery_validation": {"status": "SKIPPED", "overall_authentic": True},
+        "validation": {
+            "is_valid": True,
+            "status": "VERIFIED",
+            "method": "qr",
+            "overall_confidence": None,
+        },
+        "pipeline": {"qr": qr_result["status"], "ocr": "skipped", "forgery": "skipped"},
+    }
+
+
+def prepare_upload(contents, timer=NULL_TIMER):
+    """Decode an upload once and straighten the page: (CertificateImage, alignment)"""
+    # OpenCV-backed stages are imported on first use to keep startup light
+    from .alignment import align_page
+    from .imaging import CertificateImage, decode_image
+
+    # 1️⃣ Decode uploaded image once; every stage works on this array
+    with timer.stage("decode"):
+        image = decode_image(contents)
+    # Straighten the page once; every stage below crops its ROIs from the aligned image
+    with timer.stage("align"):
+        image, alignment = align_page(image)
+    # Grayscale/RGB conversions are made once here and shared by the stages
+    return CertificateImage(image), alignment
+
+
+def identify_upload(certificate, registry, timer=NULL_TIMER):
+    """QR fast path, then the layout to read: (qr_result, institution code or None)"""
+    from .qr_verification import QR_FAST_PATH, qr_institution, verify_qr_fast_path
+    from .seal_index import seal_index
+
+    # 2️⃣ QR fast path: an ID/hash pair found in the registry verifies the certificate
+    with timer.stage("qr"):
+        qr_result = verify_qr_fast_path(certificate, registry) if QR_FAST_PATH else {"authentic": False, "status": "disabled"}
+    if qr_result["authentic"]:
+        return qr_result, None
+    # 3️⃣ The QR's record, else the seal, tells which layout to read, so OCR need not probe every header region
+    with timer.stage("seal_id"):
+        institution_code = qr_institution(qr_result, registry) or seal_index.identify(certificate)
+    return qr_result, institution_code
+
+
+def near_duplicate_response(verdict, distance, qr_result, alignment_method, registry_version):
+    """Stored verdict (from near_duplicates) served for a re-scan of the same certificate"""
+    verdict["extracted_info"]["processing_timestamp"] = datetime.datetime.now().isoformat()
+    verdict["qr_validation"] = qr_result
+    verdict["pipeline"].update({"qr": qr_result["status"], "alignment": alignment_method,
+                                "registry_version": registry_version, "near_duplicate": {"distance": distance}})
+    return verdict
+
+
+# Batch workers look re-scans up in this process's index
+index_server = IndexServer(near_duplicates)
+
+
+def run_verification(filename, contents, timer=NULL_TIMER, index=None):
+    """QR fast path, else OCR, registry validation and forgery detection for one uploaded certificate.
+
+    Each stage is timed on timer; the caller records it once the result is in.
+    index is the near-duplicate index to use: batch workers pass the
+    server process's (index_server.client()), requests use near_duplicates.
+    """
+    from .forgery_detection import detect_forgery_image
+
+    # Read before current(): a verdict is never tagged newer than the registry it was reached with
+    registry_version = live_registry.version
+    registry = live_registry.current()
+    # One set of layouts and references for the whole request, even if the file is reloaded meanwhile
+    layouts = institutions.current()
+
+    index = index or near_duplicates
+
+    certificate, alignment = prepare_upload(contents, timer)
+    qr_result, institution_code = identify_upload(certificate, registry, timer)
+    if qr_result["authentic"]:
+        timer.set_institution(qr_result["matched_record"].get("institution_code"))
+        response = qr_verified_response(qr_result)
+        response["pipeline"].update({"alignment": alignment.method, "registry_version": registry_version})
+        return response
+
+    # A re-scan of a certificate verified since the registry last changed gets the same verdict
+    upload = None
+    if NEAR_DUPLICATE_CACHE:
+        with timer.stage("near_duplicate"):
+            upload = fingerprint(certificate, institution_code)
+            near_duplicate = index.find(upload, (registry_version, layouts.version))
+        if near_duplicate is not None:
+            verdict, distance = near_duplicate
+            timer.set_institution(verdict["forgery_validation"].get("institution_code"))
+            return near_duplicate_response(verdict, distance, qr_result, alignment.method, registry_version)
+
+    # 4️⃣ OCR extraction, skipped when the same file was seen before
+    with timer.stage("ocr"):
+        extracted_info = cached_extract(ocr_cache, contents, extract_certificate_info_regions, certificate.rgb,
+                                        institution_code, version=layouts.layout_version)
+    extracted_info["processing_timestamp"] = datetime.datetime.now().isoformat()
+    timer.set_institution(INSTITUTION_NAME_TO_CODE.get(extracted_info.get("institution")))
+
+    # 5️⃣ OCR / DB fuzzy validation
+    with timer.stage("registry"):
+        valid_ocr, matched_record = validate_certificate_fuzzy(extracted_info, registry)
+
+    ocr_result = {
+        "is_valid": valid_ocr,
+        "status": "VERIFIED" if valid_ocr else "INVALID",
+        "confidence_scores": {},  # optional: you can expand per-field scores
+        "matched_record": matched_record,
+    }
+
+    # 6️⃣ Forgery detection
+    forgery_result = detect_forgery_image(certificate, extracted_info, debug=False, timer=timer)
+
+    # 7️⃣ Combine results
+    response = {
+        "success": True,
+        "extracted_info": extracted_info,
+        "qr_validation": qr_result,
+        "ocr_validation": ocr_result,
+        "forgery_validation": forgery_result,
+        "validation": {
+            "is_valid": valid_ocr and forgery_result['overall_authentic'],
+            "status": "VERIFIED" if valid_ocr and forgery_result['overall_authentic'] else "INVALID",
+            "method": "ocr",
+            "overall_confidence": None,  # you can calculate combined %
+        },
+        "pipeline": {"qr": qr_result["status"], "ocr": "run", "forgery": "run", "alignment": alignment.method,
+                     "registry_version": registry_version},
+    }
+    if upload is not None:
+        index.remember(upload, response, (registry_version, layouts.version))
+    return response
+
 
 @app.post("/api/verify-certificate")
-async def verify_certificate(file: UploadFile = File(...)):
+async def verify_certificate(response: Response, file: UploadFile = File(...)):
+    endpoint = "/api/verify-certificate"
+    timer = StageTimer()
     try:
-        # 1️⃣ Read uploaded image
         contents = await file.read()
-        img = Image.open(io.BytesIO(contents))
-
-        # 2️⃣ OCR extraction
-        extracted_info = extract_certificate_info(img)
-        extracted_info["processing_timestamp"] = datetime.datetime.now().isoformat()
-
-        # 3️⃣ OCR / DB fuzzy validation
-        valid_ocr, matched_record = validate_certificate_fuzzy(extracted_info, db)
-
-        ocr_result = {
-            "is_valid": valid_ocr,
-            "status": "VERIFIED" if valid_ocr else "INVALID",
-            "confidence_scores": {},  # optional: you can expand per-field scores
-            "matched_record": matched_record,
-        }
-
-        # 4️⃣ Forgery detection
-        # Save temp file for OpenCV
-        temp_path = f"/tmp/{file.filename}"
-        with open(temp_path, "wb") as f:
-            f.write(contents)
-
-        forgery_result = detect_forgery(temp_path, extracted_info, debug=False)
-
-        # 5️⃣ Combine results
-        return {
-            "success": True,
-            "extracted_info": extracted_info,
-            "ocr_validation": ocr_result,
-            "forgery_validation": forgery_result,
-            "validation": {
-                "is_valid": valid_ocr and forgery_result['overall_authentic'],
-                "status": "VERIFIED" if valid_ocr and forgery_result['overall_authentic'] else "INVALID",
-                "overall_confidence": None,  # you can calculate combined %
-            }
-        }
+        # Hashing the upload and catching up with the registry both block, so they run off the event loop
+        with timer.stage("verdict_cache"):
+            key, result = (await run_in_threadpool(verdict_cache.lookup, contents, endpoint)
+                           if VERDICT_CACHE else (None, None))
+        if result is None:
+            result = await verification_pool.run(run_verification, file.filename, contents, timer)
+            if key is not None:
+                verdict_cache.put(key, result, result["pipeline"]["registry_version"])
 
+    except WorkerPoolFull as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=503,
+                            headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
-        return {"success": False, "error": str(e)}
+        result = {"success": False, "error": str(e)}
+
+    timer.observe(endpoint)
+    response.headers.update(timer.timing_headers())
+    return result
+
+
+@app.post("/api/verify-batch")
+def verify_batch(files: List[UploadFile] = File(...)):
+    """Verify many certificates (files and/or zip archives), streaming one NDJSON line per certificate"""
+    uploads = [(file.filename, file.file) for file in files if file.filename]
+    if not uploads:
+        return JSONResponse({"success": False, "error": "No file uploaded"}, status_code=400)
+
+    worker = partial(run_verification, index=index_server.client()) if NEAR_DUPLICATE_CACHE else run_verification
+    results = stream_batch(iter_batch_items(uploads), worker, cache=verdict_cache if VERDICT_CACHE else None)
+    return StreamingResponse(results, media_type="application/x-ndjson")
+
+
+@app.get("/api/health")
+async def health_check():
+    return {
+        "status": "healthy",
+        "message": "Certificate verification API is running",
+        "worker_pool": verification_pool.stats(),
+        "ocr_cache": ocr_cache.stats(),
+        "registry": live_registry.stats(),
+        "near_duplicates": near_duplicates.stats(),
+        "verdict_cache": verdict_cache.stats(),
+        "ocr_backend": ocr_backend_stats(),
+        "institutions": institutions.stats(),
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """Stage latency histograms and worker pool occupancy for Prometheus to scrape"""
+    return PlainTextResponse(expose_metrics(verification_pool), media_type=PROMETHEUS_CONTENT_TYPE)
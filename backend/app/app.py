@@ -1,107 +1,34 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import pandas as pd
-from PIL import Image
-import pytesseract
-import re
-from fuzzywuzzy import fuzz
-import cv2
-import numpy as np
 import os
+import sys
 from datetime import datetime
-import tempfile
+from functools import partial
+
+if not __package__:
+    # Started as `python app.py`: import the sibling modules as the `app` package
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "app"
+
+from .config import INSTITUTION_NAME_TO_CODE
+from .metrics import NULL_TIMER, PROMETHEUS_CONTENT_TYPE, StageTimer, expose_metrics
+from .near_duplicates import NEAR_DUPLICATE_CACHE, IndexServer, NearDuplicateIndex, fingerprint
+from .registry_store import live_registry
+from .extraction import engine
+from .institutions import institutions
+from .ocr_backend import get_ocr_backend, ocr_backend_stats, start_ocr_backend
+from .batch import ALLOWED_EXTENSIONS, iter_spooled_items, spool_uploads, stream_batch
+from .ocr_cache import OcrResultCache, cached_extract, config_version, default_db_path
+from .startup import build_seal_index, compile_institutions, import_pipeline, warm_up_in_background
+from .verdict_cache import VERDICT_CACHE, VerdictCache
 
 app = Flask(__name__)
-CORS(app)
-
-# Load the database
-db = pd.read_csv("/Users/jigyasaverma/Desktop/backend/Edu_cred_verify/EduCred-Verify/datasets/ocr_dataset.csv")  # Update with your actual path
-
-
-def normalize(text):
-    """Normalize text for fuzzy matching"""
-    return re.sub(r'\s+', ' ', text).strip().upper()
-
-
-def clean_name(name):
-    """Clean extracted name"""
-    # Remove common trailing phrases that are not part of name
-    name = re.sub(r'\b(PRESENTED.*|For completing.*|In the year.*)$', '', name, flags=re.IGNORECASE)
-    # Keep only alphabetic parts
-    name = re.sub(r'[^A-Za-z\s]', '', name)
-    return name.strip()
-
-
-def extract_year(text, cert_no=None):
-    """Extract year from text"""
-    clean_text = text
-    if cert_no:
-        clean_text = clean_text.replace(cert_no, "")  # remove cert no part
-
-    # Look for year 19xx or 20xx
-    match = re.search(r'\b(19|20)\d{2}\b', clean_text)
-    if match:
-        return match.group(0)
-    return None
-
+CORS(app, expose_headers=['Server-Timing'])
 
 def extract_certificate_info(img):
     """Extract certificate info including year"""
-    text = pytesseract.image_to_string(img)
-    info = {}
-
-    # Certificate ID - Multiple patterns
-    patterns = [
-        r'(JH[-_ ]?UNI[-_ ]?\d{4}[-_ ]?\d+)',
-        r'Cert(?:ificate)?\s*No[:\-\s]*([A-Z0-9\-]+)'
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            if 'JH' in pattern:
-                info["certificate_no"] = re.sub(r'[\s\-_]+', '-', match.group(1)).upper()
-            else:
-                info["certificate_no"] = match.group(1).strip()
-            break
-
-    if "certificate_no" not in info:
-        info["certificate_no"] = "-"
-
-    # Institution
-    institutions = [
-        'Ranchi Tech Institute',
-        'Jharkhand State University',
-        'Jharkhand Business School'
-    ]
-
-    for institution in institutions:
-        if re.search(institution, text, re.IGNORECASE):
-            info["institution"] = institution
-            break
-
-    # Name + Course block
-    match = re.search(r'(?:awarded to|is given to|THIS CERTIFICATE IS GIVEN TO)\s*\n?([A-Za-z\s]+)', text,
-                      re.IGNORECASE)
-    if match:
-        raw_name = re.sub(r'\s+', ' ', match.group(1)).strip()
-
-        # If course is stuck to name, split it
-        course_patterns = [r'(BBA|M\.?Sc\s+[A-Za-z]+|BA\s+[A-Za-z]+)', r'(Bachelor.*|Master.*|Diploma.*)']
-
-        for course_pattern in course_patterns:
-            course_match = re.search(course_pattern, raw_name, re.IGNORECASE)
-            if course_match:
-                info["course"] = course_match.group(1).strip()
-                raw_name = raw_name.replace(info["course"], "").strip()
-                break
-
-        info["name"] = clean_name(raw_name)
-
-    # Year extraction
-    year = extract_year(text, info.get("certificate_no"))
-    if year:
-        info["year"] = year
+    text = get_ocr_backend().image_to_string(img)
+    info = engine.extract(text)
 
     # Store raw text for debugging
     info["raw_text"] = text
@@ -109,34 +36,33 @@ def extract_certificate_info(img):
     return info
 
 
-def validate_certificate_fuzzy(info, db, threshold=85):
-    """Validate certificate using fuzzy matching"""
-    best_match = None
-    best_scores = {}
+# Bump when OCR settings change; pattern and alias edits are picked up by the engine fingerprint
+OCR_CONFIG_VERSION = 1
 
-    for _, row in db.iterrows():
-        scores = {}
-        scores['cert'] = fuzz.ratio(normalize(info.get("certificate_no", "")), normalize(str(row["certificate_no"])))
-        scores['name'] = fuzz.ratio(normalize(info.get("name", "")), normalize(str(row["name"])))
-        scores['inst'] = fuzz.ratio(normalize(info.get("institution", "")), normalize(str(row["institution"])))
-        scores['year'] = 100 if info.get("year", "") == str(row["year"]) else 0
+ocr_cache = OcrResultCache(
+    "flask",
+    # Read on every lookup: the fingerprint changes when reloaded institutions bring new aliases
+    lambda: config_version(OCR_CONFIG_VERSION, engine.fingerprint),
+    db_path=default_db_path(),
+)
 
-        # Calculate overall score
-        overall_score = (scores['cert'] * 0.4 + scores['name'] * 0.3 + scores['inst'] * 0.2 + scores['year'] * 0.1)
+# Verdicts of recent OCR-path uploads, reused for re-scans of the same certificate
+near_duplicates = NearDuplicateIndex()
+# Complete results per upload, dropped per certificate as the registry changes
+verdict_cache = VerdictCache("flask", ocr_cache.version, live_registry)
 
-        # Check if this is a good match
-        if (scores['cert'] > threshold and scores['name'] > threshold and
-                scores['inst'] > threshold and scores['year'] > 50):
 
-            if best_match is None or overall_score > best_scores.get('overall', 0):
-                best_match = row.to_dict()
-                best_scores = scores
-                best_scores['overall'] = overall_score
+def validate_certificate_fuzzy(info, registry, threshold=85):
+    """Validate certificate using fuzzy matching against the indexed registry"""
+    return registry.best_match(info, threshold)
 
-    return best_match is not None, best_match, best_scores
 
+def validate_certificates_batch(infos, registry, threshold=85):
+    """Validate many extracted records in one vectorized pass over the registry"""
+    return registry.match_batch(infos, threshold)
 
-def detect_forgery_simple(image_path, institution):
+
+def detect_forgery_simple(image, institution):
     """Simple forgery detection - you can expand this with your existing code"""
     # Placeholder for forgery detection
     # In real implementation, integrate your forgery_detection.py logic here
@@ -156,8 +82,163 @@ def detect_forgery_simple(image_path, institution):
     }
 
 
+def build_verification_response(extracted_info, is_valid, matched_record, confidence_scores, forgery_results,
+                                qr_result=None):
+    """Assemble the JSON payload returned for one verified certificate"""
+    response = {
+        'success': True,
+        'extracted_info': {
+            'certificate_no': matched_record['certificate_no'] if matched_record else extracted_info.get(
+                'certificate_no', 'Not found'),
+            'name': matched_record['name'] if matched_record else extracted_info.get('name', 'Not found'),
+            'institution': matched_record['institution'] if matched_record else extracted_info.get(
+                'institution', 'Not found'),
+            'course': matched_record.get('course', '') if matched_record else extracted_info.get('course',
+                                                                                                 'Not found'),
+            'year': str(matched_record['year']) if matched_record else extracted_info.get('year', 'Not found'),
+            'raw_text': extracted_info.get('raw_text', ''),
+            'processing_timestamp': datetime.now().isoformat()
+        },
+        'validation': {
+            'is_valid': is_valid,
+            'status': 'VERIFIED' if is_valid else 'INVALID',
+            'overall_confidence': int(confidence_scores.get('overall', 0)) if confidence_scores else 0,
+            'confidence_scores': {
+                'ocr_quality': 98,  # You can calculate this based on OCR confidence
+                'name_match': confidence_scores.get('name', 0) if confidence_scores else 0,
+                'institution_match': confidence_scores.get('inst', 0) if confidence_scores else 0,
+                'certificate_format': confidence_scores.get('cert', 0) if confidence_scores else 0,
+                'seal_authentic': forgery_results['seal_authentic'],
+                'signature_authentic': forgery_results['signature_authentic']
+            },
+            'matched_record': matched_record if is_valid else None
+        },
+        'forgery_detection': forgery_results
+    }
+    if qr_result is not None:
+        response['qr_validation'] = qr_result
+        response['pipeline'] = {'qr': qr_result['status'], 'ocr': 'run', 'forgery': 'run'}
+    return response
+
+
+def build_qr_response(qr_result):
+    """Payload for a certificate authenticated by its QR code; OCR and forgery detection were skipped"""
+    record = qr_result['matched_record']
+    forgery_results = {'status': 'SKIPPED', 'seal_authentic': None, 'signature_authentic': None,
+                       'overall_authentic': True}
+    response = build_verification_response({}, True, record, {'overall': 100}, forgery_results)
+    response['validation']['method'] = 'qr'
+    response['qr_validation'] = qr_result
+    response['pipeline'] = {'qr': qr_result['status'], 'ocr': 'skipped', 'forgery': 'skipped'}
+    return response
+
+
+def align_upload(image, timer=NULL_TIMER):
+    """Straighten a decoded upload: (CertificateImage, alignment)"""
+    from .alignment import align_page
+    from .imaging import CertificateImage
+
+    # Straighten the page once; QR, OCR and forgery checks all read the aligned image
+    with timer.stage('align'):
+        image, alignment = align_page(image)
+    return CertificateImage(image), alignment
+
+
+def read_qr(certificate, registry, timer=NULL_TIMER):
+    from .qr_verification import QR_FAST_PATH, verify_qr_fast_path
+
+    # A QR code whose ID/hash pair is in the registry is proof enough
+    with timer.stage('qr'):
+        return verify_qr_fast_path(certificate, registry) if QR_FAST_PATH else {'authentic': False, 'status': 'disabled'}
+
+
+def upload_fingerprint(certificate, qr_result, registry, timer=NULL_TIMER):
+    """Near-duplicate fingerprint in the layout the QR's record, else the seal, identifies (None if neither does)"""
+    from .qr_verification import qr_institution
+    from .seal_index import seal_index
+
+    with timer.stage('seal_id'):
+        institution_code = qr_institution(qr_result, registry) or seal_index.identify(certificate)
+    return fingerprint(certificate, institution_code)
+
+
+def near_duplicate_response(verdict, distance, qr_result, alignment_method, registry_version):
+    """Stored verdict (from near_duplicates) served for a re-scan of the same certificate"""
+    verdict['extracted_info']['processing_timestamp'] = datetime.now().isoformat()
+    verdict['qr_validation'] = qr_result
+    verdict['pipeline'].update({'qr': qr_result['status'], 'alignment': alignment_method,
+                                'registry_version': registry_version, 'near_duplicate': {'distance': distance}})
+    return verdict
+
+
+def verify_certificate_image(image, contents, timer=NULL_TIMER, index=None):
+    """Verify one decoded certificate from its QR code, else by OCR, registry validation and forgery detection.
+
+    index is the near-duplicate index to use: batch workers pass the
+    server process's (index_server.client()), requests use near_duplicates.
+    """
+    # Read before current(): a verdict is never tagged newer than the registry it was reached with
+    registry_version = live_registry.version
+    registry = live_registry.current()
+    layouts = institutions.current()
+    index = index or near_duplicates
+
+    certificate, alignment = align_upload(image, timer)
+    qr_result = read_qr(certificate, registry, timer)
+    if qr_result['authentic']:
+        timer.set_institution(qr_result['matched_record'].get('institution_code'))
+        response = build_qr_response(qr_result)
+        response['pipeline'].update({'alignment': alignment.method, 'registry_version': registry_version})
+        return response
+
+    # A re-scan of a certificate verified since the registry last changed gets the same verdict
+    upload = None
+    if NEAR_DUPLICATE_CACHE:
+        upload = upload_fingerprint(certificate, qr_result, registry, timer)
+        with timer.stage('near_duplicate'):
+            near_duplicate = index.find(upload, (registry_version, layouts.version))
+        if near_duplicate is not None:
+            verdict, distance = near_duplicate
+            timer.set_institution(INSTITUTION_NAME_TO_CODE.get(verdict['extracted_info'].get('institution')))
+            return near_duplicate_response(verdict, distance, qr_result, alignment.method, registry_version)
+
+    # Extract information using OCR, reusing the result for files seen before
+    with timer.stage('ocr'):
+        extracted_info = cached_extract(ocr_cache, contents, extract_certificate_info, certificate.rgb,
+                                        version=layouts.layout_version)
+    timer.set_institution(INSTITUTION_NAME_TO_CODE.get(extracted_info.get('institution')))
+
+    # Validate against database
+    with timer.stage('registry'):
+        is_valid, matched_record, confidence_scores = validate_certificate_fuzzy(extracted_info, registry)
+
+    # Perform forgery detection
+    with timer.stage('forgery'):
+        forgery_results = detect_forgery_simple(certificate.bgr, extracted_info.get('institution', ''))
+
+    response = build_verification_response(extracted_info, is_valid, matched_record, confidence_scores,
+                                           forgery_results, qr_result)
+    response['pipeline'].update({'alignment': alignment.method, 'registry_version': registry_version})
+    if upload is not None:
+        index.remember(upload, response, (registry_version, layouts.version))
+    return response
+
+
+def verify_certificate_bytes(filename, contents, index=None):
+    """Batch worker: verify one certificate from its uploaded bytes"""
+    from .imaging import decode_image
+
+    return verify_certificate_image(decode_image(contents), contents, index=index)
+
+
+# Batch workers look re-scans up in this process's index
+index_server = IndexServer(near_duplicates)
+
+
 @app.route('/api/verify-certificate', methods=['POST'])
 def verify_certificate():
+    endpoint = '/api/verify-certificate'
+    timer = StageTimer()
     try:
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': 'No file uploaded'}), 400
@@ -167,76 +248,65 @@ def verify_certificate():
             return jsonify({'success': False, 'error': 'No file selected'}), 400
 
         # Validate file type
-        allowed_extensions = {'png', 'jpg', 'jpeg', 'tiff'}
         file_extension = file.filename.rsplit('.', 1)[1].lower()
-        if file_extension not in allowed_extensions:
+        if file_extension not in ALLOWED_EXTENSIONS:
             return jsonify({'success': False, 'error': 'Invalid file type'}), 400
 
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_extension}') as temp_file:
-            file.save(temp_file.name)
-            temp_path = temp_file.name
-
-        try:
-            # Load and process image
-            img = Image.open(temp_path)
-
-            # Extract information using OCR
-            extracted_info = extract_certificate_info(img)
-
-            # Validate against database
-            is_valid, matched_record, confidence_scores = validate_certificate_fuzzy(extracted_info, db)
-
-            # Perform forgery detection
-            forgery_results = detect_forgery_simple(temp_path, extracted_info.get('institution', ''))
-
-            # Prepare response
-            response_data = {
-                'success': True,
-                'extracted_info': {
-                    'certificate_no': matched_record['certificate_no'] if matched_record else extracted_info.get(
-                        'certificate_no', 'Not found'),
-                    'name': matched_record['name'] if matched_record else extracted_info.get('name', 'Not found'),
-                    'institution': matched_record['institution'] if matched_record else extracted_info.get(
-                        'institution', 'Not found'),
-                    'course': matched_record.get('course', '') if matched_record else extracted_info.get('course',
-                                                                                                         'Not found'),
-                    'year': str(matched_record['year']) if matched_record else extracted_info.get('year', 'Not found'),
-                    'raw_text': extracted_info.get('raw_text', ''),
-                    'processing_timestamp': datetime.now().isoformat()
-                },
-                'validation': {
-                    'is_valid': is_valid,
-                    'status': 'VERIFIED' if is_valid else 'INVALID',
-                    'overall_confidence': int(confidence_scores.get('overall', 0)) if confidence_scores else 0,
-                    'confidence_scores': {
-                        'ocr_quality': 98,  # You can calculate this based on OCR confidence
-                        'name_match': confidence_scores.get('name', 0) if confidence_scores else 0,
-                        'institution_match': confidence_scores.get('inst', 0) if confidence_scores else 0,
-                        'certificate_format': confidence_scores.get('cert', 0) if confidence_scores else 0,
-                        'seal_authentic': forgery_results['seal_authentic'],
-                        'signature_authentic': forgery_results['signature_authentic']
-                    },
-                    'matched_record': matched_record if is_valid else None
-                },
-                'forgery_detection': forgery_results
-            }
-
-            return jsonify(response_data)
-
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        # Decode once in memory; OCR and forgery detection share the array
+        from .imaging import decode_image
+
+        contents = file.read()
+        with timer.stage('verdict_cache'):
+            key, result = verdict_cache.lookup(contents, endpoint) if VERDICT_CACHE else (None, None)
+        if result is None:
+            with timer.stage('decode'):
+                image = decode_image(contents)
+            result = verify_certificate_image(image, contents, timer)
+            if key is not None:
+                verdict_cache.put(key, result, result['pipeline']['registry_version'])
+        response = jsonify(result)
 
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        response = jsonify({'success': False, 'error': str(e)})
+        response.status_code = 500
+
+    timer.observe(endpoint)
+    response.headers.update(timer.timing_headers())
+    return response
+
+
+@app.route('/api/verify-batch', methods=['POST'])
+def verify_batch():
+    """Verify many certificates (files and/or zip archives), streaming one NDJSON line per certificate"""
+    uploads = [(file.filename, file.stream)
+               for file in request.files.getlist('files') + request.files.getlist('file')
+               if file.filename]
+    if not uploads:
+        return jsonify({'success': False, 'error': 'No file uploaded'}), 400
+
+    # Werkzeug closes request files before the streamed body is generated
+    worker = (partial(verify_certificate_bytes, index=index_server.client()) if NEAR_DUPLICATE_CACHE
+              else verify_certificate_bytes)
+    results = stream_batch(iter_spooled_items(spool_uploads(uploads)), worker,
+                           cache=verdict_cache if VERDICT_CACHE else None)
+    return Response(stream_with_context(results), mimetype='application/x-ndjson')
 
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'message': 'Certificate verification API is running'})
+    return jsonify({'status': 'healthy', 'message': 'Certificate verification API is running',
+                    'ocr_cache': ocr_cache.stats(), 'registry': live_registry.stats(),
+                    'near_duplicates': near_duplicates.stats(), 'verdict_cache': verdict_cache.stats(),
+                    'ocr_backend': ocr_backend_stats(), 'institutions': institutions.stats()})
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Stage latency histograms for Prometheus to scrape"""
+    return Response(expose_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
 
 
 if __name__ == '__main__':
+    warm_up_in_background(import_pipeline, live_registry.current, compile_institutions, build_seal_index,
+                          start_ocr_backend)
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
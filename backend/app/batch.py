@@ -0,0 +1,167 @@
+# backend/app/batch.py
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'tiff'}
+MAX_FILE_SIZE = 10 * 1024 * 1024
+
+# Worker processes for batch verification, and how many certificates may be
+# read into memory (queued or running) at once
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", os.cpu_count() or 1))
+BATCH_MAX_IN_FLIGHT = int(os.environ.get("BATCH_MAX_IN_FLIGHT", 2 * BATCH_WORKERS))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def file_extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+
+def read_limited(stream, filename):
+    """Read an upload, returning (bytes, error) with the size limit enforced"""
+    data = stream.read(MAX_FILE_SIZE + 1)
+    if len(data) > MAX_FILE_SIZE:
+        return None, f"File too large: {filename}"
+    return data, None
+
+
+def iter_zip_items(filename, stream):
+    """Yield (filename, bytes, error) for each certificate in a zip archive, one member at a time"""
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile as e:
+        yield filename, None, f"Invalid zip archive: {e}"
+        return
+
+    with archive:
+        for member in archive.infolist():
+            name = member.filename
+            if member.is_dir() or name.startswith('__MACOSX/'):
+                continue
+            if file_extension(name) not in ALLOWED_EXTENSIONS:
+                yield name, None, 'Invalid file type'
+            elif member.file_size > MAX_FILE_SIZE:
+                yield name, None, f"File too large: {name}"
+            else:
+                with archive.open(member) as f:
+                    data, error = read_limited(f, name)
+                yield name, data, error
+
+
+def iter_batch_items(uploads):
+    """Yield (filename, bytes, error) for every certificate in (filename, stream) uploads.
+
+    Zip archives are expanded lazily, so only the items currently being
+    handed to the pool are held in memory.
+    """
+    for filename, stream in uploads:
+        extension = file_extension(filename)
+        if extension == 'zip':
+            yield from iter_zip_items(filename, stream)
+        elif extension in ALLOWED_EXTENSIONS:
+            data, error = read_limited(stream, filename)
+            yield filename, data, error
+        else:
+            yield filename, None, 'Invalid file type'
+
+
+def spool_uploads(uploads):
+    """Copy (filename, stream) uploads into temp files owned by the caller.
+
+    Needed when the framework closes request files before a streamed
+    response has been fully generated. Small files stay in memory, larger
+    ones are spooled to disk.
+    """
+    spooled = []
+    for filename, stream in uploads:
+        copy = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        shutil.copyfileobj(stream, copy)
+        copy.seek(0)
+        spooled.append((filename, copy))
+    return spooled
+
+
+def iter_spooled_items(spooled):
+    """iter_batch_items over spooled uploads, closing them once consumed"""
+    try:
+        yield from iter_batch_items(spooled)
+    finally:
+        for _, copy in spooled:
+            copy.close()
+
+
+def get_executor():
+    """Process pool shared by all batch requests, created on first use.
+
+    Workers are spawned, not forked: the server already runs threads
+    (region OCR, registry refresh) and holds SQLite connections, which
+    a forked child would inherit mid-use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=BATCH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def to_ndjson(result):
+    return json.dumps(result, default=str) + "\n"
+
+
+def stream_batch(items, worker, max_in_flight=None, cache=None, endpoint="/api/verify-batch"):
+    """Run worker(filename, data) for each item in the process pool.
+
+    Yields one NDJSON line per certificate in completion order. At most
+    max_in_flight certificates are submitted at a time, so memory stays
+    bounded however large the batch is. With a VerdictCache, certificates
+    it already holds are answered here without reaching the pool, and new
+    verdicts are added to it as they come back.
+    """
+    max_in_flight = max_in_flight or BATCH_MAX_IN_FLIGHT
+    executor = get_executor()
+    items = enumerate(items)
+    pending = {}
+    exhausted = False
+
+    try:
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                try:
+                    index, (filename, data, error) = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if error:
+                    yield to_ndjson({'index': index, 'filename': filename, 'success': False, 'error': error})
+                    continue
+                key, cached = cache.lookup(data, endpoint) if cache is not None else (None, None)
+                if cached is not None:
+                    yield to_ndjson({'index': index, 'filename': filename, **cached})
+                    continue
+                pending[executor.submit(worker, filename, data)] = (index, filename, key)
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, filename, key = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'success': False, 'error': str(e)}
+                else:
+                    if cache is not None and 'registry_version' in result.get('pipeline', {}):
+                        cache.put(key, result, result['pipeline']['registry_version'])
+                yield to_ndjson({'index': index, 'filename': filename, **result})
+    finally:
+        # Client went away or the batch failed: drop work that has not started
+        for future in pending:
+            future.cancel()
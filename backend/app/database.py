@@ -2,16 +2,89 @@
 
 import sqlite3
 import os
+import threading
 
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), '..', 'your_database.db')
 
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Prepared statements each pooled connection keeps compiled, keyed by SQL text
+STATEMENT_CACHE_SIZE = 256
 
-def init_database():
-    conn = get_db_connection()
+# Constant SQL strings, so repeated calls hit the connection's statement cache
+SELECT_INSTITUTION_ASSETS = "SELECT seal_image_path, signature_image_path FROM institutions WHERE code = ?"
+SELECT_CERTIFICATE_BY_HASH = "SELECT * FROM certificates WHERE cert_id = ? AND digital_hash = ?"
+
+
+class ConnectionPool:
+    """One reusable WAL-mode connection per thread (and per process) for a database file.
+
+    WAL lets readers run while another connection writes, so worker
+    threads never block each other on lookups. Connections are opened
+    lazily and kept for the life of the thread instead of being opened and
+    torn down around every query.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        # A forked worker must not reuse its parent's connection
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._open()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def release(self):
+        """Close the calling thread's connection, for threads that end after their work"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        self._local = threading.local()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=DATABASE_PATH):
+    """Process-wide ConnectionPool for a database file"""
+    path = os.path.abspath(path)
+    with _pools_lock:
+        if path not in _pools:
+            _pools[path] = ConnectionPool(path)
+        return _pools[path]
+
+
+def init_database(path=DATABASE_PATH):
+    conn = get_pool(path).connection()
     cursor = conn.cursor()
 
     create_table_sql = """
@@ -25,30 +98,103 @@ def init_database():
     """
     cursor.execute(create_table_sql)
 
-    institutions_data = [
-        ('JHAR', 'Jharkhand State University', 'backend/assets/seals/jhar_seal.png', 'backend/assets/signatures/jhar_signature.png'),
-        ('RANC', 'Ranchi Tech Institute', 'backend/assets/seals/ranc_seal.png', 'backend/assets/signatures/ranc_signature.png'),
-        ('JHAR_BS', 'Jharkhand Business School', 'backend/assets/seals/jhar_bs_seal.png', 'backend/assets/signatures/jhar_bs_signature.png'),
-    ]
+    create_certificates_sql = """
+    CREATE TABLE IF NOT EXISTS certificates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cert_id TEXT NOT NULL UNIQUE,
+        name TEXT,
+        dob TEXT,
+        course TEXT,
+        year INTEGER,
+        grade TEXT,
+        institution TEXT,
+        issued_on TEXT,
+        certificate_type TEXT,
+        institution_code TEXT,
+        status TEXT,
+        digital_hash TEXT NOT NULL DEFAULT '',
+        version INTEGER NOT NULL DEFAULT 0
+    );
+    """
+    cursor.execute(create_certificates_sql)
+    columns = [row['name'] for row in cursor.execute("PRAGMA table_info(certificates)")]
+    if 'version' not in columns:
+        cursor.execute("ALTER TABLE certificates ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    # QR verification probes (cert_id, digital_hash) together; the index covers it
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_certificates_cert_hash ON certificates (cert_id, digital_hash);")
+    # Running servers pull rows ingested after the version they already hold
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_certificates_version ON certificates (version);")
 
-    insert_sql = """
-    INSERT OR IGNORE INTO institutions (code, name, seal_image_path, signature_image_path)
-    VALUES (?, ?, ?, ?);
+    create_versions_sql = """
+    CREATE TABLE IF NOT EXISTS registry_versions (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        source TEXT,
+        rows_read INTEGER,
+        rows_changed INTEGER,
+        started_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        completed_at TEXT
+    );
     """
-    cursor.executemany(insert_sql, institutions_data)
+    cursor.execute(create_versions_sql)
+
+    # Rows of an ingest in progress; servers never read them, they are published in one transaction
+    create_staging_sql = """
+    CREATE TABLE IF NOT EXISTS certificates_staging (
+        batch TEXT NOT NULL,
+        cert_id TEXT,
+        name TEXT,
+        dob TEXT,
+        course TEXT,
+        year INTEGER,
+        grade TEXT,
+        institution TEXT,
+        issued_on TEXT,
+        certificate_type TEXT,
+        institution_code TEXT,
+        status TEXT,
+        digital_hash TEXT
+    );
+    """
+    cursor.execute(create_staging_sql)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_certificates_staging_batch ON certificates_staging (batch);")
+
+    sync_institutions(cursor)
 
     conn.commit()
-    conn.close()
     print("Database initialized successfully!")
 
-def get_institution_assets(institution_code):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def sync_institutions(cursor):
+    """Mirror the institutions file into the institutions table; the app itself reads the file"""
+    from .institutions import institutions
+
+    institutions_data = [
+        (code, bundle.name, bundle.config['seal']['reference_image'], bundle.config['signature']['reference_image'])
+        for code, bundle in institutions.current().bundles.items()
+        if bundle.seal_path and bundle.signature_path
+    ]
+
+    upsert_sql = """
+    INSERT INTO institutions (code, name, seal_image_path, signature_image_path)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(code) DO UPDATE SET
+        name = excluded.name,
+        seal_image_path = excluded.seal_image_path,
+        signature_image_path = excluded.signature_image_path;
+    """
+    cursor.executemany(upsert_sql, institutions_data)
+    codes = [row[0] for row in institutions_data]
+    cursor.execute(f"DELETE FROM institutions WHERE code NOT IN ({','.join('?' * len(codes))})", codes)
 
-    cursor.execute("SELECT seal_image_path, signature_image_path FROM institutions WHERE code = ?", (institution_code,))
 
-    result = cursor.fetchone()
-    conn.close()
+def get_institution_assets(institution_code):
+    conn = get_pool().connection()
+    result = conn.execute(SELECT_INSTITUTION_ASSETS, (institution_code,)).fetchone()
     if result:
         return {"seal_path": result['seal_image_path'], "signature_path": result['signature_image_path']}
-    return None
\ No newline at end of file
+    return None
+
+def find_certificate_by_hash(cert_id, digital_hash):
+    """Certificate row for an ID/hash pair, as a dict, or None"""
+    conn = get_pool().connection()
+    result = conn.execute(SELECT_CERTIFICATE_BY_HASH, (cert_id, digital_hash)).fetchone()
+    return dict(result) if result else None
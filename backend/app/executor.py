@@ -0,0 +1,129 @@
+# backend/app/executor.py
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .metrics import Histogram, expose_value
+
+# Threads running the CPU stages (Tesseract, OpenCV), and how many requests
+# may wait for a free thread before new ones are turned away with a 503
+VERIFY_WORKERS = int(os.environ.get("VERIFY_WORKERS", os.cpu_count() or 1))
+VERIFY_QUEUE_SIZE = int(os.environ.get("VERIFY_QUEUE_SIZE", 4 * VERIFY_WORKERS))
+
+
+class WorkerPoolFull(Exception):
+    """Raised when the verification pool has no room for another request"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Verification queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """Thread pool for blocking pipeline stages with admission control.
+
+    OpenCV and the Tesseract subprocess release the GIL, so threads keep
+    the event loop free while several certificates are processed at once.
+    At most max_workers + max_queue jobs are admitted; the rest are rejected
+    immediately instead of piling up behind slow certificates.
+    """
+
+    def __init__(self, max_workers=VERIFY_WORKERS, max_queue=VERIFY_QUEUE_SIZE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="verify")
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+        self.wait_seconds = Histogram(
+            "verification_pool_wait_seconds", "Time verification jobs waited for a free thread.", ())
+
+    @property
+    def capacity(self):
+        return self.max_workers + self.max_queue
+
+    def retry_after(self):
+        """Seconds until a slot is likely to free up, from the average run time"""
+        average_run = self.run_seconds_total / self.completed if self.completed else 1.0
+        waves = (self.in_flight - self.running) / self.max_workers + 1
+        return max(1, math.ceil(average_run * waves))
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool, raising WorkerPoolFull if it is saturated"""
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise WorkerPoolFull(self.retry_after())
+            self.in_flight += 1
+            self.submitted += 1
+
+        future = self._executor.submit(self._call, time.monotonic(), fn, args)
+        # Release the slot when the job finishes or is cancelled before starting
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _call(self, enqueued_at, fn, args):
+        started_at = time.monotonic()
+        waited = started_at - enqueued_at
+        with self._lock:
+            self.running += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        self.wait_seconds.observe(waited)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.run_seconds_total += time.monotonic() - started_at
+
+    def _release(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            started = self.completed + self.running
+            return {
+                'workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'queue_depth': self.in_flight - self.running,
+                'running': self.running,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'wait_seconds_avg': round(self.wait_seconds_total / started, 4) if started else 0.0,
+                'wait_seconds_max': round(self.wait_seconds_max, 4),
+                'run_seconds_avg': round(self.run_seconds_total / self.completed, 4) if self.completed else 0.0,
+            }
+
+    def expose(self):
+        """Queue depth, occupancy, job counts and queue waits in the Prometheus text format"""
+        stats = self.stats()
+        return "\n".join([
+            expose_value("verification_pool_workers", "gauge", "Threads running verification jobs.", stats['workers']),
+            expose_value("verification_pool_queue_capacity", "gauge",
+                         "Jobs that may wait for a thread before new ones are rejected.", stats['max_queue']),
+            expose_value("verification_pool_queue_depth", "gauge",
+                         "Admitted jobs waiting for a free thread.", stats['queue_depth']),
+            expose_value("verification_pool_running", "gauge", "Verification jobs running now.", stats['running']),
+            expose_value("verification_pool_completed_total", "counter",
+                         "Verification jobs finished.", stats['completed']),
+            expose_value("verification_pool_rejected_total", "counter",
+                         "Verification jobs turned away because the pool was full.", stats['rejected']),
+            self.wait_seconds.expose(),
+        ])
+
+
+verification_pool = BoundedExecutor()
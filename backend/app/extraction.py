@@ -0,0 +1,184 @@
+# backend/app/extraction.py
+import hashlib
+import json
+import re
+from collections import deque
+
+from .institutions import institutions as institution_registry
+
+# Fields captured by the single-pass scan. The awardee phrase only consumes
+# the phrase itself and captures the name through a lookahead, so labels or
+# years printed after the name are still seen by the same scan. A label
+# followed by a university id leaves the id to the cert_id branch, which
+# also reads ids OCR split with spaces.
+FIELD_PATTERN = r'''
+    Cert(?:ificate)?\s*No(?![:\-\s]*JH[-_\ ]?UNI[-_\ ]?\d{4}[-_\ ]?\d+)[:\-\s]*(?P<cert_no>[A-Z0-9\-]+)
+  | (?P<cert_id>JH[-_\ ]?UNI[-_\ ]?\d{4}[-_\ ]?\d+)
+  | (?:awarded\ to|is\ given\ to|THIS\ CERTIFICATE\ IS\ GIVEN\ TO)(?=\s*\n?(?P<awardee>[A-Za-z\s]+))
+  | \b(?P<year>(?:19|20)\d{2})\b
+'''
+CERT_ID_PATTERN = r'JH[-_ ]?UNI[-_ ]?\d{4}[-_ ]?\d+'
+COURSE_PATTERNS = [r'(BBA|M\.?Sc\s+[A-Za-z]+|BA\s+[A-Za-z]+)', r'(Bachelor.*|Master.*|Diploma.*)']
+
+
+def clean_name(name):
+    # Remove common trailing phrases that are not part of name
+    name = re.sub(r'\b(PRESENTED.*|For completing.*|In the year.*)$', '', name, flags=re.IGNORECASE)
+    # Keep only alphabetic parts
+    name = re.sub(r'[^A-Za-z\s]', '', name)
+    return name.strip()
+
+
+class InstitutionMatcher:
+    """Aho-Corasick automaton over institution names and their OCR aliases.
+
+    Finds the leftmost (then longest) alias in one pass over the text, so
+    the cost per document does not grow with the number of institutions.
+    Whitespace is skipped while scanning, which also matches names that
+    OCR ran together ("JharkhandStateUniversity").
+    """
+
+    def __init__(self, aliases):
+        self.aliases = dict(aliases)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for alias, canonical in aliases.items():
+            key = re.sub(r'\s+', '', alias.lower())
+            if not key:
+                continue
+            state = 0
+            for char in key:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append((len(key), canonical))
+
+        self.max_length = max((length for outputs in self.output for length, _ in outputs), default=0)
+
+        # Breadth-first pass to fill failure links and merge outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text):
+        """Leftmost-longest institution in text, as its canonical name, or None"""
+        best = None
+        positions = []
+        state = 0
+        for index, char in enumerate(text):
+            if char.isspace():
+                continue
+            char = char.lower()
+            positions.append(index)
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+
+            for length, canonical in self.output[state]:
+                start = positions[-length]
+                # Aliases must not sit inside a longer word ("rti" in "certificate")
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if index + 1 < len(text) and text[index + 1].isalnum():
+                    continue
+                candidate = (start, start - index, canonical)
+                if best is None or candidate < best:
+                    best = candidate
+
+            # Any later match starts at or after this character, so stop once it is past the best one
+            earliest = len(positions) + 1 - self.max_length
+            if best is not None and earliest >= 0 and positions[earliest] > best[0]:
+                break
+        return best[2] if best else None
+
+
+class ExtractionEngine:
+    """Precompiled certificate field extractor for OCR text"""
+
+    def __init__(self, institution_mapping=None, name_to_code=None):
+        # Without explicit mappings the engine follows the institutions file as it is reloaded
+        self._matcher = None
+        if institution_mapping is not None or name_to_code is not None:
+            aliases = {name.lower(): name for name in name_to_code or ()}
+            aliases.update(institution_mapping or {})
+            self._matcher = InstitutionMatcher(aliases)
+        self.fields = re.compile(FIELD_PATTERN, re.IGNORECASE | re.VERBOSE)
+        self.cert_id = re.compile(CERT_ID_PATTERN, re.IGNORECASE)
+        self.courses = [re.compile(pattern, re.IGNORECASE) for pattern in COURSE_PATTERNS]
+
+    @property
+    def institutions(self):
+        return self._matcher or institution_registry.current().matcher
+
+    @property
+    def fingerprint(self):
+        """Changes whenever the patterns or institution aliases do"""
+        payload = json.dumps([FIELD_PATTERN, CERT_ID_PATTERN, COURSE_PATTERNS, self.institutions.aliases],
+                             sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    def find_institution(self, text):
+        return self.institutions.find(text)
+
+    def split_awardee(self, raw_name):
+        """Split an awardee line into (name, course) when the course is stuck to the name"""
+        raw_name = re.sub(r'\s+', ' ', raw_name).strip()
+        course = None
+        for pattern in self.courses:
+            course_match = pattern.search(raw_name)
+            if course_match:
+                course = course_match.group(1).strip()
+                raw_name = raw_name.replace(course, "").strip()
+                break
+        return clean_name(raw_name), course
+
+    def scan(self, text):
+        """First occurrence of every field pattern, from one pass over the text"""
+        found = {}
+        for match in self.fields.finditer(text):
+            field = match.lastgroup
+            if field not in found:
+                found[field] = match.group(field)
+            if len(found) == len(self.fields.groupindex):
+                break
+        return found
+
+    def extract(self, text):
+        """Certificate info from OCR text, in the shape extract_certificate_info returns"""
+        info = {}
+        found = self.scan(text)
+
+        institution = self.find_institution(text)
+        if institution:
+            info["institution"] = institution
+
+        if "awardee" in found:
+            name, course = self.split_awardee(found["awardee"])
+            if course:
+                info["course"] = course
+            info["name"] = name
+
+        cert_no = found.get("cert_id") or (found.get("cert_no") or "").strip()
+        if self.cert_id.fullmatch(cert_no):
+            cert_no = re.sub(r'[\s\-_]+', '-', cert_no).upper()
+        info["certificate_no"] = cert_no or "-"
+
+        if "year" in found:
+            info["year"] = found["year"]
+
+        return info
+
+
+engine = ExtractionEngine()
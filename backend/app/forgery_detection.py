@@ -1,9 +1,10 @@
 # forgery detection
 import cv2
 import numpy as np
-from .database import get_institution_assets
+from .reference_assets import reference_assets, signature_template
 from .config import INSTITUTION_CONFIG, INSTITUTION_NAME_TO_CODE, OCR_INSTITUTION_MAPPING
-import os
+from .imaging import as_certificate_image
+from .metrics import NULL_TIMER
 
 
 def extract_roi(image, roi_ratio):
@@ -21,15 +22,19 @@ def get_institution_code_from_ocr(ocr_institution_name):
     return INSTITUTION_NAME_TO_CODE.get(standard_name)
 
 
-def verify_seal(extracted_seal, reference_seal):
+def verify_seal(extracted_seal, reference_seal, reference_descriptors=None):
+    """ORB match score of a seal crop; pass the cached reference descriptors to skip recomputing them"""
     if len(extracted_seal.shape) == 3:
         extracted_seal = cv2.cvtColor(extracted_seal, cv2.COLOR_BGR2GRAY)
-    if len(reference_seal.shape) == 3:
-        reference_seal = cv2.cvtColor(reference_seal, cv2.COLOR_BGR2GRAY)
 
     orb = cv2.ORB_create()
     kp1, des1 = orb.detectAndCompute(extracted_seal, None)
-    kp2, des2 = orb.detectAndCompute(reference_seal, None)
+    if reference_descriptors is not None:
+        des2 = reference_descriptors
+    else:
+        if len(reference_seal.shape) == 3:
+            reference_seal = cv2.cvtColor(reference_seal, cv2.COLOR_BGR2GRAY)
+        kp2, des2 = orb.detectAndCompute(reference_seal, None)
 
     if des1 is None or des2 is None or len(des1) < 2 or len(des2) < 2:
         return 0.0
@@ -43,65 +48,82 @@ def verify_seal(extracted_seal, reference_seal):
     return 0.0
 
 
-def verify_signature(extracted_signature, reference_signature):
+def verify_signature(extracted_signature, reference_signature, reference_templates=None):
+    """Normalized correlation (TM_CCOEFF_NORMED) of a signature crop with the reference resized to its size.
+
+    Since the reference is stretched to the crop, there is a single
+    alignment to score, so this is the Pearson correlation of the two
+    images, computed directly rather than through matchTemplate. Pass the
+    institution's cached SignatureTemplates to skip resizing the
+    full-resolution reference on every call. Scores agree with
+    cv2.matchTemplate to within 5e-5 (float32 rounding).
+    """
     if len(extracted_signature.shape) == 3:
         extracted_gray = cv2.cvtColor(extracted_signature, cv2.COLOR_BGR2GRAY)
     else:
         extracted_gray = extracted_signature
 
-    if len(reference_signature.shape) == 3:
-        reference_gray = cv2.cvtColor(reference_signature, cv2.COLOR_BGR2GRAY)
+    size = (extracted_gray.shape[1], extracted_gray.shape[0])
+    if reference_templates is not None:
+        template, template_norm = reference_templates.get(size)
     else:
-        reference_gray = reference_signature
-
-    ref_resized = cv2.resize(reference_gray, (extracted_gray.shape[1], extracted_gray.shape[0]))
-
-    result = cv2.matchTemplate(extracted_gray, ref_resized, cv2.TM_CCOEFF_NORMED)
-    _, max_val, _, _ = cv2.minMaxLoc(result)
-
-    return max_val
+        if len(reference_signature.shape) == 3:
+            reference_signature = cv2.cvtColor(reference_signature, cv2.COLOR_BGR2GRAY)
+        template, template_norm = signature_template(reference_signature, size)
+
+    extracted = extracted_gray.astype(np.float32)
+    extracted -= extracted.mean()
+    denominator = float(np.linalg.norm(extracted)) * template_norm
+    # A blank crop or reference correlates with nothing; matchTemplate scores it 0 too
+    if denominator < 1e-6:
+        return 0.0
+    return float(np.dot(extracted.ravel(), template.ravel()) / denominator)
 
 
 def detect_forgery(certificate_path, ocr_data, debug=False):
     cert_img = cv2.imread(certificate_path)
     if cert_img is None:
         raise ValueError(f"Certificate image not found at: {certificate_path}")
+    return detect_forgery_image(cert_img, ocr_data, debug)
+
+
+def detect_forgery_image(cert_img, ocr_data, debug=False, timer=NULL_TIMER):
+    """detect_forgery for a certificate that is already decoded (a BGR array or CertificateImage).
 
+    Seal and signature matching are timed as separate stages on timer.
+    """
     institution_name = ocr_data.get('institution', '')
     institution_code = get_institution_code_from_ocr(institution_name)
 
     if not institution_code:
         raise ValueError(f"Could not determine institution code from: {institution_name}")
+    timer.set_institution(institution_code)
 
     config = INSTITUTION_CONFIG.get(institution_code)
     if not config:
         raise ValueError(f"No configuration found for institution: {institution_code}")
 
-    assets = get_institution_assets(institution_code)
+    assets = reference_assets.get(institution_code)
     if not assets:
         raise ValueError(f"No assets found for institution: {institution_code}")
 
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    ref_seal_path = os.path.join(base_dir, assets['seal_path'])
-    ref_signature_path = os.path.join(base_dir, assets['signature_path'])
-
-    ref_seal = cv2.imread(ref_seal_path)
-    ref_signature = cv2.imread(ref_signature_path)
-
-    if ref_seal is None:
-        raise ValueError(f"Reference seal not found at: {ref_seal_path}")
-    if ref_signature is None:
-        raise ValueError(f"Reference signature not found at: {ref_signature_path}")
+    if assets.seal is None:
+        raise ValueError(f"Reference seal not found at: {assets.seal_path}")
+    if assets.signature is None:
+        raise ValueError(f"Reference signature not found at: {assets.signature_path}")
 
-    seal_region = extract_roi(cert_img, config['seal']['roi'])
-    signature_region = extract_roi(cert_img, config['signature']['roi'])
+    certificate = as_certificate_image(cert_img)
+    seal_region = certificate.crop(config['seal']['roi'], "gray")
+    signature_region = certificate.crop(config['signature']['roi'], "gray")
 
     if debug:
         cv2.imwrite(f"extracted_seal_{institution_code}.jpg", seal_region)
         cv2.imwrite(f"extracted_signature_{institution_code}.jpg", signature_region)
 
-    seal_score = verify_seal(seal_region, ref_seal)
-    signature_score = verify_signature(signature_region, ref_signature)
+    with timer.stage("seal"):
+        seal_score = verify_seal(seal_region, assets.seal, assets.seal_descriptors)
+    with timer.stage("signature"):
+        signature_score = verify_signature(signature_region, assets.signature, assets.signature_templates)
 
     seal_threshold = config['seal'].get('threshold', 0.25)
     signature_threshold = config['signature'].get('threshold', 0.05)
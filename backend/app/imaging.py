@@ -0,0 +1,79 @@
+# backend/app/imaging.py
+import cv2
+import numpy as np
+
+
+def decode_image(contents):
+    """Decode uploaded image bytes into a BGR ndarray, the layout cv2.imread returns"""
+    image = cv2.imdecode(np.frombuffer(contents, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode uploaded image")
+    return image
+
+
+def to_ocr_image(image):
+    """RGB view of a decoded BGR image for pytesseract, which treats arrays as RGB"""
+    if len(image.shape) == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def crop_roi(image, roi):
+    """Slice of image for a fractional [x_start, y_start, x_end, y_end] ROI; a view, not a copy"""
+    height, width = image.shape[:2]
+    return image[int(roi[1] * height):int(roi[3] * height), int(roi[0] * width):int(roi[2] * width)]
+
+
+class CertificateImage:
+    """A decoded upload plus the views the pipeline stages derive from it.
+
+    Grayscale, RGB, binarized and pyramid versions are computed on first
+    access and kept, so the QR, seal, signature and OCR stages share one
+    conversion instead of each converting their own crop. ROI crops are
+    slices of those full-page arrays. Two threads racing on a first access
+    just compute the same view twice.
+    """
+
+    def __init__(self, bgr):
+        self.bgr = bgr
+        self._views = {}
+
+    def _view(self, key, compute):
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = compute()
+        return view
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+    @property
+    def gray(self):
+        return self._view("gray", lambda: cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY)
+                          if len(self.bgr.shape) == 3 else self.bgr)
+
+    @property
+    def rgb(self):
+        """Page as pytesseract expects it (see to_ocr_image)"""
+        return self._view("rgb", lambda: to_ocr_image(self.bgr))
+
+    @property
+    def binary(self):
+        """Otsu-thresholded grayscale: ink 0, paper 255"""
+        return self._view("binary", lambda: cv2.threshold(self.gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1])
+
+    def pyramid(self, level):
+        """Grayscale page halved level times (level 0 is the page itself)"""
+        if level == 0:
+            return self.gray
+        return self._view(("pyramid", level), lambda: cv2.pyrDown(self.pyramid(level - 1)))
+
+    def crop(self, roi, view="bgr"):
+        """ROI of one of the views ("bgr", "gray", "rgb" or "binary")"""
+        return self._view((view, tuple(roi)), lambda: crop_roi(getattr(self, view), roi))
+
+
+def as_certificate_image(image):
+    """CertificateImage for a decoded array; an existing CertificateImage is passed through"""
+    return image if isinstance(image, CertificateImage) else CertificateImage(image)
@@ -0,0 +1,298 @@
+# backend/app/institutions.py
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Mapping
+
+# Repository root; reference image paths in the institutions file are relative to it
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+INSTITUTIONS_FILE = os.environ.get(
+    "INSTITUTIONS_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "institutions.yaml"))
+# How often running servers check the file and the reference images it names for changes
+INSTITUTIONS_REFRESH_SECONDS = float(os.environ.get("INSTITUTIONS_REFRESH_SECONDS", 10))
+
+# Per-institution sections a layout is described by
+LAYOUT_SECTIONS = ("seal", "signature", "text", "qr")
+
+
+def file_fingerprint(path):
+    """Cheap change marker for a file: (mtime_ns, size), or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_digest(path):
+    """SHA-256 of a file's content, or None if it is missing"""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def digest(*parts):
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+class InstitutionBundle:
+    """One institution as loaded: name, OCR aliases, layout config and reference artifacts.
+
+    A bundle is never changed after it is built; an edit produces a new
+    bundle. The decoded reference seal and signature, their descriptors
+    and signature templates (ReferenceAssets) are built once, on
+    compile() or first use, and stay with the bundle.
+    """
+
+    def __init__(self, code, entry, base_dir=BASE_DIR):
+        self.code = code
+        self.name = entry["name"]
+        self.aliases = tuple(alias.lower() for alias in entry.get("aliases") or ())
+        # The shape INSTITUTION_CONFIG has always had; treat as read-only
+        self.config = {section: copy.deepcopy(entry[section]) for section in LAYOUT_SECTIONS if section in entry}
+        self.seal_path = self._path(base_dir, "seal")
+        self.signature_path = self._path(base_dir, "signature")
+        self.digests = {path: file_digest(path) for path in (self.seal_path, self.signature_path) if path}
+        self.version = digest(code, self.name, self.aliases, self.config, self.digests)
+        self._assets = None
+        self._lock = threading.Lock()
+
+    def _path(self, base_dir, section):
+        path = self.config.get(section, {}).get("reference_image")
+        return os.path.join(base_dir, path) if path else None
+
+    @property
+    def assets(self):
+        """ReferenceAssets for this bundle, or None if its reference images are not configured"""
+        with self._lock:
+            if self._assets is None and self.seal_path and self.signature_path:
+                # OpenCV loads here, not when the institutions file is read
+                from .reference_assets import ReferenceAssets
+
+                self._assets = ReferenceAssets(self.code, self.seal_path, self.signature_path)
+            return self._assets
+
+    def compile(self):
+        self.assets
+        return self
+
+
+class InstitutionSnapshot:
+    """Every institution bundle from one load of the institutions file, plus the lookups derived from them"""
+
+    def __init__(self, bundles, source_fingerprint):
+        self.bundles = bundles
+        self.source_fingerprint = source_fingerprint
+        self.config = {code: bundle.config for code, bundle in bundles.items()}
+        self.name_to_code = {bundle.name: code for code, bundle in bundles.items()}
+        self.ocr_mapping = {}
+        for bundle in bundles.values():
+            self.ocr_mapping[bundle.name.lower()] = bundle.name
+            self.ocr_mapping.update((alias, bundle.name) for alias in bundle.aliases)
+        # Everything a verdict depends on, and the part OCR results depend on
+        self.version = digest(sorted(bundle.version for bundle in bundles.values()))
+        self.layout_version = digest(self.ocr_mapping, {code: config.get("text") for code, config in self.config.items()})
+        self._matcher = None
+        self._lock = threading.Lock()
+
+    def get(self, code):
+        return self.bundles.get(code)
+
+    @property
+    def matcher(self):
+        """InstitutionMatcher over every name and alias, built on first use"""
+        with self._lock:
+            if self._matcher is None:
+                from .extraction import InstitutionMatcher
+
+                self._matcher = InstitutionMatcher(self.ocr_mapping)
+            return self._matcher
+
+    def compile(self, codes=None):
+        for code in codes if codes is not None else self.bundles:
+            if code in self.bundles:
+                self.bundles[code].compile()
+        return self
+
+
+def load_institutions(path):
+    """{code: entry} from an institutions YAML file"""
+    import yaml
+
+    with open(path) as f:
+        data = yaml.safe_load(f) or {}
+    entries = data.get("institutions") or {}
+    if not isinstance(entries, dict) or not entries:
+        # Also what a file caught halfway through being rewritten looks like
+        raise ValueError(f"{path} lists no institutions")
+    for code, entry in entries.items():
+        if not isinstance(entry, dict) or not entry.get("name"):
+            raise ValueError(f"Institution {code} in {path} has no name")
+    return entries
+
+
+class InstitutionRegistry:
+    """The institutions in INSTITUTIONS_FILE, reloaded when it or a reference image changes.
+
+    current() hands out an immutable InstitutionSnapshot. A reload builds
+    the next snapshot next to the live one on a background thread,
+    reusing the bundles of unchanged institutions, compiles the new
+    bundles if the live ones were compiled, and then swaps the snapshot
+    in with one assignment. Requests never wait for a reload and keep
+    whichever snapshot they got. A file that fails to load is reported
+    and the previous snapshot stays live.
+    """
+
+    def __init__(self, path=INSTITUTIONS_FILE, refresh_seconds=INSTITUTIONS_REFRESH_SECONDS, base_dir=BASE_DIR):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self.base_dir = base_dir
+        self.reloads = 0
+        self.errors = 0
+        self.last_error = None
+        self._snapshot = None
+        self._compiled = False
+        self._checked_at = 0.0
+        self._reloading = False
+        self._failed_fingerprint = None
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    @property
+    def version(self):
+        return self.current().version
+
+    def subscribe(self, callback):
+        """Call callback(snapshot) after each new snapshot is swapped in"""
+        self._subscribers.append(callback)
+
+    def current(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.reload()
+        if time.monotonic() - self._checked_at >= self.refresh_seconds:
+            self._reload_in_background()
+        return snapshot
+
+    def _reload_in_background(self):
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+            self._checked_at = time.monotonic()
+        threading.Thread(target=self._background_reload, name="institutions-reload", daemon=True).start()
+
+    def _background_reload(self):
+        try:
+            self.reload()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            print(f"Institutions reload failed, keeping the loaded ones: {e}")
+        finally:
+            self._reloading = False
+
+    def _source_fingerprint(self, entries=None):
+        paths = [self.path]
+        snapshot = self._snapshot
+        bundles = snapshot.bundles.values() if snapshot is not None and entries is None else ()
+        for bundle in bundles:
+            paths.extend(path for path in (bundle.seal_path, bundle.signature_path) if path)
+        for entry in (entries or {}).values():
+            for section in ("seal", "signature"):
+                path = (entry.get(section) or {}).get("reference_image")
+                if path:
+                    paths.append(os.path.join(self.base_dir, path))
+        return tuple((path, file_fingerprint(path)) for path in paths)
+
+    def reload(self, force=False):
+        """Load the file again if it or a reference image changed; returns the live snapshot"""
+        previous = self._snapshot
+        fingerprint = self._source_fingerprint()
+        if previous is not None and not force and fingerprint in (previous.source_fingerprint,
+                                                                  self._failed_fingerprint):
+            self._checked_at = time.monotonic()
+            return previous
+
+        try:
+            entries = load_institutions(self.path)
+        except Exception:
+            # Not retried (or reported again) until the file changes once more
+            self._failed_fingerprint = fingerprint
+            raise
+        bundles = {}
+        for code, entry in entries.items():
+            bundle = InstitutionBundle(code, entry, self.base_dir)
+            old = previous.get(code) if previous is not None else None
+            # Unchanged institutions keep their bundle, and with it their warm artifacts
+            bundles[code] = old if old is not None and old.version == bundle.version else bundle
+        snapshot = InstitutionSnapshot(bundles, self._source_fingerprint(entries))
+        if self._compiled:
+            snapshot.compile()
+
+        with self._lock:
+            if self._snapshot is not previous and self._snapshot is not None:
+                # Another reload finished first; its snapshot is at least as new
+                return self._snapshot
+            self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+        if previous is not None and snapshot.version != previous.version:
+            self.reloads += 1
+            for callback in self._subscribers:
+                callback(snapshot)
+        return snapshot
+
+    def compile(self, codes=None):
+        """Build the reference artifacts of every bundle now, and of every bundle loaded later"""
+        self._compiled = True
+        return self.current().compile(codes)
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'institutions': len(snapshot.bundles) if snapshot is not None else 0,
+            'version': snapshot.version if snapshot is not None else None,
+            'reloads': self.reloads,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'refresh_seconds': self.refresh_seconds,
+        }
+
+
+class InstitutionView(Mapping):
+    """Read-only mapping onto one lookup of the current snapshot.
+
+    Lets code written against the old module-level dicts in config.py
+    see reloads without holding on to a snapshot itself.
+    """
+
+    def __init__(self, registry, attribute):
+        self._registry = registry
+        self._attribute = attribute
+
+    def _current(self):
+        return getattr(self._registry.current(), self._attribute)
+
+    def __getitem__(self, key):
+        return self._current()[key]
+
+    def __iter__(self):
+        return iter(list(self._current()))
+
+    def __len__(self):
+        return len(self._current())
+
+    def get(self, key, default=None):
+        return self._current().get(key, default)
+
+    def __repr__(self):
+        return f"InstitutionView({self._attribute}={self._current()!r})"
+
+
+institutions = InstitutionRegistry()
@@ -1,8 +1,11 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from .database import init_database, get_institution_assets
+from fastapi import FastAPI, UploadFile, File, HTTPException, Response
+from fastapi.responses import PlainTextResponse
+from .database import init_database
 from .utils import get_institution_code_from_name
-from .forgery_detection import verify_seal, verify_signature, extract_roi
-import cv2
+from .config import INSTITUTION_NAME_TO_CODE
+from .executor import WorkerPoolFull, verification_pool
+from .metrics import NULL_TIMER, PROMETHEUS_CONTENT_TYPE, StageTimer, expose_metrics
+from .startup import build_seal_index, compile_institutions, import_pipeline, warm_up_in_background
 import os
 import uvicorn
 
@@ -14,6 +17,7 @@ app = FastAPI(title="Academic Certificate Verifier")
 @app.on_event("startup")
 def on_startup():
     init_database()
+    warm_up_in_background(import_pipeline, compile_institutions, build_seal_index)
     print("Database initialized successfully!")
 
 
@@ -22,48 +26,76 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Points
 
 @app.post("/verify")
 async def verify_certificate_endpoint(
+        response: Response,
         file: UploadFile = File(...),
         institution: str = None,
         seal_roi: str = None,
         signature_roi: str = None
 ):
     """API endpoint to verify a certificate"""
+    timer = StageTimer()
     try:
-        # Save uploaded file temporarily
-        file_path = f"temp_{file.filename}"
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-
-        # TODO: Integrate OCR service
-        ocr_data = {
-            'institution': institution or 'Jharkhand State University',
-        }
-
-        img = cv2.imread(file_path)
+        content = await file.read()
 
-        if seal_roi:
-            seal_region = extract_roi(img, eval(seal_roi))
-        else:
-            seal_region = img
+        # OpenCV work runs on the bounded pool so the event loop stays free
+        result = await verification_pool.run(verify_upload, content, institution, seal_roi, signature_roi, timer)
 
-        if signature_roi:
-            signature_region = extract_roi(img, eval(signature_roi))
-        else:
-            signature_region = img
+    except WorkerPoolFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        timer.observe("/verify")
+        raise HTTPException(status_code=500, detail=f"Verification error: {str(e)}",
+                            headers=timer.timing_headers())
+
+    timer.observe("/verify")
+    response.headers.update(timer.timing_headers())
+    return result
+
+
+def verify_upload(content, institution=None, seal_roi=None, signature_roi=None, timer=NULL_TIMER):
+    """Blocking part of /verify: decode the upload, crop the ROIs and verify them"""
+    from .alignment import align_page
+    from .imaging import CertificateImage, decode_image
+    from .seal_index import seal_index
+
+    with timer.stage("decode"):
+        img = decode_image(content)
+    # ROIs are fractions of the upright page, so straighten it before cropping
+    with timer.stage("align"):
+        img, _ = align_page(img)
+    # Seal and signature are matched in grayscale; convert the page once and crop views of it
+    certificate = CertificateImage(img)
+
+    if not institution:
+        # No institution given: recognize it by its seal before falling back to the default
+        with timer.stage("seal_id"):
+            institution_code = seal_index.identify(certificate)
+        institution = next((name for name, code in INSTITUTION_NAME_TO_CODE.items() if code == institution_code), None)
+
+    # TODO: Integrate OCR service
+    ocr_data = {
+        'institution': institution or 'Jharkhand State University',
+    }
 
-        # Perform verification
-        result = verify_certificate(ocr_data, seal_region, signature_region)
+    if seal_roi:
+        seal_region = certificate.crop(eval(seal_roi), "gray")
+    else:
+        seal_region = certificate.gray
 
-        os.remove(file_path)
-        return result
+    if signature_roi:
+        signature_region = certificate.crop(eval(signature_roi), "gray")
+    else:
+        signature_region = certificate.gray
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Verification error: {str(e)}")
+    # Perform verification
+    return verify_certificate(ocr_data, seal_region, signature_region, timer)
 
 
-def verify_certificate(ocr_data, extracted_seal_image, extracted_signature_image):
+def verify_certificate(ocr_data, extracted_seal_image, extracted_signature_image, timer=NULL_TIMER):
     """Main verification function"""
+    from .forgery_detection import verify_seal, verify_signature
+    from .reference_assets import reference_assets
+
     institution_name = ocr_data.get('institution')
     institution_code = get_institution_code_from_name(institution_name)
 
@@ -78,7 +110,7 @@ def verify_certificate(ocr_data, extracted_seal_image, extracted_signature_image
             }
         }
 
-    assets = get_institution_assets(institution_code)
+    assets = reference_assets.get(institution_code)
     if not assets:
         return {
             "authentic": False,
@@ -91,16 +123,10 @@ def verify_certificate(ocr_data, extracted_seal_image, extracted_signature_image
             }
         }
 
-    ref_seal_path = os.path.join(BASE_DIR, assets['seal_path'])
-    ref_signature_path = os.path.join(BASE_DIR, assets['signature_path'])
-
-    ref_seal = cv2.imread(ref_seal_path, 0)
-    ref_signature = cv2.imread(ref_signature_path, 0)
-
-    if ref_seal is None:
+    if assets.seal is None:
         return {
             "authentic": False,
-            "error": f"Reference seal not found at: {ref_seal_path}",
+            "error": f"Reference seal not found at: {assets.seal_path}",
             "details": {
                 "institution": institution_name,
                 "institution_code": institution_code,
@@ -109,10 +135,10 @@ def verify_certificate(ocr_data, extracted_seal_image, extracted_signature_image
             }
         }
 
-    if ref_signature is None:
+    if assets.signature is None:
         return {
             "authentic": False,
-            "error": f"Reference signature not found at: {ref_signature_path}",
+            "error": f"Reference signature not found at: {assets.signature_path}",
             "details": {
                 "institution": institution_name,
                 "institution_code": institution_code,
@@ -121,8 +147,11 @@ def verify_certificate(ocr_data, extracted_seal_image, extracted_signature_image
             }
         }
 
-    seal_score = verify_seal(extracted_seal_image, ref_seal)
-    signature_score = verify_signature(extracted_signature_image, ref_signature)
+    timer.set_institution(institution_code)
+    with timer.stage("seal"):
+        seal_score = verify_seal(extracted_seal_image, assets.seal, assets.seal_descriptors)
+    with timer.stage("signature"):
+        signature_score = verify_signature(extracted_signature_image, assets.signature, assets.signature_templates)
 
     seal_authentic = seal_score >= 0.3
     signature_authentic = signature_score >= 0.05
@@ -148,5 +177,16 @@ async def root():
     return {"message": "Academic Certificate Verification API", "status": "active"}
 
 
+@app.get("/api/health")
+async def health_check():
+    return {"status": "healthy", "worker_pool": verification_pool.stats()}
+
+
+@app.get("/metrics")
+def metrics():
+    """Stage latency histograms and worker pool occupancy for Prometheus to scrape"""
+    return PlainTextResponse(expose_metrics(verification_pool), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
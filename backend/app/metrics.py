@@ -0,0 +1,136 @@
+# backend/app/metrics.py
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label_value(value):
+    """Label value with backslash, double quote and line feed escaped as the exposition format requires"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels):
+    return ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels)
+
+
+def sample_name(name, labels):
+    """Metric name with its label set; no braces when there are no labels"""
+    return f"{name}{{{format_labels(labels)}}}" if labels else name
+
+
+def expose_value(name, kind, documentation, value):
+    """One unlabelled gauge or counter in the Prometheus text format"""
+    return "\n".join([f"# HELP {name} {documentation}", f"# TYPE {name} {kind}", f"{name} {value}"])
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, exposed in the Prometheus text format"""
+
+    def __init__(self, name, documentation, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+            for key, values in series:
+                labels = list(zip(self.labelnames, key))
+                for bound, count in zip(self.buckets, values["buckets"]):
+                    lines.append(f"{self.name}_bucket{{{format_labels(labels + [('le', bound)])}}} {count}")
+                lines.append(f"{self.name}_bucket{{{format_labels(labels + [('le', '+Inf')])}}} {values['count']}")
+                lines.append(f"{sample_name(self.name + '_sum', labels)} {values['sum']:.6f}")
+                lines.append(f"{sample_name(self.name + '_count', labels)} {values['count']}")
+        return "\n".join(lines)
+
+
+stage_seconds = Histogram(
+    "verification_stage_seconds", "Time spent in each verification pipeline stage.", ("stage", "institution"))
+request_seconds = Histogram(
+    "verification_request_seconds", "End-to-end verification time per endpoint.", ("endpoint", "institution"))
+
+
+class StageTimer:
+    """Durations of the pipeline stages of one verification request.
+
+    Stages are timed with `with timer.stage("ocr"):`. The institution is
+    usually only known part way through, so nothing is recorded until
+    observe() labels every stage with it. The same durations feed the
+    Server-Timing response header.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.institution = "unknown"
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - start
+
+    def set_institution(self, institution_code):
+        if institution_code:
+            self.institution = institution_code
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def observe(self, endpoint):
+        """Record the stages and the total under this request's institution"""
+        for name, seconds in self.durations.items():
+            stage_seconds.observe(seconds, stage=name, institution=self.institution)
+        request_seconds.observe(self.total(), endpoint=endpoint, institution=self.institution)
+
+    def server_timing(self):
+        """Value for the Server-Timing header, durations in milliseconds"""
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items()]
+        entries.append(f"total;dur={self.total() * 1000:.1f}")
+        return ", ".join(entries)
+
+    def timing_headers(self):
+        # Timing-Allow-Origin lets the cross-origin frontend read the entries
+        return {"Server-Timing": self.server_timing(), "Timing-Allow-Origin": "*"}
+
+
+class NullTimer:
+    """StageTimer stand-in for callers that do not collect timings"""
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def set_institution(self, institution_code):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+def expose_metrics(*collectors):
+    """All metrics in the Prometheus text exposition format, followed by those of collectors (anything with expose())"""
+    return "\n".join(metric.expose() for metric in (stage_seconds, request_seconds, *collectors)) + "\n"
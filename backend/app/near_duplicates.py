@@ -0,0 +1,383 @@
+# backend/app/near_duplicates.py
+import copy
+import itertools
+import os
+import threading
+from collections import Counter, OrderedDict
+from multiprocessing.managers import BaseManager
+
+from .config import INSTITUTION_CONFIG
+
+# Set NEAR_DUPLICATE_CACHE=0 to verify every re-scan in full
+NEAR_DUPLICATE_CACHE = os.environ.get("NEAR_DUPLICATE_CACHE", "1") != "0"
+NEAR_DUPLICATE_CACHE_SIZE = int(os.environ.get("NEAR_DUPLICATE_CACHE_SIZE", 2048))
+
+# Each text region is hashed as (columns x rows) horizontal gradient signs
+TEXT_HASH_SIZE = (32, 8)
+# Share of text-hash bits a re-scan or re-compression of the same certificate
+# may flip; hashes this close are candidates for the confirming comparison
+MAX_TEXT_DISTANCE = float(os.environ.get("NEAR_DUPLICATE_DISTANCE", 0.15))
+# Candidates are confirmed on thumbnails (columns x rows) of the same text
+# regions, compared over windows about one character wide...
+TEXT_THUMBNAIL_SIZE = (128, 12)
+TEXT_WINDOW = 8
+# ...and of the seal, signature and QR code, so a forged copy of a verified certificate is not taken for it
+ARTWORK_THUMBNAIL_SIZE = (32, 32)
+ARTWORK_WINDOW = 4
+ARTWORK_FIELDS = ("seal", "signature", "qr")
+# Largest mean contrast-normalised difference in any window. Re-scans stay
+# under about 0.32 on text and 0.18 on artwork; one changed character of a
+# certificate number shows 0.48 or more, a swapped seal 0.41 or more.
+MAX_TEXT_DIFFERENCE = 0.4
+MAX_ARTWORK_DIFFERENCE = 0.3
+# The institution line is the same on every certificate of a layout, so it tells nothing apart
+HASHED_FIELDS = ("certificate_no", "name", "year")
+
+
+def difference_hash(gray, size=TEXT_HASH_SIZE):
+    """dHash: one bit per adjacent pixel pair of gray shrunk to size, set where brightness rises"""
+    import cv2
+    import numpy as np
+
+    columns, rows = size
+    small = cv2.resize(gray, (columns + 1, rows), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def text_regions(certificate, institution_code):
+    """Grayscale crops of a layout's text regions (certificate number, name, year), or None.
+
+    Page-wide hashes cannot tell two students' certificates apart, since
+    the layout dominates them; these regions are where they differ.
+    """
+    text = INSTITUTION_CONFIG.get(institution_code, {}).get('text', {})
+    fields = [field for field in HASHED_FIELDS if field in text]
+    if not fields:
+        return None
+    return [certificate.crop(text[field]['roi'], "gray") for field in fields]
+
+
+def text_hash(regions):
+    """dHash of every text region, concatenated into one int, and its length in bits"""
+    bits_per_field = TEXT_HASH_SIZE[0] * TEXT_HASH_SIZE[1]
+    value = 0
+    for region in regions:
+        value = (value << bits_per_field) | difference_hash(region)
+    return value, bits_per_field * len(regions)
+
+
+def thumbnails(certificate, institution_code, regions):
+    """(text thumbnails, artwork thumbnails) that confirm a hash match"""
+    import cv2
+
+    config = INSTITUTION_CONFIG[institution_code]
+    artwork = [certificate.crop(config[field]['roi'], "gray") for field in ARTWORK_FIELDS if field in config]
+    return ([cv2.resize(region, TEXT_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA) for region in regions],
+            [cv2.resize(region, ARTWORK_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA) for region in artwork])
+
+
+def fingerprint(image, institution_code):
+    """(layout, text hash, hash bits, thumbnails) of an upload in a known layout, or None.
+
+    Everything the index needs about an upload, and small enough to send
+    back from a batch worker process.
+    """
+    from .imaging import as_certificate_image
+
+    if institution_code is None:
+        return None
+    certificate = as_certificate_image(image)
+    regions = text_regions(certificate, institution_code)
+    if regions is None:
+        return None
+    value, bits = text_hash(regions)
+    return institution_code, value, bits, thumbnails(certificate, institution_code, regions)
+
+
+def shared_verdict(verdict):
+    """A stored verdict for one response: new top level, extracted_info and pipeline, the rest shared.
+
+    Those are the parts a response adds to (timestamp, QR result, pipeline
+    notes); everything else is read-only and not copied per hit.
+    """
+    response = dict(verdict)
+    for field in ("extracted_info", "pipeline"):
+        if field in response:
+            response[field] = dict(response[field])
+    return response
+
+
+def thumbnail_difference(first, second, window):
+    """Largest mean difference, over any window of columns, between two lists of thumbnails.
+
+    Each thumbnail is normalised to zero mean and unit variance first, so
+    a lighter or darker copy compares equal. A small hash distance can
+    hide a single changed digit; a window about one character wide cannot.
+    """
+    import numpy as np
+
+    worst = 0.0
+    for a, b in zip(first, second):
+        a = a.astype(np.float32)
+        b = b.astype(np.float32)
+        a = (a - a.mean()) / (a.std() + 1e-3)
+        b = (b - b.mean()) / (b.std() + 1e-3)
+        columns = np.abs(a - b).mean(axis=0)
+        worst = max(worst, float(np.convolve(columns, np.ones(window) / window, "valid").max()))
+    return worst
+
+
+def same_certificate(first, second):
+    """Whether two (text, artwork) thumbnail pairs show the same certificate"""
+    return (thumbnail_difference(first[0], second[0], TEXT_WINDOW) <= MAX_TEXT_DIFFERENCE
+            and thumbnail_difference(first[1], second[1], ARTWORK_WINDOW) <= MAX_ARTWORK_DIFFERENCE)
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance.
+
+    Nodes are [hash, item, {distance: child}]. A search only descends into
+    children whose edge distance lies within radius of the query's
+    distance to their parent, which the triangle inequality allows.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, key, item):
+        self.size += 1
+        if self.root is None:
+            self.root = [key, item, {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(key, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, item, {}]
+                return
+            node = child
+
+    def search(self, key, radius):
+        """[(distance, item), ...] of every entry within radius of key"""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(key, node[0])
+            if distance <= radius:
+                found.append((distance, node[1]))
+            for edge, child in node[2].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+class NearDuplicateIndex:
+    """Verdicts of recent uploads, found again from a re-scanned or re-compressed copy.
+
+    Entries are indexed per layout in a BK-tree over their text hash. An
+    upload is only looked up in the tree of the layout it was identified
+    as (by its QR code or seal), and a candidate the tree returns is
+    confirmed on thumbnails of the text, seal, signature and QR regions
+    before its verdict is reused. Verdicts are copied once when added and
+    shared by every hit (see shared_verdict). Evicted
+    entries stay in the tree as tombstones until they outnumber the live
+    ones, when that tree is rebuilt. The index only answers for the
+    version (registry and institutions) its entries were verified
+    against; a new version empties it. Callers pass the version their
+    request started with, so a request still running on an older
+    registry neither reads nor fills the index of a newer one.
+    """
+
+    def __init__(self, max_entries=NEAR_DUPLICATE_CACHE_SIZE, max_distance=MAX_TEXT_DISTANCE):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.version = None
+        self._entries = OrderedDict()
+        self._trees = {}
+        self._live = Counter()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _reset(self, version):
+        self._entries.clear()
+        self._trees.clear()
+        self._live.clear()
+        self.version = version
+
+    def _switch(self, version):
+        """Whether entries for version can be read or added, emptying the index for a newer version"""
+        if version == self.version:
+            return True
+        # A request that started before the last registry change; registry versions only grow
+        if self.version is not None and version[0] < self.version[0]:
+            return False
+        self._reset(version)
+        return True
+
+    def lookup(self, image, version, institution_code):
+        """(verdict, hash distance) of the closest confirmed prior upload in a layout, or None"""
+        return self.find(fingerprint(image, institution_code), version)
+
+    def find(self, upload, version):
+        """lookup() for an upload's fingerprint(); None when the layout was unknown"""
+        with self._lock:
+            if not self._switch(version) or upload is None:
+                self.misses += 1
+                return None
+            code, value, bits, confirming = upload
+            tree = self._trees.get(code)
+            candidates = tree.search(value, int(bits * self.max_distance)) if tree else []
+            candidates = [(distance, entry_id, self._entries[entry_id])
+                          for distance, entry_id in sorted(candidates) if entry_id in self._entries]
+
+        best = None
+        for distance, entry_id, entry in candidates:
+            if same_certificate(confirming, entry[1]):
+                best = (distance, entry_id, entry[2])
+                break
+
+        with self._lock:
+            # The index may have moved to a newer version while candidates were compared
+            if best is None or version != self.version:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if best[1] in self._entries:
+                self._entries.move_to_end(best[1])
+        return shared_verdict(best[2]), best[0]
+
+    def add(self, image, institution_code, verdict, version):
+        """Remember a verdict for an upload of a known layout"""
+        self.remember(fingerprint(image, institution_code), verdict, version)
+
+    def remember(self, upload, verdict, version):
+        """add() for an upload's fingerprint()"""
+        if upload is None:
+            return
+        code, value, _, confirming = upload
+        entry = (code, confirming, copy.deepcopy(verdict))
+        with self._lock:
+            if not self._switch(version):
+                return
+            entry_id = next(self._ids)
+            self._entries[entry_id] = entry
+            self._trees.setdefault(code, BKTree()).add(value, entry_id)
+            self._live[code] += 1
+            while len(self._entries) > self.max_entries:
+                _, (evicted_code, _, _) = self._entries.popitem(last=False)
+                self._live[evicted_code] -= 1
+                self.evictions += 1
+                self._compact(evicted_code)
+
+    def _compact(self, institution_code):
+        """Rebuild a layout's tree once evicted entries outnumber live ones in it"""
+        tree = self._trees[institution_code]
+        if tree.size <= 2 * self._live[institution_code]:
+            return
+        rebuilt = BKTree()
+        stack = [tree.root]
+        while stack:
+            node = stack.pop()
+            if node[1] in self._entries:
+                rebuilt.add(node[0], node[1])
+            stack.extend(node[2].values())
+        self._trees[institution_code] = rebuilt
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'version': self.version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+class IndexManager(BaseManager):
+    """Manager serving near-duplicate indexes to batch worker processes"""
+
+
+# Indexes IndexServer serves, by key; looked up by the manager on each worker's first call
+_served = {}
+# Each worker process's proxy per served index
+_proxies = {}
+_proxies_lock = threading.Lock()
+
+
+def served_index(key):
+    return _served[key]
+
+
+IndexManager.register("index", callable=served_index, exposed=("find", "remember"))
+
+
+class IndexServer:
+    """Serves this process's NearDuplicateIndex to batch worker processes over a local socket.
+
+    Batch workers verify a certificate in one call: they decode it, look
+    its fingerprint up through client() and run the full pipeline only
+    on a miss, adding the verdict back the same way. The index itself
+    stays in this process, shared with single-certificate requests. The
+    socket is a per-server Unix socket with a random auth key, started
+    on first use.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        """Picklable RemoteIndex onto this server's index"""
+        with self._lock:
+            if self._client is None:
+                authkey = os.urandom(16)
+                server = IndexManager(authkey=authkey).get_server()
+                key = f"{os.getpid()}-{id(self)}"
+                _served[key] = self.index
+                threading.Thread(target=server.serve_forever, name="near-duplicate-server", daemon=True).start()
+                self._client = RemoteIndex(server.address, authkey, key)
+            return self._client
+
+
+class RemoteIndex:
+    """find() and remember() of an index an IndexServer serves from another process.
+
+    Pickled into batch jobs; each worker process connects once and reuses the connection.
+    """
+
+    def __init__(self, address, authkey, key):
+        self.address = address
+        self.authkey = authkey
+        self.key = key
+
+    def _index(self):
+        with _proxies_lock:
+            proxy = _proxies.get(self.key)
+            if proxy is None:
+                manager = IndexManager(self.address, self.authkey)
+                manager.connect()
+                proxy = _proxies[self.key] = manager.index(self.key)
+            return proxy
+
+    def find(self, upload, version):
+        return self._index().find(upload, version)
+
+    def remember(self, upload, verdict, version):
+        self._index().remember(upload, verdict, version)
@@ -1,112 +1,151 @@
-import pandas as pd
-from PIL import Image
-import pytesseract
-import re
-from fuzzywuzzy import fuzz
-
-db = pd.read_csv("/Users/jigyasaverma/Desktop/backend/Edu_cred_verify/EduCred-Verify/datasets/ocr_dataset.csv")
-
-# Normalize text for fuzzy matching
-def normalize(text):
-    return re.sub(r'\s+', ' ', text).strip().upper()
-
-def clean_name(name):
-    # Remove common trailing phrases that are not part of name
-    name = re.sub(r'\b(PRESENTED.*|For completing.*|In the year.*)$', '', name, flags=re.IGNORECASE)
-    # Keep only alphabetic parts
-    name = re.sub(r'[^A-Za-z\s]', '', name)
-    return name.strip()
-def extract_year(text, cert_no=None):
-    clean_text = text
-    if cert_no:
-        clean_text = clean_text.replace(cert_no, "")  # remove cert no part
-
-    # Look for year 19xx or 20xx
-    match = re.search(r'\b(19|20)\d{2}\b', clean_text)
-    if match:
-        return match.group(0)
-    return None
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import INSTITUTION_CONFIG, INSTITUTION_NAME_TO_CODE
+from .executor import VERIFY_WORKERS
+from .extraction import engine
+from .ocr_backend import get_ocr_backend
+from .ocr_cache import OcrResultCache, config_version, default_db_path
+
+# Fields region-targeted OCR must find before it skips the full-page pass
+REQUIRED_FIELDS = ("certificate_no", "institution", "name", "year")
+
+# Bump when OCR settings change in a way the fingerprint below cannot see.
+# Institution layouts can be reloaded while running, so callers key entries
+# on institutions.current().layout_version instead.
+OCR_CONFIG_VERSION = 1
+
+# Every verification thread can have all of its regions in flight at once, so a busy
+# server does not queue one request's regions behind another's
+_region_pool = ThreadPoolExecutor(max_workers=VERIFY_WORKERS * len(REQUIRED_FIELDS), thread_name_prefix="ocr-region")
+
+
+ocr_cache = OcrResultCache(
+    "ocr",
+    # Read on every lookup: the fingerprint changes when reloaded institutions bring new aliases
+    lambda: config_version(OCR_CONFIG_VERSION, engine.fingerprint, REQUIRED_FIELDS),
+    db_path=default_db_path(),
+)
+
 
 # Extract certificate info including year
 def extract_certificate_info(img):
-    text = pytesseract.image_to_string(img)
-    info = {}
+    text = get_ocr_backend().image_to_string(img)
+    return engine.extract(text)
 
-    # Certificate ID
-    match = re.search(r'(JH[-_ ]?UNI[-_ ]?\d{4}[-_ ]?\d+)', text, re.IGNORECASE)
-    if match:
-        info["certificate_no"] = re.sub(r'[\s\-_]+', '-', match.group(1)).upper()
-
-    # Institution
-    match = re.search(r'(Ranchi Tech Institute|Jharkhand State University|Jharkhand Business School)', text, re.IGNORECASE)
-    if match:
-        info["institution"] = match.group(1).title()
-
-    # Name + Course block
-    # Name + Course block
-    match = re.search(r'(?:awarded to|is given to|THIS CERTIFICATE IS GIVEN TO)\s*\n?([A-Za-z\s]+)', text,
-                      re.IGNORECASE)
-    if match:
-        raw_name = re.sub(r'\s+', ' ', match.group(1)).strip()
-
-        # If course is stuck to name, split it
-        course_match = re.search(r'(BBA|M\.?Sc\s+[A-Za-z]+|BA\s+[A-Za-z]+)', raw_name, re.IGNORECASE)
-        if course_match:
-            info["course"] = course_match.group(1).strip()
-            raw_name = raw_name.replace(info["course"], "").strip()
-
-        info["name"] = clean_name(raw_name)
-
-    # # Course (fallback if not caught above)
-    # if "course" not in info:
-    #     match = re.search(r'(BBA|M\.?Sc\s+[A-Za-z]+|BA\s+[A-Za-z]+)', text, re.IGNORECASE)
-    #     if match:
-    #         info["course"] = match.group(1).strip()
-
-    # Year
-    # Certificate No
-    match = re.search(
-        r'Cert(?:ificate)?\s*No[:\-\s]*([A-Z0-9\-]+)',
-        text,
-        re.IGNORECASE
-    )
-    if match:
-        cert_no = match.group(1).strip()
-        info["certificate_no"] = cert_no
-    else:
-        info["certificate_no"] = "-"
 
-    # Year
-    year = extract_year(text, cert_no)
-    if year:
-        info["year"] = year
+def ocr_region(img, field_config):
+    """OCR one configured text region with its page-segmentation mode"""
+    from .forgery_detection import extract_roi
+
+    crop = extract_roi(img, field_config['roi'])
+    return get_ocr_backend().image_to_string(crop, psm=field_config.get('psm', 7))
+
+
+def parse_region(field, text):
+    """Parse the OCR text of one field's region into {field: value, ...}"""
+    parsed = engine.extract(text)
+    if field == "name" and not parsed.get("name"):
+        # Tight regions hold just the name, without the "awarded to" line above it
+        name, course = engine.split_awardee(text)
+        parsed.update({"name": name, "course": course})
+    if field == "name":
+        return {key: parsed[key] for key in ("name", "course") if parsed.get(key)}
+    if field == "certificate_no" and parsed["certificate_no"] == "-":
+        return {}
+    return {field: parsed[field]} if parsed.get(field) else {}
+
+
+def identify_seal(img):
+    """Institution seal_index recognizes on an OCR input page (RGB or grayscale), or None"""
+    import cv2
+
+    from .seal_index import seal_index
 
+    return seal_index.identify(cv2.cvtColor(img, cv2.COLOR_RGB2BGR) if len(img.shape) == 3 else img)
+
+
+def header_institution(img, code):
+    """Institution name read in a layout's header region, if it is that layout's own"""
+    institution = engine.find_institution(ocr_region(img, INSTITUTION_CONFIG[code]['text']['institution']))
+    return institution if institution and INSTITUTION_NAME_TO_CODE.get(institution) == code else None
+
+
+def detect_layout(img):
+    """Institution whose header region reads as its own name, as (code, name).
+
+    The header of the institution recognized by its seal is read first;
+    every other layout's header is OCRed only when that one does not
+    confirm it (no seal found, or a seal from another layout).
+    """
+    codes = [code for code, config in INSTITUTION_CONFIG.items() if 'institution' in config.get('text', {})]
+    candidate = identify_seal(img)
+    if candidate in codes:
+        institution = header_institution(img, candidate)
+        if institution:
+            return candidate, institution
+        codes.remove(candidate)
+    names = _region_pool.map(lambda code: header_institution(img, code), codes)
+    for code, institution in zip(codes, names):
+        if institution:
+            return code, institution
+    return None, None
+
+
+def extract_certificate_info_regions(img, institution_code=None):
+    """Extract certificate info by OCRing only the configured text regions.
+
+    The layout comes from institution_code when known (QR, seal, request
+    parameter), otherwise from detect_layout. Fields
+    are recognized in parallel; full-page OCR runs only to fill fields the
+    regions did not yield.
+    """
+    info = {}
+    if institution_code is None:
+        institution_code, institution = detect_layout(img)
+        if institution:
+            info["institution"] = institution
+
+    text_config = INSTITUTION_CONFIG.get(institution_code, {}).get('text')
+    if not text_config:
+        return extract_certificate_info(img)
+
+    fields = [field for field in text_config if field not in info]
+    texts = _region_pool.map(lambda field: ocr_region(img, text_config[field]), fields)
+    for field, text in zip(fields, texts):
+        info.update(parse_region(field, text))
+
+    missing = [field for field in REQUIRED_FIELDS if not info.get(field)]
+    if missing:
+        full_info = extract_certificate_info(img)
+        for field in missing:
+            if full_info.get(field):
+                info[field] = full_info[field]
+        if not info.get("course") and full_info.get("course"):
+            info["course"] = full_info["course"]
+
+    info.setdefault("certificate_no", "-")
     return info
 
 # Fuzzy validation
-def validate_certificate_fuzzy(info, db, threshold=90):
-    for _, row in db.iterrows():
-        score_cert = fuzz.ratio(normalize(info.get("certificate_no","")), normalize(row["certificate_no"]))
-        score_name = fuzz.ratio(normalize(info.get("name","")), normalize(row["name"]))
-        score_inst = fuzz.ratio(normalize(info.get("institution","")), normalize(row["institution"]))
-        # score_course = fuzz.ratio(normalize(info.get("course","")), normalize(row["course"]))
-        score_year = (info.get("year","") == str(row["year"]))
-
-        if score_cert > threshold and score_name > threshold and score_inst > threshold  and score_year:
-            return True, row.to_dict()
-    return False, None
-
-# Load image
-img = Image.open("/Users/jigyasaverma/Desktop/backend/Edu_cred_verify/EduCred-Verify/datasets/certificates/RTI_014.png")
-extracted_info = extract_certificate_info(img)
-print("Extracted:", extracted_info)
-
-# Validate
-valid, record = validate_certificate_fuzzy(extracted_info, db)
-
-if valid:
-    print("✅ Certificate is VALID")
-    print("Matched Record:", record)
-else:
-    print("❌ Certificate is INVALID")
+def validate_certificate_fuzzy(info, registry, threshold=90):
+    return registry.first_match(info, threshold)
+
+
+if __name__ == "__main__":
+    # Manual check: python -m app.ocr path/to/certificate.png
+    from PIL import Image
+    from .registry_store import live_registry
 
+    img = Image.open(sys.argv[1])
+    extracted_info = extract_certificate_info(img)
+    print("Extracted:", extracted_info)
+
+    # Validate
+    valid, record = validate_certificate_fuzzy(extracted_info, live_registry.current())
+
+    if valid:
+        print("✅ Certificate is VALID")
+        print("Matched Record:", record)
+    else:
+        print("❌ Certificate is INVALID")
@@ -0,0 +1,393 @@
+# backend/app/ocr_backend.py
+import importlib.util
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+# "pool" keeps warm Tesseract engines in worker processes (needs tesserocr),
+# "pytesseract" runs the tesseract CLI per call, "auto" picks the pool when it can start
+OCR_BACKEND = os.environ.get("OCR_BACKEND", "auto")
+OCR_LANG = os.environ.get("OCR_LANG", "eng")
+# Worker processes, each holding one engine with its language models loaded
+OCR_POOL_SIZE = int(os.environ.get("OCR_POOL_SIZE", os.cpu_count() or 1))
+# ...or this many in a batch worker process, which already has a process per CPU beside it
+OCR_CHILD_POOL_SIZE = int(os.environ.get("OCR_CHILD_POOL_SIZE", 1))
+# Seconds one recognition may take before its worker is killed and replaced
+OCR_JOB_TIMEOUT = float(os.environ.get("OCR_JOB_TIMEOUT", 30))
+# Workers are replaced after this many jobs, or once their RSS passes the limit (MB)
+OCR_WORKER_MAX_JOBS = int(os.environ.get("OCR_WORKER_MAX_JOBS", 500))
+OCR_WORKER_MAX_RSS_MB = float(os.environ.get("OCR_WORKER_MAX_RSS_MB", 1024))
+# Seconds a new worker may take to load its models
+OCR_WORKER_START_TIMEOUT = 30
+# A worker that cannot be replaced is retried after this many seconds, doubling up to the maximum
+OCR_WORKER_RESTART_BACKOFF = float(os.environ.get("OCR_WORKER_RESTART_BACKOFF", 1))
+OCR_WORKER_RESTART_BACKOFF_MAX = 60
+
+# Tesseract's own default, fully automatic page segmentation
+DEFAULT_PSM = 3
+
+
+class OcrError(Exception):
+    """Raised when an OCR worker crashes, times out or cannot start"""
+
+
+class OcrTimeout(OcrError):
+    """Raised when an OCR worker does not answer in time"""
+
+
+def rss_mb():
+    """Resident memory of this process in MB.
+
+    Read from /proc where there is one: ru_maxrss is a peak that a
+    spawned worker inherits from the process that started it, so it
+    would count the server's memory as the worker's.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+class TesserocrEngine:
+    """One tesserocr engine with its language models loaded; lives in an OCR worker process"""
+
+    def __init__(self, lang):
+        import tesserocr
+
+        self.api = tesserocr.PyTessBaseAPI(lang=lang)
+
+    def recognize(self, array, psm):
+        from PIL import Image
+
+        try:
+            self.api.SetPageSegMode(psm)
+            self.api.SetImage(Image.fromarray(array))
+            return self.api.GetUTF8Text()
+        finally:
+            self.api.Clear()
+
+    def close(self):
+        self.api.End()
+
+
+def _worker_main(conn, lang, engine_factory):
+    """OCR worker process: load the models once, then recognize images sent over conn until told to stop"""
+    try:
+        engine = engine_factory(lang)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}", rss_mb()))
+        return
+    conn.send(("ready", None, rss_mb()))
+
+    try:
+        while True:
+            try:
+                job = conn.recv()
+            except EOFError:
+                return
+            if job is None:
+                return
+            array, psm = job
+            try:
+                conn.send(("ok", engine.recognize(array, psm), rss_mb()))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}", rss_mb()))
+    finally:
+        engine.close()
+
+
+class OcrWorker:
+    """One worker process and the pipe its images and text travel over"""
+
+    def __init__(self, context, lang, engine_factory=TesserocrEngine):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child, lang, engine_factory), name="ocr-worker",
+                                       daemon=True)
+        self.process.start()
+        child.close()
+        self.jobs = 0
+        self.rss_mb = 0.0
+
+    def wait_ready(self, timeout=OCR_WORKER_START_TIMEOUT):
+        """Block until the worker has loaded its models, raising OcrError (and stopping it) if it cannot"""
+        try:
+            status, message, self.rss_mb = self._receive(timeout)
+        except OcrError:
+            self.stop()
+            raise
+        if status != "ready":
+            self.stop()
+            raise OcrError(f"OCR worker failed to start: {message}")
+        return self
+
+    def _receive(self, timeout):
+        if not self.conn.poll(timeout):
+            raise OcrTimeout(f"OCR worker did not answer within {timeout}s")
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise OcrError(f"OCR worker died: {e}")
+
+    def recognize(self, array, psm, timeout):
+        try:
+            self.conn.send((array, psm))
+        except (BrokenPipeError, OSError) as e:
+            raise OcrError(f"OCR worker died: {e}")
+        status, text, self.rss_mb = self._receive(timeout)
+        self.jobs += 1
+        if status != "ok":
+            raise OcrError(text)
+        return text
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class PytesseractBackend:
+    """The tesseract CLI through pytesseract: a new process, and model load, per call"""
+
+    name = "pytesseract"
+
+    def __init__(self, job_timeout=OCR_JOB_TIMEOUT, lang=OCR_LANG):
+        self.job_timeout = job_timeout
+        self.lang = lang
+
+    def image_to_string(self, image, psm=None):
+        # pytesseract pulls in pandas; import it on first OCR, not at startup
+        import pytesseract
+
+        config = f"--psm {psm}" if psm is not None else ""
+        return pytesseract.image_to_string(image, lang=self.lang, config=config, timeout=self.job_timeout)
+
+    def start(self):
+        pass
+
+    def stats(self):
+        return {'backend': self.name}
+
+
+class TesseractPool:
+    """Long-lived Tesseract engines (tesserocr) in worker processes.
+
+    Each worker loads the language models once and then recognizes
+    images handed to it in memory over a pipe; no temp files, no process
+    per call. A job waits for a free worker. A worker that crashes or
+    overruns job_timeout is killed and replaced, and workers are
+    recycled after max_jobs jobs or once their RSS passes
+    max_rss_mb, so a slow leak in the engine cannot build up. A worker
+    that cannot be replaced leaves its slot empty while a background
+    thread retries with exponential backoff; while every slot is empty,
+    jobs go to the fallback backend (pytesseract) instead of failing.
+    """
+
+    name = "pool"
+
+    def __init__(self, size=OCR_POOL_SIZE, job_timeout=OCR_JOB_TIMEOUT, max_jobs=OCR_WORKER_MAX_JOBS,
+                 max_rss_mb=OCR_WORKER_MAX_RSS_MB, lang=OCR_LANG, engine_factory=TesserocrEngine, fallback=None,
+                 restart_backoff=OCR_WORKER_RESTART_BACKOFF):
+        self.size = size
+        self.job_timeout = job_timeout
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.lang = lang
+        self.engine_factory = engine_factory
+        self.fallback = fallback or PytesseractBackend(job_timeout, lang)
+        self.restart_backoff = restart_backoff
+        # Workers are started with spawn: forking a threaded server can copy held locks
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()
+        self._started = False
+        self._restoring = False
+        self._lock = threading.Lock()
+
+        self.jobs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.recycled = 0
+        # Slots whose worker could not be replaced, and jobs sent to the fallback meanwhile
+        self.lost = 0
+        self.fallbacks = 0
+
+    def _new_worker(self):
+        return OcrWorker(self._context, self.lang, self.engine_factory)
+
+    def start(self):
+        """Start every worker, raising OcrError if the engine cannot be loaded"""
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            # Workers load their models side by side
+            workers = [self._new_worker() for _ in range(self.size)]
+            try:
+                for worker in workers:
+                    worker.wait_ready()
+            except OcrError:
+                for worker in workers:
+                    if worker.process.is_alive():
+                        worker.stop()
+                raise
+            for worker in workers:
+                self._idle.put(worker)
+            self._started = True
+
+    def image_to_string(self, image, psm=None):
+        import numpy as np
+
+        self.start()
+        if self.lost >= self.size:
+            with self._lock:
+                self.fallbacks += 1
+            return self.fallback.image_to_string(image, psm)
+
+        array = np.ascontiguousarray(np.asarray(image))
+        try:
+            worker = self._idle.get(timeout=self.job_timeout)
+        except queue.Empty:
+            raise OcrError(f"No OCR worker became free within {self.job_timeout}s")
+
+        try:
+            text = worker.recognize(array, DEFAULT_PSM if psm is None else psm, self.job_timeout)
+        except OcrError as e:
+            with self._lock:
+                self.failures += 1
+                self.timeouts += isinstance(e, OcrTimeout)
+            worker = self._replace(worker)
+            raise
+        else:
+            if worker.jobs >= self.max_jobs or worker.rss_mb >= self.max_rss_mb:
+                with self._lock:
+                    self.recycled += 1
+                worker = self._replace(worker)
+            with self._lock:
+                self.jobs += 1
+            return text
+        finally:
+            if worker is not None:
+                self._idle.put(worker)
+
+    def _replace(self, worker):
+        """A fresh worker in place of worker, or None when it cannot start (the slot is restored later)"""
+        worker.stop()
+        try:
+            return self._new_worker().wait_ready()
+        except OcrError as e:
+            print(f"OCR worker could not be replaced, retrying in the background: {e}")
+        with self._lock:
+            self.lost += 1
+            if self._restoring:
+                return None
+            self._restoring = True
+        threading.Thread(target=self._restore, name="ocr-worker-restore", daemon=True).start()
+        return None
+
+    def _restore(self):
+        """Start workers for the empty slots, backing off between failed attempts"""
+        delay = self.restart_backoff
+        while True:
+            time.sleep(delay)
+            with self._lock:
+                if not self._started or not self.lost:
+                    self._restoring = False
+                    return
+            try:
+                worker = self._new_worker().wait_ready()
+            except OcrError as e:
+                delay = min(delay * 2, OCR_WORKER_RESTART_BACKOFF_MAX)
+                print(f"OCR worker still cannot start, next attempt in {delay}s: {e}")
+                continue
+            with self._lock:
+                if not self._started:
+                    # The pool was stopped meanwhile
+                    self._restoring = False
+                    worker.stop()
+                    return
+                self.lost -= 1
+                self._idle.put(worker)
+            delay = self.restart_backoff
+
+    def stop(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().stop()
+                except queue.Empty:
+                    break
+            self._started = False
+            self.lost = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': self.name,
+                'size': self.size,
+                'idle': self._idle.qsize(),
+                'lost': self.lost,
+                'jobs': self.jobs,
+                'failures': self.failures,
+                'timeouts': self.timeouts,
+                'recycled': self.recycled,
+                'fallbacks': self.fallbacks,
+            }
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(kind=OCR_BACKEND):
+    """OCR backend by name; "auto" falls back to pytesseract when the pool cannot start"""
+    if kind == "pytesseract":
+        return PytesseractBackend()
+    if kind == "auto" and importlib.util.find_spec("tesserocr") is None:
+        return PytesseractBackend()
+
+    in_child = multiprocessing.parent_process() is not None
+    pool = TesseractPool(size=OCR_CHILD_POOL_SIZE if in_child else OCR_POOL_SIZE)
+    try:
+        pool.start()
+    except OcrError as e:
+        if kind == "pool":
+            raise
+        print(f"OCR worker pool unavailable, using pytesseract: {e}")
+        return PytesseractBackend()
+    return pool
+
+
+def get_ocr_backend():
+    """Process-wide OCR backend, created on first use"""
+    global _backend
+    backend = _backend
+    if backend is not None:
+        return backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend()
+        return _backend
+
+
+def start_ocr_backend():
+    """Warm-up step: start the OCR workers before the first upload"""
+    get_ocr_backend().start()
+
+
+def ocr_backend_stats():
+    return _backend.stats() if _backend is not None else {'backend': None}
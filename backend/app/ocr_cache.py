@@ -0,0 +1,203 @@
+# backend/app/ocr_cache.py
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from .database import DATABASE_PATH, get_pool
+
+OCR_CACHE_SIZE = int(os.environ.get("OCR_CACHE_SIZE", 1024))
+# Set OCR_CACHE_PERSIST=0 to keep results in memory only
+OCR_CACHE_PERSIST = os.environ.get("OCR_CACHE_PERSIST", "1") != "0"
+
+
+def image_key(contents, *extra):
+    """Content address of an uploaded image, plus anything else the result depends on"""
+    digest = hashlib.sha256(contents).hexdigest()
+    return ":".join([digest, *(str(part) for part in extra if part)])
+
+
+def config_version(*parts):
+    """Short fingerprint of the extraction regexes / OCR settings a result was produced with"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+class OcrResultCache:
+    """extract_certificate_info results keyed by image content.
+
+    An in-memory LRU tier sits in front of an optional SQLite tier that
+    survives restarts and is shared by every worker using the same
+    database file. Entries are stored per version, so changing the
+    extraction regexes or OCR configuration invalidates them. version is
+    a string, or a function returning one that is called on every lookup
+    for settings that change while the process runs.
+    """
+
+    def __init__(self, namespace, version, max_entries=OCR_CACHE_SIZE, db_path=None):
+        self.namespace = namespace
+        self._version = version
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._table_ready = False
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def version(self):
+        return self._version() if callable(self._version) else self._version
+
+    def _connect(self):
+        conn = get_pool(self.db_path).connection()
+        if not self._table_ready:
+            # First use: create the table. Results of other versions stay, since during a
+            # rolling deploy instances still on the previous release keep reading theirs
+            self._init_table(conn)
+            self._table_ready = True
+        return conn
+
+    def _init_table(self, conn):
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS ocr_cache (
+            namespace TEXT NOT NULL,
+            image_key TEXT NOT NULL,
+            version TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (namespace, image_key, version)
+        );
+        """)
+        conn.commit()
+
+    def get(self, key):
+        version = self.version
+        with self._lock:
+            if (version, key) in self._entries:
+                self._entries.move_to_end((version, key))
+                self.memory_hits += 1
+                return dict(self._entries[version, key])
+
+        result = self._disk_get(key, version) if self.db_path else None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember((version, key), result)
+        return dict(result)
+
+    def put(self, key, result):
+        version = self.version
+        with self._lock:
+            self._remember((version, key), dict(result))
+        if self.db_path:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO ocr_cache (namespace, image_key, version, result) VALUES (?, ?, ?, ?)",
+                         (self.namespace, key, version, json.dumps(result)))
+            conn.commit()
+
+    def _remember(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, key, version):
+        conn = self._connect()
+        row = conn.execute("SELECT result FROM ocr_cache WHERE namespace = ? AND image_key = ? AND version = ?",
+                           (self.namespace, key, version)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def purge_stale(self):
+        """Drop this namespace's persisted results produced by other extraction versions.
+
+        Only safe once no running instance uses those versions any more,
+        so it is an operator step (python -m app.ocr_cache --stale) rather
+        than something a starting instance does.
+        """
+        if not self.db_path:
+            return 0
+        conn = self._connect()
+        deleted = conn.execute("DELETE FROM ocr_cache WHERE namespace = ? AND version != ?",
+                               (self.namespace, self.version)).rowcount
+        conn.commit()
+        return deleted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'namespace': self.namespace,
+                'version': self.version,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+def cached_extract(cache, contents, extract, img, *hints, version=None):
+    """extract(img, *hints) for an upload, served from cache when its bytes were seen before.
+
+    version names anything else the result depends on that can change
+    while the cache is live, such as the loaded institution layouts.
+    """
+    key = image_key(contents, *hints, version) if version is not None else image_key(contents, *hints)
+    info = cache.get(key)
+    if info is None:
+        info = extract(img, *hints)
+        cache.put(key, info)
+    return dict(info)
+
+
+def default_db_path():
+    return DATABASE_PATH if OCR_CACHE_PERSIST else None
+
+
+def purge_older_than(days, db_path=DATABASE_PATH):
+    """Drop persisted results of every namespace and version stored more than days ago"""
+    conn = get_pool(db_path).connection()
+    if conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'ocr_cache'").fetchone() is None:
+        return 0
+    deleted = conn.execute("DELETE FROM ocr_cache WHERE created_at < datetime('now', ?)",
+                           (f"-{float(days)} days",)).rowcount
+    conn.commit()
+    return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drop persisted OCR results")
+    parser.add_argument("--stale", action="store_true",
+                        help="drop results of extraction versions other than this release's; run once every "
+                             "instance has been updated")
+    parser.add_argument("--older-than-days", type=float, help="drop results of any version stored before then")
+    args = parser.parse_args()
+    if not args.stale and args.older_than_days is None:
+        parser.error("nothing to do: pass --stale and/or --older-than-days")
+
+    if args.stale:
+        # The caches of both services, with the versions this release computes
+        from .app import ocr_cache as flask_cache
+        from .ocr import ocr_cache as api_cache
+
+        for cache in (api_cache, flask_cache):
+            print(f"{cache.namespace}: {cache.purge_stale()} results of other versions dropped")
+    if args.older_than_days is not None:
+        print(f"{purge_older_than(args.older_than_days)} results older than {args.older_than_days:g} days dropped")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 from flask import Flask, request, jsonify
-import pandas as pd
 
-df = pd.read_csv("/Users/jigyasaverma/Desktop/backend/Edu_cred_verify/EduCred-Verify/datasets/ocr_dataset.csv")
+from .registry_store import live_registry
 
 app = Flask(__name__)
 
@@ -11,10 +10,12 @@ def verify_certificate():
 
     if not cert_id:
         return jsonify({"error": "cert_id is required"}), 400
-    record = df[df["cert_id"] == cert_id]
+    # Same in-process registry the verification services use, refreshed as new rows are ingested
+    registry = live_registry.current()
+    row_ids = registry.lookup(cert_id)
 
-    if not record.empty:
-        return jsonify({"status": "valid", "data": record.to_dict(orient="records")[0]})
+    if row_ids:
+        return jsonify({"status": "valid", "data": registry.record(row_ids[0])})
     else:
         return jsonify({"status": "invalid", "message": "Certificate not found"})
 
@@ -1,7 +1,18 @@
 # backend/app/qr_verification.py
+import os
+
 import cv2
 import numpy as np
-from .database import get_db_connection
+from .config import INSTITUTION_CONFIG
+from .database import find_certificate_by_hash
+from .imaging import as_certificate_image
+
+# Set QR_FAST_PATH=0 to always run OCR and forgery detection
+QR_FAST_PATH = os.environ.get("QR_FAST_PATH", "1") != "0"
+# Registry statuses a QR match may verify on its own; a revoked or otherwise
+# inactive record runs the full pipeline like any other unverified upload
+QR_VERIFIED_STATUSES = {status.strip().lower() for status in
+                        os.environ.get("QR_VERIFIED_STATUSES", "valid,active").split(",")}
 
 
 def extract_qr_region(image, qr_roi):
@@ -68,29 +79,15 @@ def parse_qr_data(qr_data):
             digital_hash = parts[1].strip()
 
     return cert_id, digital_hash
-    print("DEBUG RAW QR:", repr(qr_data))
 
 
 def verify_qr_authenticity(cert_id, digital_hash):
     """Verify if certificate ID and hash match database records"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT * FROM certificates 
-        WHERE cert_id = ? AND digital_hash = ?
-    """, (cert_id, digital_hash))
-
-    result = cursor.fetchone()
-    conn.close()
-
-    return result is not None
+    return find_certificate_by_hash(cert_id, digital_hash) is not None
 
 
 def verify_certificate_qr(certificate_image, institution_code):
     """Complete QR verification workflow using OpenCV"""
-    from .config import INSTITUTION_CONFIG
-
     config = INSTITUTION_CONFIG.get(institution_code)
     if not config or 'qr' not in config:
         return {"authentic": False, "error": "No QR configuration for institution"}
@@ -131,3 +128,70 @@ def verify_certificate_qr(certificate_image, institution_code):
         "message": "QR verification successful" if is_authentic else "QR verification failed - certificate not found in database"
     }
 
+
+
+def read_certificate_qr(certificate_image, institution_code=None):
+    """Decode the QR code from the configured QR regions.
+
+    Only institution_code's region is tried when the layout is known,
+    otherwise every layout's. Returns the raw QR data of the first region
+    that decodes, or None.
+    """
+    certificate = as_certificate_image(certificate_image)
+    codes = [institution_code] if institution_code else list(INSTITUTION_CONFIG)
+    tried = set()
+    for code in codes:
+        roi = INSTITUTION_CONFIG.get(code, {}).get('qr', {}).get('roi')
+        if not roi or tuple(roi) in tried:
+            continue
+        tried.add(tuple(roi))
+        qr_data = read_qr_code_opencv(certificate.crop(roi, "gray"))
+        if qr_data:
+            return qr_data
+    return None
+
+
+def verify_qr_fast_path(certificate_image, registry, institution_code=None):
+    """Try to authenticate a certificate from its QR code alone.
+
+    A QR whose certificate ID and digital hash both match a registry record
+    with a status in QR_VERIFIED_STATUSES is enough to verify the
+    certificate, so OCR and forgery detection can be skipped. Anything else
+    ("status" no_qr, unreadable, mismatch or inactive) means the full
+    pipeline has to run.
+    """
+    qr_data = read_certificate_qr(certificate_image, institution_code)
+    if not qr_data:
+        return {"authentic": False, "status": "no_qr"}
+
+    cert_id, digital_hash = parse_qr_data(qr_data)
+    if not cert_id or not digital_hash:
+        return {"authentic": False, "status": "unreadable", "qr_data": qr_data}
+
+    record = registry.verify_hash(cert_id, digital_hash)
+    if record is not None and str(record.get("status", "")).strip().lower() not in QR_VERIFIED_STATUSES:
+        return {"authentic": False, "status": "inactive", "cert_id": cert_id, "digital_hash": digital_hash,
+                "matched_record": None, "record_status": record.get("status")}
+    return {
+        "authentic": record is not None,
+        "status": "verified" if record is not None else "mismatch",
+        "cert_id": cert_id,
+        "digital_hash": digital_hash,
+        "matched_record": record,
+    }
+
+
+def qr_institution(qr_result, registry):
+    """Layout of the registry record a QR's certificate ID names, or None.
+
+    A QR that decoded but did not verify (a mismatching hash) still tells
+    which institution's layout the certificate claims to be.
+    """
+    cert_id = qr_result.get("cert_id")
+    if not cert_id:
+        return None
+    for row_id in registry.lookup(cert_id):
+        code = registry.record(row_id).get("institution_code")
+        if code in INSTITUTION_CONFIG:
+            return code
+    return None
@@ -0,0 +1,89 @@
+# backend/app/reference_assets.py
+import threading
+
+import cv2
+import numpy as np
+
+from .institutions import institutions
+
+# Signature crop sizes whose prepared reference is kept per institution
+SIGNATURE_TEMPLATE_SIZES = 8
+
+
+def load_grayscale(path):
+    """Read an image and convert it to grayscale the same way verify_seal does"""
+    image = cv2.imread(path)
+    if image is None:
+        return None
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def signature_template(reference_gray, size):
+    """Reference signature resized to size (width, height), zero-mean, with its L2 norm"""
+    template = cv2.resize(reference_gray, size).astype(np.float32)
+    template -= template.mean()
+    return template, float(np.linalg.norm(template))
+
+
+class SignatureTemplates:
+    """Prepared reference signatures keyed by crop size, evicting the least recently used.
+
+    A layout's signature ROI has the same pixel size for every scan at a
+    given resolution, so a handful of entries covers all uploads.
+    """
+
+    def __init__(self, reference_gray, max_sizes=SIGNATURE_TEMPLATE_SIZES):
+        self.reference_gray = reference_gray
+        self.max_sizes = max_sizes
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def get(self, size):
+        with self._lock:
+            template = self._templates.pop(size, None)
+            if template is None:
+                template = signature_template(self.reference_gray, size)
+            self._templates[size] = template
+            while len(self._templates) > self.max_sizes:
+                del self._templates[next(iter(self._templates))]
+            return template
+
+
+class ReferenceAssets:
+    """Decoded reference seal and signature of one institution, with precomputed seal and signature features"""
+
+    def __init__(self, institution_code, seal_path, signature_path):
+        self.institution_code = institution_code
+        self.seal_path = seal_path
+        self.signature_path = signature_path
+
+        self.seal = load_grayscale(seal_path)
+        self.signature = load_grayscale(signature_path)
+
+        self.seal_keypoints, self.seal_descriptors = None, None
+        if self.seal is not None:
+            orb = cv2.ORB_create()
+            self.seal_keypoints, self.seal_descriptors = orb.detectAndCompute(self.seal, None)
+
+        self.signature_templates = SignatureTemplates(self.signature) if self.signature is not None else None
+
+
+class ReferenceAssetCache:
+    """ReferenceAssets of the institutions currently loaded.
+
+    The artifacts live in each institution's bundle (see institutions.py),
+    so a reloaded reference image or institution gets fresh ones while
+    unchanged institutions keep theirs.
+    """
+
+    def get(self, institution_code):
+        """References for an institution, or None if it is unknown or has no assets"""
+        bundle = institutions.current().get(institution_code)
+        return bundle.assets if bundle is not None else None
+
+    def preload(self, institution_codes):
+        """Load references for the given institutions ahead of the first request"""
+        institutions.compile(list(institution_codes))
+
+
+reference_assets = ReferenceAssetCache()
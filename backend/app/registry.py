@@ -0,0 +1,467 @@
+# backend/app/registry.py
+import copy
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz as rapid_fuzz, process
+
+from .registry_columns import CategoryColumn, RegistryRecords, StringColumn, smallest_code_dtype
+
+NGRAM_SIZE = 2
+
+# A year partition is rebuilt once more than this share of its rows left it through merges
+PARTITION_MAX_REMOVED = 0.25
+
+# Block sizes for batch scoring: each score matrix is at most
+# BATCH_QUERY_BLOCK x BATCH_ROW_BLOCK float64 values (32 MB)
+BATCH_QUERY_BLOCK = 512
+BATCH_ROW_BLOCK = 8192
+
+
+def normalize(text):
+    """Normalize text for fuzzy matching"""
+    return re.sub(r'\s+', ' ', text).strip().upper()
+
+
+def ngrams(text, size=NGRAM_SIZE):
+    """Character n-grams of an already normalized string"""
+    return [text[i:i + size] for i in range(len(text) - size + 1)]
+
+
+def min_ratio_for(threshold):
+    """Smallest SequenceMatcher ratio whose fuzz.ratio score is > threshold"""
+    # fuzz.ratio rounds 100 * ratio to an int, so "> threshold" means the
+    # rounded score reaches the next integer up
+    return (math.floor(threshold) + 0.5) / 100 - 1e-9
+
+
+def key_hash(key):
+    """Stable 64-bit hash of a match key"""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little", signed=True)
+
+
+class KeyIndex:
+    """Row ids by exact match key, as sorted 64-bit key hashes.
+
+    About 12 bytes per row where a dict of lists takes over 100; the keys
+    themselves are only read to rule out hash collisions.
+    """
+
+    def __init__(self, keys):
+        hashes = np.fromiter(map(key_hash, keys.values()), dtype=np.int64, count=len(keys))
+        # Stable, so rows sharing a key stay in registry order
+        order = np.argsort(hashes, kind="stable")
+        self.keys = keys
+        self.hashes = hashes[order]
+        self.rows = order.astype(np.int32 if len(keys) < 2 ** 31 else np.int64)
+
+    def updated(self, keys, rows):
+        """Copy over keys (the updated column) with the given rows hashed again"""
+        rows = np.asarray(rows, dtype=np.int64)
+        keep = ~np.isin(self.rows, rows)
+        hashes = np.concatenate([self.hashes[keep], np.fromiter(map(key_hash, keys.values(rows)), dtype=np.int64,
+                                                                count=len(rows))])
+        row_ids = np.concatenate([self.rows[keep].astype(np.int64), rows])
+        # Hash first, then row, as the stable sort at build time leaves them
+        order = np.lexsort((row_ids, hashes))
+        index = copy.copy(self)
+        index.keys = keys
+        index.hashes = hashes[order]
+        index.rows = row_ids[order].astype(np.int32 if len(keys) < 2 ** 31 else np.int64)
+        return index
+
+    def get(self, key):
+        value = key_hash(key)
+        start, end = np.searchsorted(self.hashes, value, "left"), np.searchsorted(self.hashes, value, "right")
+        return [row for row in self.rows[start:end].tolist() if self.keys[row] == key]
+
+    @property
+    def nbytes(self):
+        return self.hashes.nbytes + self.rows.nbytes
+
+
+class FieldIndex:
+    """Character n-gram inverted index over one column of a registry partition"""
+
+    def __init__(self, keys):
+        self.lengths = np.array([len(key) for key in keys], dtype=np.int32)
+
+        postings = defaultdict(lambda: ([], []))
+        for pos, key in enumerate(keys):
+            for gram, count in Counter(ngrams(key)).items():
+                postings[gram][0].append(pos)
+                postings[gram][1].append(count)
+        # Positions and counts in the narrowest dtypes that hold them
+        row_dtype = smallest_code_dtype(len(keys))
+        count_dtype = smallest_code_dtype(max((max(counts) for _, counts in postings.values()), default=0))
+        self.postings = {
+            gram: (np.array(rows, dtype=row_dtype), np.array(counts, dtype=count_dtype))
+            for gram, (rows, counts) in postings.items()
+        }
+
+    def updated(self, old_keys, new_keys, appended):
+        """Copy with the keys at some positions changed and the appended keys added after the rest.
+
+        old_keys and new_keys map positions to their keys before and
+        after; a new key of None takes the position out of the postings.
+        Only the postings of n-grams those keys contain are rebuilt.
+        """
+        count = len(self.lengths)
+        index = copy.copy(self)
+        index.lengths = np.concatenate([self.lengths, np.zeros(len(appended), dtype=np.int32)])
+        removals = defaultdict(list)
+        for pos, key in old_keys.items():
+            for gram in set(ngrams(key)):
+                removals[gram].append(pos)
+        additions = defaultdict(lambda: ([], []))
+        for pos, key in [*new_keys.items(), *enumerate(appended, count)]:
+            index.lengths[pos] = 0 if key is None else len(key)
+            for gram, gram_count in Counter(ngrams(key or "")).items():
+                additions[gram][0].append(pos)
+                additions[gram][1].append(gram_count)
+
+        index.postings = dict(self.postings)
+        row_dtype = smallest_code_dtype(len(index.lengths))
+        for gram in set(removals) | set(additions):
+            rows, counts = self.postings.get(gram, (np.zeros(0, dtype=row_dtype), np.zeros(0, dtype=np.uint8)))
+            if gram in removals:
+                keep = ~np.isin(rows, removals[gram])
+                rows, counts = rows[keep], counts[keep]
+            if gram in additions:
+                new_rows, new_counts = additions[gram]
+                rows = np.concatenate([rows, np.array(new_rows, dtype=row_dtype)]).astype(
+                    np.promote_types(rows.dtype, row_dtype))
+                counts = np.concatenate([counts, np.array(new_counts)]).astype(
+                    np.promote_types(counts.dtype, smallest_code_dtype(max(new_counts))))
+            if len(rows):
+                index.postings[gram] = (rows, counts)
+            else:
+                index.postings.pop(gram, None)
+        return index
+
+    def candidates(self, query, threshold):
+        """Boolean mask of partition rows that can still score > threshold.
+
+        Uses the q-gram lemma: turning one string into the other with d
+        insertions/deletions leaves at least len - q + 1 - q * d of its
+        n-grams intact, and fuzz.ratio bounds d from the lengths alone.
+        """
+        min_ratio = min_ratio_for(threshold)
+        if min_ratio <= 0:
+            return np.ones(len(self.lengths), dtype=bool)
+
+        q = NGRAM_SIZE
+        query_len = len(query)
+        lengths = self.lengths
+        total = query_len + lengths
+        # The ratio can never exceed 2 * min(len) / (len_a + len_b)
+        possible = 2 * np.minimum(query_len, lengths) >= min_ratio * total
+        max_edits = np.floor(total * (1 - min_ratio))
+        required = np.maximum(query_len, lengths) - q + 1 - q * max_edits
+
+        shared = np.zeros(len(lengths), dtype=np.int32)
+        for gram, count in Counter(ngrams(query)).items():
+            if gram in self.postings:
+                rows, counts = self.postings[gram]
+                # Stored counts fit their dtype, so capping the query's count there changes no minimum
+                shared[rows] += np.minimum(counts, min(count, np.iinfo(counts.dtype).max))
+
+        return possible & (shared >= required)
+
+
+class RegistryPartition:
+    """Registry rows sharing one year, which an extracted record has to match exactly.
+
+    Rows that left the year through a merge stay in row_ids, switched
+    off in the removed mask, until the partition is next rebuilt.
+    """
+
+    def __init__(self, row_ids, cert_keys, name_keys):
+        self.row_ids = row_ids
+        self.removed = None
+        self.cert_index = FieldIndex(cert_keys.values(row_ids))
+        self.name_index = FieldIndex(name_keys.values(row_ids))
+
+    def updated(self, changed, appended, old_cert_keys, old_name_keys, cert_keys, name_keys):
+        """Copy with changed rows re-indexed (or removed, when mapped to False) and appended rows added.
+
+        Appended row ids have to be above every row id already here, so
+        the partition stays in registry order.
+        """
+        positions = dict(zip(changed, np.searchsorted(self.row_ids, list(changed)).tolist()))
+        partition = copy.copy(self)
+        partition.row_ids = np.concatenate([self.row_ids, np.array(appended, dtype=self.row_ids.dtype)])
+        removed = np.zeros(len(partition.row_ids), dtype=bool)
+        if self.removed is not None:
+            removed[:len(self.removed)] = self.removed
+        for row, keep in changed.items():
+            removed[positions[row]] = not keep
+        partition.removed = removed if removed.any() else None
+        if removed.sum() > PARTITION_MAX_REMOVED * len(removed):
+            return RegistryPartition(partition.row_ids[~removed], cert_keys, name_keys)
+
+        for name, old_keys, keys in (("cert_index", old_cert_keys, cert_keys), ("name_index", old_name_keys, name_keys)):
+            setattr(partition, name, getattr(self, name).updated(
+                {positions[row]: old_keys[row] for row in changed},
+                {positions[row]: keys[row] if keep else None for row, keep in changed.items()},
+                keys.values(appended)))
+        return partition
+
+    def candidates(self, cert_query, name_query, threshold):
+        mask = self.cert_index.candidates(cert_query, threshold)
+        mask &= self.name_index.candidates(name_query, threshold)
+        if self.removed is not None:
+            mask &= ~self.removed
+        return self.row_ids[mask].tolist()
+
+    @property
+    def live_row_ids(self):
+        return self.row_ids if self.removed is None else self.row_ids[~self.removed]
+
+    @property
+    def nbytes(self):
+        return self.row_ids.nbytes + (self.removed.nbytes if self.removed is not None else 0) + sum(
+            index.lengths.nbytes + sum(rows.nbytes + counts.nbytes for rows, counts in index.postings.values())
+            for index in (self.cert_index, self.name_index))
+
+
+class CertificateRegistry:
+    """Registry of issued certificates indexed for fuzzy validation.
+
+    Built once from the certificate DataFrame (or RegistryRecords) so that
+    validating an upload only scores a short candidate list instead of
+    every row of the registry. Candidate pruning is lossless, so results
+    are the same as scoring every row. Rows are held as compact columns,
+    next to their normalized match keys; record() decodes one row.
+    """
+
+    def __init__(self, db):
+        self.records = db if isinstance(db, RegistryRecords) else RegistryRecords.from_frame(db)
+        records = self.records
+        # Normalized once here; scoring reads the keys, never the raw columns
+        self.cert_keys = StringColumn([normalize(str(value)) for value in records.column("certificate_no").values()])
+        self.name_keys = StringColumn([normalize(str(value)) for value in records.column("name").values()])
+        self.institutions = CategoryColumn([normalize(str(value)) for value in records.column("institution").values()])
+        self.inst_values, self.inst_codes = self.institutions.categories, self.institutions.codes
+        self.years = CategoryColumn([str(value) for value in records.column("year").values()])
+
+        self.by_cert = KeyIndex(self.cert_keys)
+        self.partitions = {
+            year: RegistryPartition(np.flatnonzero(self.years.codes == code).astype(np.int32), self.cert_keys,
+                                    self.name_keys)
+            for code, year in enumerate(self.years.categories)
+        }
+
+    def merged(self, records, replaced, added):
+        """Registry over records, as RegistryRecords.merge returned them with rows replaced and added.
+
+        Only the changed rows are normalized and indexed again: the key
+        columns are copied and extended, the changed rows hashed again
+        and the year partitions they left or joined updated. A row
+        moving to another year rebuilds the partition it joins, so every
+        partition stays in registry order. A merge that re-sorted the
+        rows (replaced is None) builds the registry from scratch.
+        """
+        if replaced is None:
+            return CertificateRegistry(records)
+
+        count = len(replaced)
+        rows = np.concatenate([replaced, added]).tolist()
+        certs = [normalize(str(value)) for value in records.column("certificate_no").values(rows)]
+        names = [normalize(str(value)) for value in records.column("name").values(rows)]
+        institutions = [normalize(str(value)) for value in records.column("institution").values(rows)]
+        years = [str(value) for value in records.column("year").values(rows)]
+
+        registry = copy.copy(self)
+        registry.records = records
+        registry.cert_keys = self.cert_keys.updated(rows[:count], certs[:count], certs[count:])
+        registry.name_keys = self.name_keys.updated(rows[:count], names[:count], names[count:])
+        registry.institutions = self.institutions.updated(rows[:count], institutions[:count], institutions[count:])
+        registry.inst_values, registry.inst_codes = registry.institutions.categories, registry.institutions.codes
+        registry.years = self.years.updated(rows[:count], years[:count], years[count:])
+        registry.by_cert = self.by_cert.updated(registry.cert_keys, rows)
+
+        changed, appended, rebuild = defaultdict(dict), defaultdict(list), set()
+        for row, cert, name, year in zip(rows[:count], certs, names, years):
+            old_year = self.years[row]
+            if old_year != year:
+                changed[old_year][row] = False
+                rebuild.add(year)
+            elif (cert, name) != (self.cert_keys[row], self.name_keys[row]):
+                changed[year][row] = True
+        for row, year in zip(rows[count:], years[count:]):
+            appended[year].append(row)
+
+        registry.partitions = dict(self.partitions)
+        for year in rebuild | set(changed) | set(appended):
+            partition = self.partitions.get(year)
+            if partition is None or year in rebuild:
+                code = registry.years.categories.index(year)
+                row_ids = np.flatnonzero(registry.years.codes == code).astype(np.int32)
+                registry.partitions[year] = RegistryPartition(row_ids, registry.cert_keys, registry.name_keys)
+            else:
+                registry.partitions[year] = partition.updated(changed[year], appended[year], self.cert_keys,
+                                                              self.name_keys, registry.cert_keys, registry.name_keys)
+        return registry
+
+    def __len__(self):
+        return len(self.records)
+
+    def record(self, row_id):
+        return self.records.record(row_id)
+
+    def lookup(self, certificate_no):
+        """Row ids whose normalized certificate number is an exact match"""
+        return self.by_cert.get(normalize(certificate_no))
+
+    def verify_hash(self, certificate_no, digital_hash):
+        """Record whose certificate number and digital hash both match exactly, or None"""
+        if 'digital_hash' not in self.records:
+            return None
+        hashes = self.records.column('digital_hash')
+        for row_id in self.lookup(certificate_no):
+            if hashes.matches(row_id, digital_hash):
+                return self.record(row_id)
+        return None
+
+    def memory_usage(self):
+        """Bytes held by the rows, their match keys and the indexes over them"""
+        return {
+            'records': sum(self.records.memory_usage().values()),
+            'match_keys': (self.cert_keys.nbytes + self.name_keys.nbytes + self.inst_codes.nbytes
+                           + self.years.nbytes),
+            'indexes': self.by_cert.nbytes + sum(partition.nbytes for partition in self.partitions.values()),
+        }
+
+    @staticmethod
+    def query_keys(info):
+        """Normalized (certificate_no, name, institution, year) of extracted info"""
+        return (normalize(info.get("certificate_no", "")), normalize(info.get("name", "")),
+                normalize(info.get("institution", "")), info.get("year", ""))
+
+    def candidates(self, info, threshold, query=None):
+        """Row ids, in registry order, that can pass every threshold"""
+        cert, name, _, year = query or self.query_keys(info)
+        partition = self.partitions.get(year)
+        if partition is None:
+            return []
+        return partition.candidates(cert, name, threshold)
+
+    def score(self, info, row_id, query=None):
+        """Per-field fuzzy scores of extracted info against one registry row"""
+        cert, name, inst, year = query or self.query_keys(info)
+        scores = {}
+        scores['cert'] = fuzz.ratio(cert, self.cert_keys[row_id])
+        scores['name'] = fuzz.ratio(name, self.name_keys[row_id])
+        scores['inst'] = fuzz.ratio(inst, self.inst_values[self.inst_codes[row_id]])
+        scores['year'] = 100 if year == self.years[row_id] else 0
+        return scores
+
+    def matches(self, info, threshold):
+        """Yield (row_id, scores) for every row passing all thresholds, in registry order"""
+        # Normalized once, not once per candidate row
+        query = self.query_keys(info)
+        for row_id in self.candidates(info, threshold, query):
+            scores = self.score(info, row_id, query)
+            if (scores['cert'] > threshold and scores['name'] > threshold and
+                    scores['inst'] > threshold and scores['year'] > 50):
+                yield row_id, scores
+
+    def best_match(self, info, threshold=85):
+        """Best scoring row passing all thresholds, as (is_valid, record, scores)"""
+        best_row = None
+        best_scores = {}
+
+        for row_id, scores in self.matches(info, threshold):
+            overall_score = (scores['cert'] * 0.4 + scores['name'] * 0.3 + scores['inst'] * 0.2 + scores['year'] * 0.1)
+            if best_row is None or overall_score > best_scores.get('overall', 0):
+                best_row = row_id
+                best_scores = scores
+                best_scores['overall'] = overall_score
+
+        if best_row is None:
+            return False, None, best_scores
+        return True, self.record(best_row), best_scores
+
+    def first_match(self, info, threshold=90):
+        """First row in registry order passing all thresholds, as (is_valid, record)"""
+        for row_id, _ in self.matches(info, threshold):
+            return True, self.record(row_id)
+        return False, None
+
+    def match_batch(self, infos, threshold=85, workers=-1):
+        """Best match for many extracted records at once.
+
+        Returns one (is_valid, record, scores) tuple per info, identical to
+        calling best_match on each. Registry rows are only compared with
+        records of the same year, and scores are computed as matrices with
+        rapidfuzz, which is the same indel ratio fuzz.ratio uses.
+        """
+        count = len(infos)
+        cert_queries = np.array([normalize(info.get("certificate_no", "")) for info in infos], dtype=object)
+        name_queries = np.array([normalize(info.get("name", "")) for info in infos], dtype=object)
+        inst_queries = [normalize(info.get("institution", "")) for info in infos]
+        years = np.array([info.get("year", "") for info in infos], dtype=object)
+
+        # Few distinct institutions, so score each record against each of them once
+        inst_scores = self._score_matrix(inst_queries, self.inst_values, 0, workers)
+
+        best_rows = np.full(count, -1, dtype=np.int64)
+        best_overall = np.full(count, -1.0)
+        best_fields = np.zeros((count, 3), dtype=np.int64)
+        cutoff = min_ratio_for(threshold) * 100
+
+        for year in np.unique(years):
+            partition = self.partitions.get(year)
+            if partition is None:
+                continue
+            query_ids = np.flatnonzero(years == year)
+
+            for q_start in range(0, len(query_ids), BATCH_QUERY_BLOCK):
+                q_ids = query_ids[q_start:q_start + BATCH_QUERY_BLOCK]
+                row_ids = partition.live_row_ids
+                for r_start in range(0, len(row_ids), BATCH_ROW_BLOCK):
+                    r_ids = row_ids[r_start:r_start + BATCH_ROW_BLOCK]
+
+                    cert = self._score_matrix(cert_queries[q_ids], self.cert_keys.values(r_ids), cutoff, workers)
+                    name = self._score_matrix(name_queries[q_ids], self.name_keys.values(r_ids), cutoff, workers)
+                    inst = inst_scores[q_ids][:, self.inst_codes[r_ids]]
+
+                    passed = (cert > threshold) & (name > threshold) & (inst > threshold)
+                    overall = cert * 0.4 + name * 0.3 + inst * 0.2 + 100 * 0.1
+                    overall = np.where(passed, overall, -1.0)
+
+                    # argmax keeps the first row on ties, like the sequential scan
+                    block_best = overall.argmax(axis=1)
+                    block_overall = overall[np.arange(len(q_ids)), block_best]
+                    improved = block_overall > best_overall[q_ids]
+                    if not improved.any():
+                        continue
+
+                    rows = q_ids[improved]
+                    cols = block_best[improved]
+                    best_rows[rows] = r_ids[cols]
+                    best_overall[rows] = block_overall[improved]
+                    best_fields[rows] = np.stack([cert[improved, cols], name[improved, cols],
+                                                  inst[improved, cols]], axis=1)
+
+        results = []
+        for i in range(count):
+            if best_rows[i] < 0:
+                results.append((False, None, {}))
+                continue
+            cert, name, inst = (int(value) for value in best_fields[i])
+            scores = {'cert': cert, 'name': name, 'inst': inst, 'year': 100, 'overall': float(best_overall[i])}
+            results.append((True, self.record(int(best_rows[i])), scores))
+        return results
+
+    @staticmethod
+    def _score_matrix(queries, choices, cutoff, workers):
+        """fuzz.ratio of every query against every choice, rounded like fuzzywuzzy"""
+        scores = process.cdist(queries, choices, scorer=rapid_fuzz.ratio, dtype=np.float64,
+                               score_cutoff=cutoff, workers=workers)
+        return np.rint(scores).astype(np.int64)
@@ -0,0 +1,492 @@
+# backend/app/registry_columns.py
+import abc
+import copy
+import datetime
+import re
+
+import numpy as np
+
+# A column with at most this share of distinct values is dictionary-encoded
+CATEGORY_MAX_SHARE = 0.5
+
+# A string column is re-encoded once more than this share of its rows were replaced since
+STRING_MAX_OVERRIDES = 0.05
+
+# Columns read as dates (YYYY-MM-DD) or SHA-256 hex digests when their values allow it
+DATE_COLUMNS = ("dob", "issued_on")
+HASH_COLUMNS = ("digital_hash",)
+
+HEX_DIGEST = re.compile(r'[0-9a-f]{64}')
+
+
+def smallest_int_dtype(low, high):
+    for dtype in (np.int8, np.int16, np.int32, np.int64):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return np.int64
+
+
+def smallest_code_dtype(count):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if count <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+class Column(abc.ABC):
+    """One registry column, encoded for size.
+
+    Values a column's encoding cannot represent exactly (a missing year,
+    a date in another format, a hash that is not lowercase hex) are kept
+    as they came in the exceptions dict, by row, so every value reads
+    back unchanged. updated() gives a changed copy without decoding the
+    rows that stay.
+    """
+
+    kind = None
+
+    def __init__(self, exceptions):
+        self.exceptions = exceptions
+
+    @abc.abstractmethod
+    def __len__(self):
+        """Number of rows"""
+
+    def __getitem__(self, row):
+        if self.exceptions and row in self.exceptions:
+            return self.exceptions[row]
+        return self.decode(row)
+
+    @abc.abstractmethod
+    def decode(self, row):
+        """Value of a row from the encoded data, ignoring exceptions"""
+
+    def values(self, rows=None):
+        rows = range(len(self)) if rows is None else rows
+        return [self[row] for row in rows]
+
+    def take(self, rows):
+        """Column of the given rows, in that order"""
+        rows = np.asarray(rows, dtype=np.int64)
+        return encode_column(self.values(rows.tolist()), self.kind)
+
+    def updated(self, rows, values, appended):
+        """Copy of the column with rows set to values and the appended values added at the end.
+
+        The encoded data is copied and extended; only the new values are
+        encoded, and those this encoding cannot hold become exceptions.
+        """
+        count = len(self)
+        column = self._extended(list(appended), list(values))
+        column.exceptions = dict(self.exceptions)
+        for row, value in zip([*rows, *range(count, count + len(appended))], [*values, *appended]):
+            column.exceptions.pop(row, None)
+            if not column._store(row, value):
+                column.exceptions[row] = value
+        return column
+
+    @abc.abstractmethod
+    def _extended(self, appended, replacements):
+        """Copy of the column with room for the appended rows, in storage wide enough for every new value"""
+
+    @abc.abstractmethod
+    def _store(self, row, value):
+        """Encode value into row; False when this encoding cannot hold it"""
+
+    def matches(self, row, hex_digest):
+        """True when a row holds this hex digest, ignoring case and surrounding whitespace"""
+        return str(self[row]).strip().lower() == hex_digest.strip().lower()
+
+    @property
+    @abc.abstractmethod
+    def encoded_nbytes(self):
+        """Bytes held by the encoded data"""
+
+    @property
+    def nbytes(self):
+        # Exceptions are rare; count them as Python objects of about this size
+        return self.encoded_nbytes + 64 * len(self.exceptions)
+
+
+class StringColumn(Column):
+    """Strings as one UTF-8 buffer plus an offsets array"""
+
+    kind = "string"
+
+    def __init__(self, values):
+        exceptions = {row: value for row, value in enumerate(values) if not isinstance(value, str)}
+        encoded = [value.encode() if isinstance(value, str) else b"" for value in values]
+        super().__init__(exceptions)
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=self.offsets[1:])
+        if self.offsets[-1] <= np.iinfo(np.uint32).max:
+            self.offsets = self.offsets.astype(np.uint32)
+        self.buffer = b"".join(encoded)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def decode(self, row):
+        return self.buffer[self.offsets[row]:self.offsets[row + 1]].decode()
+
+    def values(self, rows=None):
+        if rows is None:
+            starts, ends = self.offsets[:-1].tolist(), self.offsets[1:].tolist()
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            starts, ends = self.offsets[rows].tolist(), self.offsets[rows + 1].tolist()
+        buffer = self.buffer
+        values = [buffer[start:end].decode() for start, end in zip(starts, ends)]
+        if self.exceptions:
+            for index, row in enumerate(range(len(self)) if rows is None else rows.tolist()):
+                if row in self.exceptions:
+                    values[index] = self.exceptions[row]
+        return values
+
+    def updated(self, rows, values, appended):
+        """Copy with the appended strings added to the buffer; replaced rows are kept as exceptions.
+
+        The buffer cannot change size in the middle, so a replaced row's
+        value is held in exceptions until more than STRING_MAX_OVERRIDES
+        of the rows are, at which point the column is encoded afresh.
+        """
+        column = super().updated(rows, values, appended)
+        if len(column.exceptions) > STRING_MAX_OVERRIDES * len(column):
+            return StringColumn(column.values())
+        return column
+
+    def _extended(self, appended, replacements):
+        encoded = [value.encode() if isinstance(value, str) else b"" for value in appended]
+        ends = self.offsets[-1] + np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+        column = copy.copy(self)
+        column.offsets = np.concatenate([self.offsets.astype(np.int64), ends])
+        if column.offsets[-1] <= np.iinfo(np.uint32).max:
+            column.offsets = column.offsets.astype(np.uint32)
+        column.buffer = self.buffer + b"".join(encoded)
+        return column
+
+    def _store(self, row, value):
+        # Appended strings are in the buffer already; a replaced row still holds its old bytes there
+        return isinstance(value, str) and self.decode(row) == value
+
+    @property
+    def encoded_nbytes(self):
+        return len(self.buffer) + self.offsets.nbytes
+
+
+class CategoryColumn(Column):
+    """Repeated values as codes into a list of distinct values (dictionary encoding)"""
+
+    kind = "category"
+
+    def __init__(self, values):
+        super().__init__({})
+        index = {}
+        codes = [index.setdefault(value, len(index)) for value in values]
+        self.categories = list(index)
+        self.codes = np.array(codes, dtype=smallest_code_dtype(len(self.categories)))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def decode(self, row):
+        return self.categories[self.codes[row]]
+
+    def values(self, rows=None):
+        codes = self.codes if rows is None else self.codes[np.asarray(rows, dtype=np.int64)]
+        categories = self.categories
+        return [categories[code] for code in codes.tolist()]
+
+    def _extended(self, appended, replacements):
+        column = copy.copy(self)
+        column.categories = list(self.categories)
+        column._index = {value: code for code, value in enumerate(self.categories)}
+        for value in appended + replacements:
+            if value not in column._index:
+                column._index[value] = len(column.categories)
+                column.categories.append(value)
+        column.codes = np.zeros(len(self) + len(appended), dtype=np.promote_types(
+            self.codes.dtype, smallest_code_dtype(len(column.categories))))
+        column.codes[:len(self)] = self.codes
+        return column
+
+    def _store(self, row, value):
+        self.codes[row] = self._index[value]
+        return True
+
+    def updated(self, rows, values, appended):
+        column = super().updated(rows, values, appended)
+        del column._index
+        return column
+
+    @property
+    def encoded_nbytes(self):
+        return self.codes.nbytes + 64 * len(self.categories)
+
+
+class IntColumn(Column):
+    """Integers in the narrowest dtype that holds them"""
+
+    kind = "int"
+
+    def __init__(self, values):
+        exceptions = {row: value for row, value in enumerate(values) if not is_int(value)}
+        super().__init__(exceptions)
+        ints = [0 if row in exceptions else value for row, value in enumerate(values)] if exceptions else values
+        low, high = (min(ints), max(ints)) if ints else (0, 0)
+        self.array = np.array(ints, dtype=smallest_int_dtype(low, high))
+
+    def __len__(self):
+        return len(self.array)
+
+    def decode(self, row):
+        return int(self.array[row])
+
+    def _extended(self, appended, replacements):
+        ints = [value for value in appended + replacements if is_int(value)]
+        dtype = np.promote_types(self.array.dtype, smallest_int_dtype(min(ints), max(ints))) if ints \
+            else self.array.dtype
+        column = copy.copy(self)
+        column.array = np.zeros(len(self) + len(appended), dtype=dtype)
+        column.array[:len(self)] = self.array
+        return column
+
+    def _store(self, row, value):
+        if not is_int(value):
+            self.array[row] = 0
+            return False
+        self.array[row] = value
+        return True
+
+    @property
+    def encoded_nbytes(self):
+        return self.array.nbytes
+
+
+class DateColumn(Column):
+    """YYYY-MM-DD strings as int32 day numbers"""
+
+    kind = "date"
+
+    def __init__(self, values):
+        exceptions = {}
+        ordinals = np.zeros(len(values), dtype=np.int32)
+        parsed = {}
+        for row, value in enumerate(values):
+            ordinal = parsed.get(value) if isinstance(value, str) else None
+            if ordinal is None:
+                ordinal = parse_date(value)
+                if ordinal is None:
+                    exceptions[row] = value
+                    continue
+                parsed[value] = ordinal
+            ordinals[row] = ordinal
+        super().__init__(exceptions)
+        self.ordinals = ordinals
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def decode(self, row):
+        return datetime.date.fromordinal(int(self.ordinals[row])).isoformat()
+
+    def _extended(self, appended, replacements):
+        column = copy.copy(self)
+        column.ordinals = np.zeros(len(self) + len(appended), dtype=np.int32)
+        column.ordinals[:len(self)] = self.ordinals
+        return column
+
+    def _store(self, row, value):
+        ordinal = parse_date(value)
+        self.ordinals[row] = ordinal or 0
+        return ordinal is not None
+
+    @property
+    def encoded_nbytes(self):
+        return self.ordinals.nbytes
+
+
+class HashColumn(Column):
+    """64-character hex digests as 32 raw bytes each"""
+
+    kind = "hash"
+
+    def __init__(self, values):
+        exceptions = {row: value for row, value in enumerate(values)
+                      if not isinstance(value, str) or not HEX_DIGEST.fullmatch(value)}
+        super().__init__(exceptions)
+        hexes = [("0" * 64 if row in exceptions else value) for row, value in enumerate(values)] if exceptions \
+            else values
+        self.digests = np.frombuffer(bytes.fromhex("".join(hexes)), dtype=np.uint8).reshape(len(values), 32)
+
+    def __len__(self):
+        return len(self.digests)
+
+    def decode(self, row):
+        return self.digests[row].tobytes().hex()
+
+    def _extended(self, appended, replacements):
+        column = copy.copy(self)
+        column.digests = np.zeros((len(self) + len(appended), 32), dtype=np.uint8)
+        column.digests[:len(self)] = self.digests
+        return column
+
+    def _store(self, row, value):
+        if not isinstance(value, str) or not HEX_DIGEST.fullmatch(value):
+            self.digests[row] = 0
+            return False
+        self.digests[row] = np.frombuffer(bytes.fromhex(value), dtype=np.uint8)
+        return True
+
+    def matches(self, row, hex_digest):
+        """True when a row holds this digest (compared case-insensitively, like the hex strings were)"""
+        if self.exceptions and row in self.exceptions:
+            return super().matches(row, hex_digest)
+        hex_digest = hex_digest.strip().lower()
+        return bool(HEX_DIGEST.fullmatch(hex_digest)) and self.digests[row].tobytes() == bytes.fromhex(hex_digest)
+
+    @property
+    def encoded_nbytes(self):
+        return self.digests.nbytes
+
+
+def is_int(value):
+    return isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_))
+
+
+def parse_date(value):
+    """Day number of a YYYY-MM-DD string, or None for anything that would not read back the same"""
+    if not isinstance(value, str) or len(value) != 10:
+        return None
+    try:
+        date = datetime.date.fromisoformat(value)
+    except ValueError:
+        return None
+    return date.toordinal() if date.isoformat() == value else None
+
+
+COLUMN_KINDS = {column.kind: column for column in (StringColumn, CategoryColumn, IntColumn, DateColumn, HashColumn)}
+
+
+def encode_column(values, kind=None, name=None):
+    """Pick an encoding for a column's values (or use kind) and encode them"""
+    if kind is None:
+        kind = column_kind(values, name)
+    return COLUMN_KINDS[kind](values)
+
+
+def column_kind(values, name=None):
+    """Encoding for a column: hash/date by name when most values fit, int, category or string by content"""
+    count = len(values)
+    # A handful of odd values is fine; they are kept as exceptions
+    tolerance = max(1, count // 100)
+    if name in HASH_COLUMNS:
+        if sum(1 for value in values if not isinstance(value, str) or not HEX_DIGEST.fullmatch(value)) <= tolerance:
+            return "hash"
+    if name in DATE_COLUMNS:
+        if sum(1 for value in set(values) if parse_date(value) is None) <= tolerance:
+            return "date"
+    if values and sum(1 for value in values if not is_int(value)) <= tolerance:
+        return "int"
+    try:
+        distinct = len(set(values))
+    except TypeError:
+        return "string"
+    if distinct <= max(1, CATEGORY_MAX_SHARE * count):
+        return "category"
+    return "string"
+
+
+class RegistryRecords:
+    """Registry rows stored column by column in compact encodings.
+
+    Certificate numbers and names share one UTF-8 buffer per column,
+    repeated values (institution, course, grade, status...) are
+    dictionary-encoded, years are small integers, dates day numbers and
+    digital hashes 32 raw bytes. ids are the rows' ids in the store.
+    record(row) gives back a row as the dict it was built from.
+    """
+
+    def __init__(self, columns, ids):
+        self.columns = columns
+        self.ids = np.asarray(ids, dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Records of a DataFrame's rows, ids taken from its index"""
+        columns = {name: encode_column(frame[name].tolist(), name=name) for name in frame.columns}
+        return cls(columns, frame.index.to_numpy())
+
+    @classmethod
+    def from_rows(cls, names, rows, ids):
+        """Records from row tuples (as a database cursor returns them) in names order"""
+        values = list(zip(*rows)) if rows else [()] * len(names)
+        columns = {name: encode_column(list(column), name=name) for name, column in zip(names, values)}
+        return cls(columns, ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def column(self, name):
+        return self.columns[name]
+
+    def record(self, row):
+        """One row as {column: value}"""
+        return {name: column[row] for name, column in self.columns.items()}
+
+    def take(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        return RegistryRecords({name: column.take(rows) for name, column in self.columns.items()}, self.ids[rows])
+
+    def merge(self, delta):
+        """These records with delta's rows replaced by id or appended, as (records, rows replaced, rows added).
+
+        Rows are looked up by id in the sorted ids. Replaced rows keep
+        their position and new ones go at the end, and each column is
+        copied and extended (Column.updated) instead of decoded and
+        encoded again. Columns on one side only read None on the other.
+        Should a new id sort before an existing one, all rows are
+        re-encoded in id order instead and rows replaced is None.
+        """
+        positions = np.searchsorted(self.ids, delta.ids)
+        found = positions < len(self.ids)
+        found[found] = self.ids[positions[found]] == delta.ids[found]
+        replaced, added = np.flatnonzero(found), np.flatnonzero(~found)
+        added = added[np.argsort(delta.ids[added], kind="stable")]
+        if not len(self) or (len(added) and delta.ids[added[0]] <= self.ids[-1]):
+            return self._merge_sorted(delta), None, None
+
+        names = list(self.columns) + [name for name in delta.columns if name not in self.columns]
+        columns = {}
+        for name in names:
+            column = self.columns.get(name) or encode_column([None] * len(self), name=name)
+            if name in delta.columns:
+                values = delta.columns[name].values(replaced), delta.columns[name].values(added)
+            else:
+                values = [None] * len(replaced), [None] * len(added)
+            columns[name] = column.updated(positions[replaced].tolist(), *values)
+        ids = np.concatenate([self.ids, delta.ids[added]])
+        return RegistryRecords(columns, ids), positions[replaced], np.arange(len(self), len(ids))
+
+    def _merge_sorted(self, delta):
+        keep = np.flatnonzero(~np.isin(self.ids, delta.ids))
+        ids = np.concatenate([self.ids[keep], delta.ids])
+        order = np.argsort(ids, kind="stable")
+        names = list(self.columns) + [name for name in delta.columns if name not in self.columns]
+        columns = {}
+        for name in names:
+            old = self.columns[name].values(keep) if name in self.columns else [None] * len(keep)
+            new = delta.columns[name].values() if name in delta.columns else [None] * len(delta)
+            merged = old + new
+            columns[name] = encode_column([merged[index] for index in order.tolist()], name=name)
+        return RegistryRecords(columns, ids[order])
+
+    def memory_usage(self):
+        """Bytes held per column, plus the ids"""
+        usage = {name: column.nbytes for name, column in self.columns.items()}
+        usage["ids"] = self.ids.nbytes
+        return usage
@@ -0,0 +1,292 @@
+# backend/app/registry_store.py
+import argparse
+import os
+import threading
+import time
+import uuid
+
+from .database import DATABASE_PATH, get_pool, init_database
+
+# Repository root; the bundled registry CSV is used to seed an empty store
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REGISTRY_CSV = os.environ.get("REGISTRY_CSV", os.path.join(BASE_DIR, "datasets", "ocr_dataset.csv"))
+
+INGEST_CHUNK_SIZE = int(os.environ.get("INGEST_CHUNK_SIZE", 5000))
+# How often a running server checks the store for newly ingested rows
+REGISTRY_REFRESH_SECONDS = float(os.environ.get("REGISTRY_REFRESH_SECONDS", 30))
+
+# Registry CSV columns, in order, and the certificates table column each is stored in
+REGISTRY_COLUMNS = {
+    "certificate_no": "cert_id",
+    "name": "name",
+    "dob": "dob",
+    "course": "course",
+    "year": "year",
+    "grade": "grade",
+    "institution": "institution",
+    "issued_on": "issued_on",
+    "certificate_type": "certificate_type",
+    "institution_code": "institution_code",
+    "status": "status",
+    "digital_hash": "digital_hash",
+}
+
+
+def current_version(conn=None):
+    """Latest published registry version (0 when nothing was ingested)"""
+    conn = conn or get_pool().connection()
+    row = conn.execute("SELECT MAX(version) FROM registry_versions WHERE completed_at IS NOT NULL").fetchone()
+    return row[0] or 0
+
+
+def publish_sql(columns):
+    """Upsert of one staged batch for the given CSV columns, keyed by certificate number.
+
+    Rows whose values did not change keep their version, so a re-ingested
+    file only hands running servers the rows that actually moved.
+    """
+    table_columns = [REGISTRY_COLUMNS[column] for column in columns]
+    updates = [column for column in table_columns if column != "cert_id"]
+    changed = " OR ".join(f"certificates.{column} IS NOT excluded.{column}" for column in updates) or "0"
+    return (
+        f"INSERT INTO certificates ({', '.join(table_columns)}, version) "
+        f"SELECT {', '.join(table_columns)}, ? FROM certificates_staging WHERE batch = ? ORDER BY rowid "
+        f"ON CONFLICT(cert_id) DO UPDATE SET "
+        f"{', '.join(f'{column} = excluded.{column}' for column in updates + ['version'])} "
+        f"WHERE {changed}"
+    )
+
+
+def stage_csv(path, batch, chunk_size=INGEST_CHUNK_SIZE, conn=None):
+    """Write a registry CSV into certificates_staging under batch, chunk_size rows at a time.
+
+    Returns (CSV columns, rows staged). Staged rows are invisible to
+    servers until publish() moves them into the certificates table.
+    """
+    import pandas as pd
+
+    conn = conn or get_pool().connection()
+    columns, rows_read = None, 0
+    for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False):
+        columns = [column for column in chunk.columns if column in REGISTRY_COLUMNS]
+        if "certificate_no" not in columns:
+            raise ValueError(f"{path} has no certificate_no column")
+
+        chunk = chunk[chunk["certificate_no"].str.strip() != ""]
+        table_columns = [REGISTRY_COLUMNS[column] for column in columns]
+        conn.executemany(
+            f"INSERT INTO certificates_staging (batch, {', '.join(table_columns)}) "
+            f"VALUES (?, {', '.join('?' for _ in table_columns)})",
+            [(batch, *values) for values in chunk[columns].itertuples(index=False, name=None)])
+        conn.commit()
+        rows_read += len(chunk)
+    return columns or [], rows_read
+
+
+def publish(batch, columns, source, rows_read, started_at=None, conn=None):
+    """Move a staged batch into the certificates table as a new registry version, in one transaction.
+
+    The version is allocated here, inside the same transaction, so servers
+    see either none or all of the batch and versions are published in order.
+    Returns (version, rows inserted or changed).
+    """
+    conn = conn or get_pool().connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("INSERT INTO registry_versions (source, rows_read, started_at) "
+                               "VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP))",
+                               (source, rows_read, started_at)).lastrowid
+        before = conn.total_changes
+        if columns:
+            conn.execute(publish_sql(columns), (version, batch))
+        rows_changed = conn.total_changes - before
+        conn.execute("UPDATE registry_versions SET rows_changed = ?, completed_at = CURRENT_TIMESTAMP "
+                     "WHERE version = ?", (rows_changed, version))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return version, rows_changed
+
+
+def ingest_csv(path, chunk_size=INGEST_CHUNK_SIZE, database_path=DATABASE_PATH):
+    """Stream a full registry CSV or a delta file into the certificates table.
+
+    The file is staged chunk_size rows at a time, then published as one
+    new registry version in a single transaction: servers keep reading
+    the previous version until then, and a run that fails part way
+    leaves the certificates table untouched.
+    Returns (version, rows read, rows inserted or changed).
+    """
+    init_database(database_path)
+    conn = get_pool(database_path).connection()
+    batch = uuid.uuid4().hex
+    started_at = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+    try:
+        columns, rows_read = stage_csv(path, batch, chunk_size, conn)
+        version, rows_changed = publish(batch, columns, os.path.abspath(path), rows_read, started_at, conn)
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute("DELETE FROM certificates_staging WHERE batch = ?", (batch,))
+        conn.commit()
+    return version, rows_read, rows_changed
+
+
+def load_registry_records(since_version=0, conn=None):
+    """Registry rows changed after since_version, as (version, RegistryRecords keyed by row id).
+
+    The version and the rows are read in one transaction, so they come
+    from the same published state even while an ingest is publishing.
+    Columns are named as in the registry CSV. Rows go straight from the
+    cursor into compact columns, without an intermediate DataFrame;
+    values read back with their database types, so years stay integers
+    when some are missing.
+    """
+    from .registry_columns import RegistryRecords
+
+    conn = conn or get_pool().connection()
+    select = ", ".join(f"{column} AS {name}" for name, column in REGISTRY_COLUMNS.items())
+    conn.execute("BEGIN")
+    try:
+        version = current_version(conn)
+        cursor = conn.execute(f"SELECT id, {select} FROM certificates WHERE version > ? AND version <= ? "
+                              f"ORDER BY id", (since_version, version))
+        rows = [tuple(row) for row in cursor.fetchall()]
+    finally:
+        conn.commit()
+    return version, RegistryRecords.from_rows(list(REGISTRY_COLUMNS), [row[1:] for row in rows],
+                                              [row[0] for row in rows])
+
+
+class LiveRegistry:
+    """CertificateRegistry backed by the certificates table, refreshed incrementally.
+
+    The first use seeds an empty store from REGISTRY_CSV and loads it.
+    After that, current() returns the registry in hand at once and, at
+    most every refresh_seconds, starts a background thread that merges
+    the rows published since and builds the next registry. It is swapped
+    in with single assignments, so readers never wait on a refresh and
+    keep whichever registry they got. Subscribers are told the new
+    version and the certificate numbers it touched after each merge.
+    """
+
+    def __init__(self, seed_csv=REGISTRY_CSV, refresh_seconds=REGISTRY_REFRESH_SECONDS,
+                 database_path=DATABASE_PATH):
+        self.seed_csv = seed_csv
+        self.database_path = database_path
+        self.refresh_seconds = refresh_seconds
+        self.version = 0
+        self.records = None
+        self.registry = None
+        self.errors = 0
+        self.last_error = None
+        self._checked_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        # Serializes loads and merges; current() never takes it once a registry is loaded
+        self._refresh_lock = threading.Lock()
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        """Call callback(version, certificate numbers) whenever a newer version is merged in"""
+        self._subscribers.append(callback)
+
+    def current(self):
+        """Registry as of the latest version merged in (a newer one is looked for every refresh_seconds)"""
+        registry = self.registry
+        if registry is None:
+            self.refresh()
+            return self.registry
+        if time.monotonic() - self._checked_at >= self.refresh_seconds:
+            self._refresh_in_background()
+        return registry
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            self._checked_at = time.monotonic()
+        threading.Thread(target=self._background_refresh, name="registry-refresh", daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            print(f"Registry refresh failed, keeping version {self.version}: {e}")
+        finally:
+            self._refreshing = False
+            get_pool(self.database_path).release()
+
+    def refresh(self):
+        """Load or merge up to the latest published version now; returns the version in use"""
+        with self._refresh_lock:
+            if self.registry is None:
+                self._load()
+            else:
+                self._merge_delta()
+            self._checked_at = time.monotonic()
+            return self.version
+
+    def _load(self):
+        # numpy and rapidfuzz (and pandas, to seed an empty store) load here, on first use, rather than at import
+        from .registry import CertificateRegistry
+
+        init_database(self.database_path)
+        conn = get_pool(self.database_path).connection()
+        if current_version(conn) == 0 and self.seed_csv and os.path.exists(self.seed_csv):
+            ingest_csv(self.seed_csv, database_path=self.database_path)
+        version, records = load_registry_records(0, conn)
+        self.records, self.registry = records, CertificateRegistry(records)
+        self.version = version
+
+    def _merge_delta(self):
+        conn = get_pool(self.database_path).connection()
+        if current_version(conn) <= self.version:
+            return
+        latest, delta = load_registry_records(self.version, conn)
+        # Updated rows replace their old values in place; new rows land in insertion order
+        records, replaced, added = self.records.merge(delta)
+        # Only the changed rows are indexed again
+        registry = self.registry.merged(records, replaced, added)
+        # The registry goes in before its version, so a verdict is never labelled newer than what decided it
+        self.registry, self.records = registry, records
+        self.version = latest
+        changed = {str(value) for value in delta.column("certificate_no").values() if value is not None}
+        for callback in self._subscribers:
+            callback(latest, changed)
+
+    def stats(self):
+        registry = self.registry
+        memory = registry.memory_usage() if registry is not None else {}
+        return {
+            'version': self.version,
+            'records': len(registry) if registry is not None else 0,
+            'refresh_seconds': self.refresh_seconds,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'memory_mb': {part: round(size / 2 ** 20, 2) for part, size in memory.items()},
+        }
+
+
+live_registry = LiveRegistry()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest registry CSV files (full exports or deltas) into the database")
+    parser.add_argument("paths", nargs="+", help="CSV files with a certificate_no column")
+    parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    for path in args.paths:
+        started = time.perf_counter()
+        version, rows_read, rows_changed = ingest_csv(path, args.chunk_size)
+        print(f"{path}: version {version}, {rows_read} rows read, {rows_changed} inserted or changed "
+              f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# backend/app/seal_index.py
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from .config import INSTITUTION_CONFIG
+from .imaging import as_certificate_image
+from .institutions import institutions
+from .reference_assets import reference_assets
+
+# Reference seals are indexed at about the sizes (px) seals appear at on a scanned page
+SEAL_INDEX_SIZES = (192, 256, 320)
+SEAL_FEATURES = 500
+# Lowe's ratio test: a descriptor votes only if its best match clearly beats the runner-up
+SEAL_RATIO_TEST = 0.75
+# To identify an institution, at least this share of a crop's descriptors must vote for it...
+SEAL_MIN_SCORE = float(os.environ.get("SEAL_MIN_SCORE", 0.05))
+# ...and it must get this many times the votes of the runner-up
+SEAL_MIN_MARGIN = 3.0
+# How often the index checks whether the loaded institutions changed
+SEAL_INDEX_REFRESH_SECONDS = 10
+
+# FLANN multi-probe LSH over binary ORB descriptors
+FLANN_INDEX_LSH = 6
+LSH_INDEX_PARAMS = dict(algorithm=FLANN_INDEX_LSH, table_number=6, key_size=12, multi_probe_level=1)
+LSH_SEARCH_PARAMS = dict(checks=50)
+
+
+def seal_descriptors(gray):
+    _, descriptors = cv2.ORB_create(nfeatures=SEAL_FEATURES).detectAndCompute(gray, None)
+    return descriptors
+
+
+class SealIndex:
+    """ORB descriptors of every institution's reference seal in one LSH index.
+
+    A seal crop is matched against all institutions at once: each of its
+    descriptors that passes the ratio test votes for the institution that
+    owns its nearest reference descriptor. LSH buckets keep a lookup well
+    below a scan of every reference as institutions are added. Without
+    explicit institution_codes it covers every loaded institution and is
+    rebuilt when one is added, removed or gets a new reference seal.
+    """
+
+    def __init__(self, institution_codes=None, refresh_seconds=SEAL_INDEX_REFRESH_SECONDS):
+        self.fixed_codes = list(institution_codes) if institution_codes is not None else None
+        self.institution_codes = []
+        self.refresh_seconds = refresh_seconds
+        self.assets = {}
+        self.owners = []
+        self.matcher = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def build(self):
+        """(Re)build the index from the cached reference seals"""
+        codes = self.fixed_codes if self.fixed_codes is not None else list(INSTITUTION_CONFIG)
+        assets = {code: reference_assets.get(code) for code in codes}
+        matcher = cv2.FlannBasedMatcher(LSH_INDEX_PARAMS, LSH_SEARCH_PARAMS)
+        owners = []
+        for code, entry in assets.items():
+            if entry is None or entry.seal is None:
+                continue
+            for size in SEAL_INDEX_SIZES:
+                descriptors = seal_descriptors(cv2.resize(entry.seal, (size, size), interpolation=cv2.INTER_AREA))
+                if descriptors is not None:
+                    matcher.add([descriptors])
+                    owners.append(code)
+        if owners:
+            matcher.train()
+        self.institution_codes, self.assets, self.owners = codes, assets, owners
+        self.matcher = matcher if owners else None
+        self._checked_at = time.monotonic()
+
+    def _current(self):
+        with self._lock:
+            if self.matcher is None and not self.assets:
+                self.build()
+            elif time.monotonic() - self._checked_at >= self.refresh_seconds:
+                # A reloaded institution comes with new reference assets
+                codes = self.fixed_codes if self.fixed_codes is not None else list(INSTITUTION_CONFIG)
+                if (codes != self.institution_codes
+                        or any(reference_assets.get(code) is not entry for code, entry in self.assets.items())):
+                    self.build()
+                self._checked_at = time.monotonic()
+            return self.matcher, self.owners
+
+    def query(self, seal_crop, limit=5):
+        """Institutions ranked by how well the crop matches their seal, as [(code, score), ...]"""
+        matcher, owners = self._current()
+        gray = cv2.cvtColor(seal_crop, cv2.COLOR_BGR2GRAY) if len(seal_crop.shape) == 3 else seal_crop
+        descriptors = seal_descriptors(gray)
+        if matcher is None or descriptors is None or len(descriptors) < 2:
+            return []
+
+        votes = {}
+        for matches in matcher.knnMatch(descriptors, k=2):
+            if len(matches) == 2 and matches[0].distance < SEAL_RATIO_TEST * matches[1].distance:
+                code = owners[matches[0].imgIdx]
+                votes[code] = votes.get(code, 0) + 1
+        ranked = sorted(votes.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(code, round(count / len(descriptors), 3)) for code, count in ranked]
+
+    def identify(self, image, min_score=SEAL_MIN_SCORE):
+        """Institution code whose seal sits in its own seal ROI on a full certificate image, or None.
+
+        ORB runs once over the page area spanning every layout's seal ROI
+        and the index is queried once with all of its descriptors, so
+        adding layouts does not add detections or lookups. A candidate
+        counts only if the descriptors inside its own seal ROI vote for it
+        and it clearly outscores the next institution there.
+        """
+        certificate = as_certificate_image(image)
+        matcher, owners = self._current()
+        layouts = institutions.current().config
+        indexed = set(owners)
+        rois = {code: layouts[code]['seal']['roi'] for code in self.institution_codes
+                if code in layouts and code in indexed}
+        if matcher is None or not rois:
+            return None
+
+        area = [min(roi[0] for roi in rois.values()), min(roi[1] for roi in rois.values()),
+                max(roi[2] for roi in rois.values()), max(roi[3] for roi in rois.values())]
+        height, width = certificate.gray.shape[:2]
+        # About SEAL_FEATURES keypoints for every seal-sized part of the searched area
+        seal_area = sum((roi[2] - roi[0]) * (roi[3] - roi[1]) for roi in rois.values()) / len(rois)
+        features = int(SEAL_FEATURES * max(1.0, (area[2] - area[0]) * (area[3] - area[1]) / seal_area))
+        keypoints, descriptors = cv2.ORB_create(nfeatures=features).detectAndCompute(
+            certificate.crop(area, "gray"), None)
+        if descriptors is None or len(descriptors) < 2:
+            return None
+
+        # Keypoint positions as page fractions, to compare with the ROIs
+        x = (np.array([kp.pt[0] for kp in keypoints]) + int(area[0] * width)) / width
+        y = (np.array([kp.pt[1] for kp in keypoints]) + int(area[1] * height)) / height
+        voters = np.full(len(descriptors), -1)
+        codes = sorted(indexed)
+        for matches in matcher.knnMatch(descriptors, k=2):
+            if len(matches) == 2 and matches[0].distance < SEAL_RATIO_TEST * matches[1].distance:
+                voters[matches[0].queryIdx] = codes.index(owners[matches[0].imgIdx])
+
+        best_code, best_score = None, min_score
+        for code, roi in rois.items():
+            inside = (x >= roi[0]) & (x < roi[2]) & (y >= roi[1]) & (y < roi[3])
+            if inside.sum() < 2:
+                continue
+            votes = np.bincount(voters[inside & (voters >= 0)], minlength=len(codes)) / inside.sum()
+            score = votes[codes.index(code)]
+            runner_up = np.delete(votes, codes.index(code)).max(initial=0.0)
+            if score >= best_score and score >= SEAL_MIN_MARGIN * runner_up:
+                best_code, best_score = code, score
+        return best_code
+
+    def stats(self):
+        return {'institutions': len(set(self.owners)), 'references': len(self.owners)}
+
+
+seal_index = SealIndex()
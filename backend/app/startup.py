@@ -0,0 +1,45 @@
+# backend/app/startup.py
+import os
+import threading
+
+# Set WARMUP_ON_STARTUP=0 to load everything on the first request instead
+WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "1") != "0"
+
+
+def import_pipeline():
+    """Import the OpenCV / Tesseract / pandas stack the verification stages use"""
+    import pytesseract  # noqa: F401
+    from . import alignment, forgery_detection, imaging, qr_verification, registry, seal_index  # noqa: F401
+
+
+def compile_institutions():
+    """Decode every institution's reference images and build their descriptors and templates"""
+    from .institutions import institutions
+
+    institutions.compile()
+
+
+def build_seal_index():
+    """Index the reference seals of the loaded institutions"""
+    from .seal_index import seal_index
+
+    seal_index.build()
+
+
+def warm_up_in_background(*steps):
+    """Run warm-up steps on a daemon thread so the server is ready to accept requests at once.
+
+    Requests that arrive before a step finishes simply do that work
+    themselves; imports and the lazily loaded caches are safe to race.
+    """
+    def run():
+        for step in steps:
+            try:
+                step()
+            except Exception as e:
+                print(f"Warm-up step {step.__name__} failed: {e}")
+
+    thread = threading.Thread(target=run, name="warmup", daemon=True)
+    if WARMUP_ON_STARTUP:
+        thread.start()
+    return thread
@@ -1,3 +1,5 @@
+from .config import INSTITUTION_NAME_TO_CODE
+
 # def get_institution_code_from_name(institution_name):
 #     """Maps a full institution name to its code."""
 #     institution_mapping = {
@@ -11,11 +13,6 @@
 
 def get_institution_code_from_name(institution_name):
     """Maps a full institution name to its code."""
-    institution_mapping = {
-        "Jharkhand State University": "JHAR",
-        "Ranchi Tech Institute": "RANC",
-        "Jharkhand Business School": "JHAR_BS"
-    }
     # Simple direct mapping - you might want to make this more robust
     # with fuzzy matching if OCR results are imperfect
-    return institution_mapping.get(institution_name)
\ No newline at end of file
+    return INSTITUTION_NAME_TO_CODE.get(institution_name)
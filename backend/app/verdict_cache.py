@@ -0,0 +1,180 @@
+# backend/app/verdict_cache.py
+import copy
+import datetime
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from .institutions import institutions
+from .ocr_cache import config_version, image_key
+
+# Set VERDICT_CACHE=0 to run the full pipeline for every upload
+VERDICT_CACHE = os.environ.get("VERDICT_CACHE", "1") != "0"
+VERDICT_CACHE_SIZE = int(os.environ.get("VERDICT_CACHE_SIZE", 1024))
+# Seconds a verdict is served before the certificate is verified again
+VERDICT_CACHE_TTL = float(os.environ.get("VERDICT_CACHE_TTL", 3600))
+
+
+def normalize_certificate_no(value):
+    return str(value).strip().upper()
+
+
+def verdict_certificates(verdict):
+    """Certificate numbers a verdict was decided on: the one read off the upload and any matched record"""
+    numbers = set()
+    extracted = verdict.get("extracted_info") or {}
+    if extracted.get("certificate_no") not in (None, "", "Not found"):
+        numbers.add(normalize_certificate_no(extracted["certificate_no"]))
+    for section in ("qr_validation", "ocr_validation", "validation"):
+        record = (verdict.get(section) or {}).get("matched_record")
+        if record and record.get("certificate_no"):
+            numbers.add(normalize_certificate_no(record["certificate_no"]))
+    return numbers
+
+
+def is_matched(verdict):
+    return any((verdict.get(section) or {}).get("matched_record")
+               for section in ("qr_validation", "ocr_validation", "validation"))
+
+
+class VerdictCache:
+    """Complete verification results keyed by upload content.
+
+    The key also covers the OCR settings and the version of the loaded
+    institutions (thresholds, ROIs, aliases and reference seal/signature
+    content), so editing any of them misses every entry. Registry changes are applied
+    per certificate instead: the registry reports the certificate
+    numbers each new version touched (revocations and status changes
+    arrive as ingested rows like any other), and only verdicts decided
+    on one of those, or on no record at all, are dropped. Entries also
+    expire after ttl seconds.
+    """
+
+    def __init__(self, namespace, version, registry=None, max_entries=VERDICT_CACHE_SIZE, ttl=VERDICT_CACHE_TTL):
+        self.namespace = namespace
+        self.version = version
+        self.registry = registry
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.registry_version = None
+        self._entries = OrderedDict()
+        self._by_certificate = {}
+        self._unmatched = set()
+        self._lock = threading.Lock()
+
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        if registry is not None:
+            registry.subscribe(self.registry_changed)
+
+    def key(self, contents):
+        """Cache key of an upload under the current configuration and institutions"""
+        return image_key(contents, config_version(self.version, institutions.current().version))
+
+    def get(self, key, endpoint):
+        """Copy of the cached verdict for a key, marked as a cache hit, or None"""
+        if self.registry is not None:
+            # Applies any registry change to the cache before it answers
+            self.registry.current()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses[endpoint] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits[endpoint] += 1
+            verdict = copy.deepcopy(entry[2])
+
+        if "processing_timestamp" in verdict.get("extracted_info", {}):
+            verdict["extracted_info"]["processing_timestamp"] = datetime.datetime.now().isoformat()
+        verdict.setdefault("pipeline", {})["verdict_cache"] = "hit"
+        return verdict
+
+    def put(self, key, verdict, registry_version):
+        """Cache a successful verdict reached against registry_version.
+
+        Verdicts against a registry older than the one the cache has
+        already caught up with are not kept.
+        """
+        if not verdict.get("success"):
+            return
+        numbers = verdict_certificates(verdict)
+        verdict = copy.deepcopy(verdict)
+        with self._lock:
+            if self.registry_version is not None and registry_version < self.registry_version:
+                return
+            if self.registry_version is None:
+                self.registry_version = registry_version
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, numbers, verdict)
+            for number in numbers:
+                self._by_certificate.setdefault(number, set()).add(key)
+            if not is_matched(verdict):
+                self._unmatched.add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        _, numbers, _ = self._entries.pop(key)
+        self._unmatched.discard(key)
+        for number in numbers:
+            keys = self._by_certificate.get(number)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_certificate[number]
+
+    def registry_changed(self, registry_version, certificate_nos):
+        """Drop verdicts that a new registry version may decide differently"""
+        with self._lock:
+            stale = set(self._unmatched)
+            for number in certificate_nos:
+                stale.update(self._by_certificate.get(normalize_certificate_no(number), ()))
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+            self.registry_version = registry_version
+
+    def lookup(self, contents, endpoint):
+        """(key, cached verdict or None) for an upload"""
+        key = self.key(contents)
+        return key, self.get(key, endpoint)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_certificate.clear()
+            self._unmatched.clear()
+
+    def stats(self):
+        with self._lock:
+            endpoints = {}
+            for endpoint in sorted(set(self.hits) | set(self.misses)):
+                lookups = self.hits[endpoint] + self.misses[endpoint]
+                endpoints[endpoint] = {
+                    'hits': self.hits[endpoint],
+                    'misses': self.misses[endpoint],
+                    'hit_rate': round(self.hits[endpoint] / lookups, 4) if lookups else 0.0,
+                }
+            return {
+                'namespace': self.namespace,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'registry_version': self.registry_version,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'endpoints': endpoints,
+            }
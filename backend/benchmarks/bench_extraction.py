@@ -0,0 +1,113 @@
+"""Micro-benchmark for OCR text field extraction.
+
+Compares the precompiled ExtractionEngine with the per-pattern approach it
+replaced (one re.search per field and per institution) as the number of
+known institutions grows. Run from backend/:
+
+    python benchmarks/bench_extraction.py [--docs 2000] [--institutions 3,100,1000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import INSTITUTION_NAME_TO_CODE, OCR_INSTITUTION_MAPPING
+from app.extraction import COURSE_PATTERNS, ExtractionEngine, clean_name
+
+WORDS = ["Ranchi", "Dhanbad", "Bokaro", "Hazaribagh", "Dumka", "Tech", "State", "Central", "National",
+         "Institute", "University", "College", "School", "Business", "Science", "Arts", "Academy"]
+NAMES = ["Rahul Sharma", "Anita Kumari", "Vikram Singh", "Priya Das", "Sneha Gupta", "Amit Oraon"]
+COURSES = ["BBA", "BA History", "MSc Physics", "Bachelor of Commerce"]
+
+
+def synthetic_institutions(count, rng):
+    """count distinct institution names, starting with the configured ones"""
+    names = dict(INSTITUTION_NAME_TO_CODE)
+    while len(names) < count:
+        name = " ".join(rng.sample(WORDS, 3)) + f" {len(names)}"
+        names[name] = f"SYN{len(names)}"
+    return names
+
+
+def synthetic_texts(institutions, docs, rng):
+    names = list(institutions)
+    texts = []
+    for i in range(docs):
+        year = rng.randint(2010, 2024)
+        texts.append(
+            f"{rng.choice(names).upper()}\nCertificate No: CERT-{year}-{i:05d}\n"
+            f"This certificate is awarded to\n{rng.choice(NAMES)} {rng.choice(COURSES)}\n"
+            f"For completing the program in the year {year}.\nRegistrar   Controller of Examinations"
+        )
+    return texts
+
+
+def naive_extract(text, institutions):
+    """Field extraction the way it was done before the engine: a search per pattern"""
+    info = {}
+    match = re.search(r'Cert(?:ificate)?\s*No[:\-\s]*([A-Z0-9\-]+)', text, re.IGNORECASE)
+    info["certificate_no"] = match.group(1).strip() if match else "-"
+
+    for institution in institutions:
+        if re.search(re.escape(institution), text, re.IGNORECASE):
+            info["institution"] = institution
+            break
+
+    match = re.search(r'(?:awarded to|is given to|THIS CERTIFICATE IS GIVEN TO)\s*\n?([A-Za-z\s]+)', text,
+                      re.IGNORECASE)
+    if match:
+        raw_name = re.sub(r'\s+', ' ', match.group(1)).strip()
+        for course_pattern in COURSE_PATTERNS:
+            course_match = re.search(course_pattern, raw_name, re.IGNORECASE)
+            if course_match:
+                info["course"] = course_match.group(1).strip()
+                raw_name = raw_name.replace(info["course"], "").strip()
+                break
+        info["name"] = clean_name(raw_name)
+
+    match = re.search(r'\b(19|20)\d{2}\b', text.replace(info["certificate_no"], ""))
+    if match:
+        info["year"] = match.group(0)
+    return info
+
+
+def timed(fn, texts):
+    start = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--institutions", default="3,30,300,1000")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'institutions':>12} {'build ms':>9} {'engine us/doc':>14} {'naive us/doc':>13} {'speedup':>8}")
+    for count in (int(n) for n in args.institutions.split(",")):
+        rng = random.Random(args.seed)
+        institutions = synthetic_institutions(count, rng)
+        texts = synthetic_texts(institutions, args.docs, rng)
+        mapping = dict(OCR_INSTITUTION_MAPPING, **{name.lower(): name for name in institutions})
+
+        start = time.perf_counter()
+        engine = ExtractionEngine(mapping, institutions)
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        for text in texts[:50]:
+            expected = naive_extract(text, institutions)
+            assert engine.extract(text) == expected, (engine.extract(text), expected)
+
+        engine_us = timed(engine.extract, texts)
+        naive_us = timed(lambda text: naive_extract(text, institutions), texts)
+        print(f"{count:>12} {build_ms:>9.1f} {engine_us:>14.1f} {naive_us:>13.1f} {naive_us / engine_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
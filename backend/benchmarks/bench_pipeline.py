@@ -0,0 +1,254 @@
+"""End-to-end benchmark of the verification pipeline.
+
+Times every stage separately over datasets/certificates (decode, QR read,
+OCR, registry validation, seal and signature matching), measures pipeline
+throughput with 1, 4 and N worker threads, and times registry validation
+against synthetic registries of growing size. Results are written as JSON;
+pass --compare with an earlier result to fail on regressions. Run from
+backend/:
+
+    python benchmarks/bench_pipeline.py --output bench.json
+    python benchmarks/bench_pipeline.py --compare bench.json --registry-sizes 100,10000
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "benchmarks"))
+
+import cv2
+import pandas as pd
+import pytesseract
+
+from app.config import INSTITUTION_CONFIG
+from app.database import init_database
+from app.forgery_detection import extract_roi, verify_seal, verify_signature
+from app.imaging import decode_image, to_ocr_image
+from app.ocr import extract_certificate_info, validate_certificate_fuzzy
+from app.qr_verification import extract_qr_region, read_qr_code_opencv
+from app.reference_assets import reference_assets
+from app.registry import CertificateRegistry
+from synthetic import ocr_queries, synthetic_rows
+
+CERTIFICATES_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "datasets", "certificates")
+DATASET_PATH = os.path.join(os.path.dirname(BACKEND_DIR), "datasets", "ocr_dataset.csv")
+
+# Layout of the sample certificates, from their file name prefix
+LAYOUT_BY_PREFIX = {"JSU": "JHAR", "RTI": "RANC", "JBS": "JHAR_BS"}
+
+
+def summarize(samples_ms):
+    samples = sorted(samples_ms)
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def tesseract_available():
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except (pytesseract.TesseractNotFoundError, OSError):
+        return False
+
+
+def load_certificates():
+    certificates = []
+    for path in sorted(glob.glob(os.path.join(CERTIFICATES_DIR, "*"))):
+        layout = LAYOUT_BY_PREFIX.get(os.path.basename(path)[:3].upper())
+        if layout:
+            with open(path, "rb") as f:
+                certificates.append((os.path.basename(path), layout, f.read()))
+    return certificates
+
+
+def sample_info(registry, layout):
+    """Extracted info to validate when OCR is unavailable: a registry row of the same institution"""
+    for row_id in range(len(registry)):
+        record = registry.record(row_id)
+        if record.get("institution_code") == layout:
+            return {key: str(record[key]) for key in ("certificate_no", "name", "institution", "year")}
+    return {}
+
+
+def run_pipeline(contents, layout, registry, use_ocr):
+    """One certificate through every stage, returning {stage: ms}"""
+    config = INSTITUTION_CONFIG[layout]
+    assets = reference_assets.get(layout)
+    timings = {}
+
+    image, timings["decode"] = timed(decode_image, contents)
+    _, timings["read_qr_code_opencv"] = timed(read_qr_code_opencv, extract_qr_region(image, config["qr"]["roi"]))
+    if use_ocr:
+        info, timings["extract_certificate_info"] = timed(extract_certificate_info, to_ocr_image(image))
+    else:
+        info = sample_info(registry, layout)
+    _, timings["validate_certificate_fuzzy"] = timed(validate_certificate_fuzzy, info, registry)
+    _, timings["verify_seal"] = timed(verify_seal, extract_roi(image, config["seal"]["roi"]), assets.seal,
+                                      assets.seal_descriptors)
+    _, timings["verify_signature"] = timed(verify_signature, extract_roi(image, config["signature"]["roi"]),
+                                           assets.signature, assets.signature_templates)
+    return timings
+
+
+def bench_stages(certificates, registry, use_ocr, repeats):
+    samples = {}
+    for _ in range(repeats):
+        for _, layout, contents in certificates:
+            for stage, ms in run_pipeline(contents, layout, registry, use_ocr).items():
+                samples.setdefault(stage, []).append(ms)
+    stages = {stage: summarize(values) for stage, values in samples.items()}
+    if not use_ocr:
+        stages["extract_certificate_info"] = {"skipped": "tesseract binary not found"}
+    return stages
+
+
+def bench_throughput(certificates, registry, use_ocr, worker_counts, items):
+    work = [certificates[i % len(certificates)] for i in range(items)]
+    results = []
+    for workers in worker_counts:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            start = time.perf_counter()
+            list(pool.map(lambda item: run_pipeline(item[2], item[1], registry, use_ocr), work))
+            seconds = time.perf_counter() - start
+        results.append({"workers": workers, "items": items, "seconds": round(seconds, 3),
+                        "per_second": round(items / seconds, 2)})
+    return results
+
+
+def bench_registry(sizes, queries):
+    results = []
+    for size in sizes:
+        rows = synthetic_rows(size)
+        db = pd.DataFrame(rows)
+        registry, build_ms = timed(CertificateRegistry, db)
+        samples = [timed(validate_certificate_fuzzy, query, registry)[1] for query in ocr_queries(rows, queries)]
+        # The object DataFrame the registry used to keep, against the compact columns and indexes it keeps now
+        frame_bytes = int(db.memory_usage(deep=True).sum())
+        memory = registry.memory_usage()
+        registry_bytes = sum(memory.values())
+        results.append({"rows": size, "build_s": round(build_ms / 1000, 3),
+                        "validate_certificate_fuzzy": summarize(samples),
+                        "memory": {
+                            "dataframe_mb": round(frame_bytes / 2 ** 20, 1),
+                            "registry_mb": {part: round(nbytes / 2 ** 20, 1) for part, nbytes in memory.items()},
+                            "dataframe_mb_per_million": round(frame_bytes / size * 1e6 / 2 ** 20, 1),
+                            "records_mb_per_million": round(memory["records"] / size * 1e6 / 2 ** 20, 1),
+                            "registry_mb_per_million": round(registry_bytes / size * 1e6 / 2 ** 20, 1),
+                        }})
+        del registry, db, rows
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                                text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "cpu_count": os.cpu_count(),
+        "platform": platform.platform(),
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Regressions of current against baseline beyond tolerance (a fraction)"""
+    regressions = []
+
+    def check(label, new, old, higher_is_better=False, floor=0.5):
+        # Differences below floor (ms, s or items/s) are timer noise, whatever the percentage
+        if not new or not old or abs(new - old) < floor:
+            return
+        change = (old - new) / old if higher_is_better else (new - old) / old
+        if change > tolerance:
+            regressions.append(f"{label}: {old} -> {new} ({change:+.0%})")
+
+    for stage, stats in current["stages"].items():
+        check(f"stage {stage} p50_ms", stats.get("p50_ms"), baseline["stages"].get(stage, {}).get("p50_ms"))
+    old_throughput = {item["workers"]: item["per_second"] for item in baseline.get("throughput", [])}
+    for item in current["throughput"]:
+        check(f"throughput {item['workers']} workers per_second", item["per_second"],
+              old_throughput.get(item["workers"]), higher_is_better=True)
+    old_registry = {item["rows"]: item for item in baseline.get("registry", [])}
+    for item in current["registry"]:
+        old = old_registry.get(item["rows"])
+        if old:
+            check(f"registry {item['rows']} rows build_s", item["build_s"], old["build_s"], floor=0.05)
+            check(f"registry {item['rows']} rows validate p50_ms", item["validate_certificate_fuzzy"]["p50_ms"],
+                  old["validate_certificate_fuzzy"]["p50_ms"])
+            if "memory" in item and "memory" in old:
+                check(f"registry {item['rows']} rows MB per million", item["memory"]["registry_mb_per_million"],
+                      old["memory"]["registry_mb_per_million"], floor=1)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=3, help="passes over the sample certificates per stage")
+    parser.add_argument("--workers", default=f"1,4,{os.cpu_count() or 1}")
+    parser.add_argument("--throughput-items", type=int, default=44)
+    parser.add_argument("--registry-sizes", default="100,10000,100000,1000000")
+    parser.add_argument("--registry-queries", type=int, default=200)
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON result to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    init_database()
+    certificates = load_certificates()
+    registry = CertificateRegistry(pd.read_csv(DATASET_PATH))
+    use_ocr = tesseract_available()
+    worker_counts = sorted({int(n) for n in args.workers.split(",")})
+
+    results = {
+        "meta": dict(metadata(), ocr=use_ocr, certificates=len(certificates)),
+        "stages": bench_stages(certificates, registry, use_ocr, args.repeats),
+        "throughput": bench_throughput(certificates, registry, use_ocr, worker_counts, args.throughput_items),
+        "registry": bench_registry([int(n) for n in args.registry_sizes.split(",") if n],
+                                   args.registry_queries),
+    }
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results["regressions"] = regressions
+
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+    for regression in regressions:
+        print("REGRESSION:", regression, file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
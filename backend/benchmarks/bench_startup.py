@@ -0,0 +1,97 @@
+"""Cold-start import benchmark for the verification services.
+
+Imports each service module in a fresh interpreter with `python -X importtime`
+and reports the median total import time, the part spent in the app's own
+modules, and the slowest dependencies. Exits non-zero when a module goes over
+its budget or pulls in one of the heavy libraries that are meant to load on
+first use. Run from backend/:
+
+    python benchmarks/bench_startup.py [--runs 5] [--budget-ms 1500] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVICE_MODULES = ["app.api", "app.main", "app.app"]
+# Loaded lazily by the verification stages; none of them should appear at import
+DEFERRED_MODULES = ["cv2", "pandas", "numpy", "pytesseract", "rapidfuzz"]
+
+
+def import_profile(module):
+    """(cumulative us per imported module, self us per module) for one cold import"""
+    check = f"import sys, {module}; print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", check], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, check=True)
+    cumulative, own = {}, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue  # header line
+        name = fields[2].strip()
+        cumulative[name] = cumulative_us
+        own[name] = self_us
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return cumulative, own, loaded
+
+
+def profile_module(module, runs, top):
+    totals, app_times, loaded = [], [], set()
+    slowest = {}
+    for _ in range(runs):
+        cumulative, own, deferred = import_profile(module)
+        totals.append(cumulative.get(module, 0) / 1000)
+        app_times.append(sum(us for name, us in own.items() if name == "app" or name.startswith("app.")) / 1000)
+        loaded.update(deferred)
+        for name, us in own.items():
+            slowest.setdefault(name, []).append(us / 1000)
+    ranked = sorted(((statistics.median(times), name) for name, times in slowest.items()), reverse=True)[:top]
+    return {
+        "module": module,
+        "total_ms": round(statistics.median(totals), 1),
+        "app_ms": round(statistics.median(app_times), 1),
+        "deferred_loaded": sorted(loaded),
+        "slowest": [{"module": name, "self_ms": round(ms, 1)} for ms, name in ranked],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=SERVICE_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("STARTUP_BUDGET_MS", 1500)))
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = [profile_module(module, args.runs, args.top) for module in args.modules]
+    failures = []
+    for result in results:
+        if result["total_ms"] > args.budget_ms:
+            failures.append(f"{result['module']} took {result['total_ms']}ms (budget {args.budget_ms}ms)")
+        if result["deferred_loaded"]:
+            failures.append(f"{result['module']} imported {', '.join(result['deferred_loaded'])} at startup")
+
+    if args.json:
+        print(json.dumps({"budget_ms": args.budget_ms, "results": results, "failures": failures}, indent=2))
+    else:
+        print(f"{'module':<10} {'total ms':>9} {'app ms':>8}  slowest imports (self ms)")
+        for result in results:
+            slowest = ", ".join(f"{item['module']} {item['self_ms']}" for item in result["slowest"])
+            print(f"{result['module']:<10} {result['total_ms']:>9} {result['app_ms']:>8}  {slowest}")
+        for failure in failures:
+            print("FAIL:", failure)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
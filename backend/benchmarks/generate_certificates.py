@@ -0,0 +1,181 @@
+"""Render synthetic certificates for load testing.
+
+Rows in the ocr_dataset.csv layout are drawn in their institution's layout:
+text goes in the INSTITUTION_CONFIG text regions, the reference seal and
+signature at their ROIs, and an ID/hash QR code in the QR region. Optional
+noise, rotation and forgery perturbations make the set closer to real
+uploads. A manifest.jsonl next to the images records what each file should
+verify as. Run from backend/:
+
+    python benchmarks/generate_certificates.py --out /tmp/certs --count 200 --forgery-rate 0.2 --noise 8 --max-rotation 2
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "benchmarks"))
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from app.config import INSTITUTION_CONFIG, INSTITUTION_NAME_TO_CODE
+from app.forgery_detection import extract_roi
+from synthetic import FIRST_NAMES, LAST_NAMES, synthetic_rows
+
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+DATASET_PATH = os.path.join(REPO_DIR, "datasets", "ocr_dataset.csv")
+
+FORGERY_KINDS = ["seal_swap", "signature_swap", "seal_missing", "qr_tamper", "name_tamper"]
+FONT = cv2.FONT_HERSHEY_DUPLEX
+
+
+def box_pixels(image, roi):
+    height, width = image.shape[:2]
+    return int(roi[0] * width), int(roi[1] * height), int(roi[2] * width), int(roi[3] * height)
+
+
+def put_text_in_box(image, text, roi):
+    """Draw text left-aligned and vertically centred, as large as fits in the ROI"""
+    x0, y0, x1, y1 = box_pixels(image, roi)
+    (width, height), _ = cv2.getTextSize(text, FONT, 1.0, 1)
+    scale = min((x1 - x0) * 0.95 / width, (y1 - y0) * 0.7 / height)
+    thickness = max(1, int(scale * 1.5))
+    (_, text_height), _ = cv2.getTextSize(text, FONT, scale, thickness)
+    baseline_y = y0 + (y1 - y0 + text_height) // 2
+    cv2.putText(image, text, (x0 + 2, baseline_y), FONT, scale, (20, 20, 20), thickness, cv2.LINE_AA)
+
+
+def paste_fitted(image, patch, roi):
+    """Paste patch centred in the ROI, scaled to fit while keeping its aspect ratio"""
+    x0, y0, x1, y1 = box_pixels(image, roi)
+    if patch.ndim == 2:
+        patch = cv2.cvtColor(patch, cv2.COLOR_GRAY2BGR)
+    scale = min((x1 - x0) / patch.shape[1], (y1 - y0) / patch.shape[0])
+    width, height = max(1, int(patch.shape[1] * scale)), max(1, int(patch.shape[0] * scale))
+    interpolation = cv2.INTER_NEAREST if patch.shape[0] < height else cv2.INTER_AREA
+    patch = cv2.resize(patch, (width, height), interpolation=interpolation)
+    left, top = x0 + (x1 - x0 - width) // 2, y0 + (y1 - y0 - height) // 2
+    image[top:top + height, left:left + width] = patch
+
+
+def qr_image(cert_id, digital_hash):
+    """QR code in the format printed on the real certificates"""
+    code = cv2.QRCodeEncoder.create().encode(f"Certificate ID: {cert_id}\nDigital Hash:\n{digital_hash}")
+    return cv2.copyMakeBorder(code, 2, 2, 2, 2, cv2.BORDER_CONSTANT, value=255)
+
+
+def load_reference(path):
+    return cv2.imread(os.path.join(REPO_DIR, path))
+
+
+def layout_for(row):
+    code = INSTITUTION_NAME_TO_CODE.get(row.get("institution"))
+    if code not in INSTITUTION_CONFIG:
+        code = row.get("institution_code")
+    return code if code in INSTITUTION_CONFIG else None
+
+
+def render_certificate(row, layout, width, forgery=None, rng=None):
+    """BGR certificate image for a registry row, optionally with one forgery perturbation"""
+    rng = rng or random.Random()
+    config = INSTITUTION_CONFIG[layout]
+    image = np.full((int(width / 1.414), width, 3), 255, dtype=np.uint8)
+    height = image.shape[0]
+    cv2.rectangle(image, (width // 60, height // 60), (width - width // 60, height - height // 60), (60, 60, 140),
+                  max(2, width // 400))
+
+    name = row["name"]
+    if forgery == "name_tamper":
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+    others = [code for code in INSTITUTION_CONFIG if code != layout]
+    seal_source = INSTITUTION_CONFIG[rng.choice(others)] if forgery == "seal_swap" else config
+    signature_source = INSTITUTION_CONFIG[rng.choice(others)] if forgery == "signature_swap" else config
+    if forgery != "seal_missing":
+        paste_fitted(image, load_reference(seal_source["seal"]["reference_image"]), config["seal"]["roi"])
+    paste_fitted(image, load_reference(signature_source["signature"]["reference_image"]),
+                 config["signature"]["roi"])
+
+    digital_hash = str(row.get("digital_hash", ""))
+    if forgery == "qr_tamper":
+        digital_hash = "".join(rng.choice("0123456789abcdef") for _ in digital_hash)
+    if "qr" in config and digital_hash:
+        paste_fitted(image, qr_image(row["certificate_no"], digital_hash), config["qr"]["roi"])
+
+    # Text last, so the certificate number stays legible where the seal region overlaps it
+    text = config["text"]
+    put_text_in_box(image, f"Certificate No: {row['certificate_no']}", text["certificate_no"]["roi"])
+    put_text_in_box(image, row["institution"], text["institution"]["roi"])
+    name_roi = text["name"]["roi"]
+    phrase_height = min(0.05, (name_roi[3] - name_roi[1]) * 0.6)
+    put_text_in_box(image, "This certificate is awarded to",
+                    [name_roi[0], name_roi[1] - phrase_height, name_roi[2], name_roi[1]])
+    put_text_in_box(image, f"{name} {row.get('course', '')}".strip(), name_roi)
+    put_text_in_box(image, f"In the year {row['year']}", text["year"]["roi"])
+
+    return image
+
+
+def perturb(image, rng, noise=0.0, max_rotation=0.0):
+    """Scanner-like degradation: a small rotation and Gaussian noise"""
+    if max_rotation:
+        height, width = image.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), rng.uniform(-max_rotation, max_rotation), 1.0)
+        image = cv2.warpAffine(image, matrix, (width, height), borderValue=(255, 255, 255))
+    if noise:
+        grain = np.random.default_rng(rng.randrange(2 ** 32)).normal(0, noise, image.shape)
+        image = np.clip(image.astype(np.float32) + grain, 0, 255).astype(np.uint8)
+    return image
+
+
+def load_rows(csv_path, synthetic):
+    if synthetic:
+        return synthetic_rows(synthetic)
+    return pd.read_csv(csv_path).to_dict("records")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True, help="directory for the PNGs and manifest.jsonl")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--csv", default=DATASET_PATH, help="registry rows to render (ocr_dataset.csv layout)")
+    parser.add_argument("--synthetic", type=int, default=0, help="render N synthetic rows instead of --csv")
+    parser.add_argument("--width", type=int, default=2000, help="page width in pixels (A4 landscape aspect)")
+    parser.add_argument("--noise", type=float, default=0.0, help="Gaussian noise sigma in grey levels")
+    parser.add_argument("--max-rotation", type=float, default=0.0, help="random rotation up to this many degrees")
+    parser.add_argument("--forgery-rate", type=float, default=0.0, help="fraction of certificates to forge")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = [row for row in load_rows(args.csv, args.synthetic) if layout_for(row)]
+    os.makedirs(args.out, exist_ok=True)
+
+    with open(os.path.join(args.out, "manifest.jsonl"), "w") as manifest:
+        for i in range(args.count):
+            row = rows[i % len(rows)]
+            layout = layout_for(row)
+            forgery = rng.choice(FORGERY_KINDS) if rng.random() < args.forgery_rate else None
+            image = render_certificate(row, layout, args.width, forgery, rng)
+            image = perturb(image, rng, args.noise, args.max_rotation)
+
+            filename = f"{layout}_{i:05d}.png"
+            cv2.imwrite(os.path.join(args.out, filename), image)
+            manifest.write(json.dumps({
+                "filename": filename,
+                "certificate_no": row["certificate_no"],
+                "institution_code": layout,
+                "forgery": forgery,
+                "expected_valid": forgery is None,
+            }) + "\n")
+
+    print(f"Wrote {args.count} certificates to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Replay certificate uploads against a running verification server at a target rate.
+
+Requests are sent open-loop: request i is due at start + i / rate whatever
+happened to earlier ones, so a slow server shows up as growing latency
+rather than as a quietly lower request rate. Latency is reported both from
+the scheduled time (what a client would see) and from the actual send.
+Run from backend/ against a server that is already up:
+
+    python benchmarks/load_driver.py --target fastapi --images /tmp/certs --rate 20 --duration 60
+    python benchmarks/load_driver.py --url http://localhost:5000/api/verify-certificate --rate 5 --json
+"""
+import argparse
+import glob
+import json
+import mimetypes
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TARGETS = {
+    "fastapi": "http://localhost:8000/api/verify-certificate",
+    "flask": "http://localhost:5000/api/verify-certificate",
+    "main": "http://localhost:8000/verify",
+}
+
+
+def multipart_body(filename, contents):
+    """multipart/form-data body with a single "file" field, as the upload endpoints expect"""
+    boundary = uuid.uuid4().hex
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: {content_type}\r\n\r\n").encode()
+    return head + contents + f"\r\n--{boundary}--\r\n".encode(), f"multipart/form-data; boundary={boundary}"
+
+
+def send(url, filename, contents, timeout):
+    """POST one certificate; returns (outcome, http status) where outcome is ok, rejected or error"""
+    body, content_type = multipart_body(filename, contents)
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type}, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = json.loads(response.read() or b"{}")
+            # api.py reports pipeline failures as 200 with success: false
+            return ("ok" if payload.get("success", True) else "error"), response.status
+    except urllib.error.HTTPError as e:
+        return ("rejected" if e.code == 503 else "error"), e.code
+    except (urllib.error.URLError, TimeoutError, OSError, ValueError):
+        return "error", None
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))], 2)
+
+
+def latency_summary(values_ms):
+    values = sorted(values_ms)
+    return {
+        "p50_ms": percentile(values, 0.50),
+        "p90_ms": percentile(values, 0.90),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "max_ms": round(values[-1], 2) if values else None,
+    }
+
+
+def run_load(url, images, rate, duration, concurrency, timeout):
+    total = int(rate * duration)
+    results = []
+    lock = threading.Lock()
+
+    def fire(index, due):
+        filename, contents = images[index % len(images)]
+        sent = time.perf_counter()
+        outcome, status = send(url, filename, contents, timeout)
+        done = time.perf_counter()
+        with lock:
+            results.append({"outcome": outcome, "status": status,
+                            "latency_ms": (done - due) * 1000, "service_ms": (done - sent) * 1000})
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for index in range(total):
+            due = start + index / rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, index, due)
+    elapsed = time.perf_counter() - start
+
+    counts = {outcome: sum(1 for r in results if r["outcome"] == outcome) for outcome in ("ok", "rejected", "error")}
+    statuses = {}
+    for r in results:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+    ok = [r for r in results if r["outcome"] == "ok"]
+    return {
+        "url": url,
+        "target_rate": rate,
+        "requests": len(results),
+        "elapsed_s": round(elapsed, 2),
+        "achieved_rate": round(len(results) / elapsed, 2) if elapsed else None,
+        "ok": counts["ok"],
+        "rejected": counts["rejected"],
+        "errors": counts["error"],
+        "error_rate": round(counts["error"] / len(results), 4) if results else 0.0,
+        "rejection_rate": round(counts["rejected"] / len(results), 4) if results else 0.0,
+        "status_codes": statuses,
+        "latency": latency_summary([r["latency_ms"] for r in ok]),
+        "service_time": latency_summary([r["service_ms"] for r in ok]),
+    }
+
+
+def load_images(directory):
+    paths = [path for path in sorted(glob.glob(os.path.join(directory, "*")))
+             if path.lower().endswith((".png", ".jpg", ".jpeg", ".tiff"))]
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append((os.path.basename(path), f.read()))
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=sorted(TARGETS), default="fastapi")
+    parser.add_argument("--url", help="endpoint URL, overrides --target")
+    parser.add_argument("--images", default=os.path.join(REPO_DIR, "datasets", "certificates"),
+                        help="directory of certificate images (e.g. from generate_certificates.py)")
+    parser.add_argument("--rate", type=float, default=5.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--concurrency", type=int, default=64, help="most requests in flight at once")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    if not images:
+        sys.exit(f"No certificate images found in {args.images}")
+
+    report = run_load(args.url or TARGETS[args.target], images, args.rate, args.duration, args.concurrency,
+                      args.timeout)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['requests']} requests to {report['url']} in {report['elapsed_s']}s "
+          f"({report['achieved_rate']}/s, target {report['target_rate']}/s)")
+    print(f"ok {report['ok']}  rejected {report['rejected']} ({report['rejection_rate']:.1%})  "
+          f"errors {report['errors']} ({report['error_rate']:.1%})  status codes {report['status_codes']}")
+    for label, key in (("latency", "latency"), ("service time", "service_time")):
+        summary = report[key]
+        print(f"{label:>12}: " + "  ".join(f"{name[:-3]} {value}ms" for name, value in summary.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Synthetic registry rows and OCR-like queries for benchmarks and load tests"""
+import hashlib
+import random
+
+from app.config import INSTITUTION_NAME_TO_CODE
+
+FIRST_NAMES = ["Rajesh", "Priya", "Amit", "Sneha", "Vikram", "Anjali", "Rahul", "Pooja", "Arun", "Neha",
+               "Deepak", "Kavita", "Sanjay", "Ritu", "Manoj", "Sunita", "Rohit", "Anita", "Suresh", "Meena"]
+LAST_NAMES = ["Kumar", "Sharma", "Verma", "Singh", "Gupta", "Das", "Yadav", "Oraon", "Munda", "Mahato",
+              "Prasad", "Sinha", "Mishra", "Tirkey", "Ekka", "Soren", "Hembrom", "Pandey", "Jha", "Roy"]
+COURSES = ["B.Tech CSE", "B.Sc Physics", "BBA", "MBA", "BA History", "M.Sc Chemistry", "B.Com", "Diploma Civil"]
+GRADES = ["A+", "A", "B+", "B", "C"]
+
+
+def synthetic_rows(count, seed=7, institutions=None):
+    """count registry rows in the ocr_dataset.csv layout, with unique certificate numbers"""
+    rng = random.Random(seed)
+    institutions = list(institutions or INSTITUTION_NAME_TO_CODE.items())
+    rows = []
+    for i in range(count):
+        year = rng.randint(2005, 2024)
+        institution, code = rng.choice(institutions)
+        row = {
+            "certificate_no": f"JH-UNI-{year}-{i:07d}",
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "dob": f"{year - rng.randint(20, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "course": rng.choice(COURSES),
+            "year": year,
+            "grade": rng.choice(GRADES),
+            "institution": institution,
+            "issued_on": f"{year}-{rng.randint(6, 9):02d}-{rng.randint(1, 28):02d}",
+            "certificate_type": "Degree",
+            "institution_code": code,
+            "status": "valid",
+        }
+        row["digital_hash"] = hashlib.sha256("|".join(str(value) for value in row.values()).encode()).hexdigest()
+        rows.append(row)
+    return rows
+
+
+def garble(text, rng, edits=2):
+    """Simulate OCR noise with random substitutions, insertions and deletions"""
+    chars = list(text)
+    for _ in range(edits):
+        pos = rng.randrange(len(chars) + 1)
+        op = rng.choice(["sub", "ins", "del", "space"])
+        if op == "sub" and pos < len(chars):
+            chars[pos] = rng.choice("0O1lI5S8B-_ ")
+        elif op == "ins":
+            chars.insert(pos, rng.choice("abcdeilo0 "))
+        elif op == "del" and pos < len(chars):
+            del chars[pos]
+        else:
+            chars.insert(pos, " ")
+    return "".join(chars)
+
+
+def ocr_queries(rows, count, seed=7):
+    """Extracted-info dicts for random rows, with the kind of noise OCR leaves behind"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        row = rows[rng.randrange(len(rows))]
+        queries.append({
+            "certificate_no": garble(str(row["certificate_no"]), rng, rng.randrange(3)),
+            "name": garble(str(row["name"]), rng, rng.randrange(3)),
+            "institution": garble(str(row["institution"]), rng, rng.randrange(2)),
+            "year": str(row["year"]),
+        })
+    return queries
@@ -0,0 +1,76 @@
+# test_alignment
+import sys
+import os
+import random
+import cv2
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import alignment
+from app.alignment import align_page
+from benchmarks.generate_certificates import DATASET_PATH, layout_for, render_certificate
+
+
+def certificate():
+    row = pd.read_csv(DATASET_PATH).to_dict("records")[0]
+    return render_certificate(row, layout_for(row), 1600, rng=random.Random(0))
+
+
+def difference(image, page):
+    """Mean absolute pixel difference between image (resized to the page) and the page"""
+    height, width = page.shape[:2]
+    return np.abs(cv2.resize(image, (width, height)).astype(np.int16) - page).mean()
+
+
+def test_upright_page_is_left_alone():
+    page = certificate()
+    aligned, page_alignment = align_page(page)
+    assert aligned is page and page_alignment.is_identity
+    assert page_alignment.as_dict() == {"method": "none", "angle": 0.0}
+
+
+def test_skewed_scan_is_rotated_back():
+    page = certificate()
+    height, width = page.shape[:2]
+    rotation = cv2.getRotationMatrix2D((width / 2, height / 2), 3, 1.0)
+    skewed = cv2.warpAffine(page, rotation, (width, height), borderMode=cv2.BORDER_REPLICATE)
+
+    aligned, page_alignment = align_page(skewed)
+    assert page_alignment.method == "deskew" and abs(page_alignment.angle + 3) <= 0.2
+    assert aligned.shape == page.shape
+    assert difference(aligned, page) < difference(skewed, page) / 3
+
+
+def test_photographed_page_is_warped_to_its_outline():
+    page = certificate()
+    height, width = page.shape[:2]
+    frame = np.full((int(height * 1.5), int(width * 1.4), 3), (40, 60, 50), dtype=np.uint8)
+    corners = np.float32([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]])
+    photographed = np.float32([[200, 150], [width + 150, 230], [width + 220, height + 180], [160, height + 120]])
+    photo = cv2.warpPerspective(page, cv2.getPerspectiveTransform(corners, photographed),
+                                (frame.shape[1], frame.shape[0]), dst=frame, borderMode=cv2.BORDER_TRANSPARENT)
+
+    aligned, page_alignment = align_page(photo)
+    assert page_alignment.method == "page"
+    # Background is cropped away and the page comes back upright
+    assert difference(aligned, page) < difference(photo, page) / 3
+
+
+def test_alignment_can_be_switched_off():
+    page = certificate()
+    skewed = cv2.warpAffine(page, cv2.getRotationMatrix2D((800, 560), 3, 1.0), page.shape[1::-1])
+    alignment.PAGE_ALIGNMENT = False
+    try:
+        aligned, page_alignment = align_page(skewed)
+    finally:
+        alignment.PAGE_ALIGNMENT = True
+    assert aligned is skewed and page_alignment.method == "none"
+
+
+if __name__ == "__main__":
+    test_upright_page_is_left_alone()
+    test_skewed_scan_is_rotated_back()
+    test_photographed_page_is_warped_to_its_outline()
+    test_alignment_can_be_switched_off()
+    print("✅ Uploads are aligned to the upright page once")
@@ -0,0 +1,87 @@
+# test_batch
+import sys
+import os
+import io
+import json
+import zipfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import batch
+from app.batch import iter_batch_items, stream_batch
+
+
+def archive(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def measure(filename, data):
+    """Batch worker stand-in; runs in the process pool, so it lives at module level"""
+    return {'success': True, 'bytes': len(data)}
+
+
+def test_uploads_and_zip_members_are_checked_against_type_and_size():
+    limit = batch.MAX_FILE_SIZE
+    batch.MAX_FILE_SIZE = 100
+    try:
+        uploads = [
+            ("scan.png", io.BytesIO(b"x" * 10)),
+            ("huge.jpg", io.BytesIO(b"x" * 101)),
+            ("letter.pdf", io.BytesIO(b"x")),
+            ("broken.zip", io.BytesIO(b"not a zip")),
+            ("certificates.zip", archive({
+                "a.jpeg": b"y" * 20,
+                "notes.txt": b"y",
+                "big.tiff": b"y" * 101,
+                "folder/": b"",
+                "__MACOSX/._a.jpeg": b"y",
+            })),
+        ]
+        items = [(filename, len(data) if data else None, error) for filename, data, error in iter_batch_items(uploads)]
+    finally:
+        batch.MAX_FILE_SIZE = limit
+
+    assert items[0] == ("scan.png", 10, None)
+    assert items[1] == ("huge.jpg", None, "File too large: huge.jpg")
+    assert items[2] == ("letter.pdf", None, "Invalid file type")
+    assert items[3][0] == "broken.zip" and items[3][2].startswith("Invalid zip archive")
+    # Directories and macOS metadata are skipped; every other member is reported
+    assert items[4:] == [("a.jpeg", 20, None), ("notes.txt", None, "Invalid file type"),
+                         ("big.tiff", None, "File too large: big.tiff")]
+
+
+def test_stream_yields_one_line_per_certificate_with_bounded_reads():
+    pulled = []
+
+    def items():
+        for index in range(12):
+            pulled.append(index)
+            if index % 4 == 3:
+                yield f"{index}.png", None, "Invalid file type"
+            else:
+                yield f"{index}.png", b"z" * (index + 1), None
+
+    lines = []
+    for line in stream_batch(items(), measure, max_in_flight=2):
+        lines.append(json.loads(line))
+        # Whatever was read and not yet answered is in the pool, never more than max_in_flight
+        assert len(pulled) <= len(lines) + 2
+
+    assert sorted(line["index"] for line in lines) == list(range(12))
+    for line in lines:
+        assert line["filename"] == f"{line['index']}.png"
+        if line["index"] % 4 == 3:
+            assert line == {"index": line["index"], "filename": line["filename"], "success": False,
+                            "error": "Invalid file type"}
+        else:
+            assert line["success"] and line["bytes"] == line["index"] + 1
+
+
+if __name__ == "__main__":
+    test_uploads_and_zip_members_are_checked_against_type_and_size()
+    test_stream_yields_one_line_per_certificate_with_bounded_reads()
+    print("✅ Batch items are validated and streamed as NDJSON with bounded memory")
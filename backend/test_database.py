@@ -0,0 +1,126 @@
+# test_database
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SELECT_CERTIFICATE_BY_HASH, ConnectionPool, get_pool, init_database, sync_institutions
+from app.institutions import institutions
+from app.registry_store import current_version, ingest_csv
+
+HEADER = "certificate_no,name,dob,course,year,grade,institution,issued_on,certificate_type,institution_code,status,digital_hash\n"
+
+
+def test_pool_keeps_one_wal_connection_per_thread():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "pool.db")
+        assert get_pool(path) is get_pool(os.path.join(directory, ".", "pool.db"))
+        pool = ConnectionPool(path)
+        conn = pool.connection()
+        assert pool.connection() is conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+        others = []
+        thread = threading.Thread(target=lambda: others.append(pool.connection()))
+        thread.start()
+        thread.join()
+        assert others[0] is not conn and len(pool._connections) == 2
+
+        pool.release()
+        assert len(pool._connections) == 1 and pool.connection() is not conn
+        pool.close_all()
+        assert pool._connections == []
+
+
+def test_schema_enforces_unique_certificates_and_indexes_the_hash_probe():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "schema.db")
+        init_database(path)
+        # Running it again on an existing database is harmless
+        init_database(path)
+        conn = get_pool(path).connection()
+
+        conn.execute("INSERT INTO certificates (cert_id, digital_hash) VALUES ('RTI-001', 'abc')")
+        try:
+            conn.execute("INSERT INTO certificates (cert_id, digital_hash) VALUES ('RTI-001', 'def')")
+        except sqlite3.IntegrityError:
+            pass
+        else:
+            raise AssertionError("duplicate cert_id was accepted")
+        conn.rollback()
+
+        columns = [row["name"] for row in conn.execute("PRAGMA index_info(idx_certificates_cert_hash)")]
+        assert columns == ["cert_id", "digital_hash"]
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + SELECT_CERTIFICATE_BY_HASH, ("a", "b")))
+        assert "USING INDEX" in plan and "SCAN" not in plan
+        get_pool(path).close_all()
+
+
+def test_old_certificates_table_gets_the_version_column():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "old.db")
+        conn = get_pool(path).connection()
+        conn.execute("CREATE TABLE certificates (id INTEGER PRIMARY KEY AUTOINCREMENT, cert_id TEXT NOT NULL UNIQUE, "
+                     "status TEXT, digital_hash TEXT NOT NULL DEFAULT '')")
+        conn.execute("INSERT INTO certificates (cert_id) VALUES ('RTI-001')")
+        conn.commit()
+
+        init_database(path)
+        assert conn.execute("SELECT version FROM certificates WHERE cert_id = 'RTI-001'").fetchone()[0] == 0
+        get_pool(path).close_all()
+
+
+def test_each_ingest_records_a_registry_version():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "registry.db")
+        csv_path = os.path.join(directory, "registry.csv")
+        with open(csv_path, "w") as f:
+            f.write(HEADER + "RTI-001,Asha,2000-01-01,B.Tech,2019,A,Ranchi Tech Institute,2019-06-01,degree,RTI,valid,\n")
+        conn = get_pool(path).connection()
+        init_database(path)
+        assert current_version(conn) == 0
+
+        assert ingest_csv(csv_path, database_path=path) == (1, 1, 1)
+        assert ingest_csv(csv_path, database_path=path) == (2, 1, 0)
+        versions = [tuple(row) for row in conn.execute(
+            "SELECT version, source, rows_read, rows_changed, completed_at IS NOT NULL FROM registry_versions")]
+        assert versions == [(1, csv_path, 1, 1, 1), (2, csv_path, 1, 0, 1)]
+        assert current_version(conn) == 2
+
+        # A version still being published is not current
+        conn.execute("INSERT INTO registry_versions (source) VALUES ('in progress')")
+        conn.commit()
+        assert current_version(conn) == 2
+        get_pool(path).close_all()
+
+
+def test_institutions_table_mirrors_the_institutions_file():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "institutions.db")
+        init_database(path)
+        conn = get_pool(path).connection()
+        bundles = institutions.current().bundles
+        rows = {row["code"]: row for row in conn.execute("SELECT * FROM institutions")}
+        assert sorted(rows) == sorted(bundles)
+        assert rows["JHAR"]["name"] == bundles["JHAR"].name
+        assert rows["JHAR"]["seal_image_path"] == bundles["JHAR"].config["seal"]["reference_image"]
+
+        conn.execute("UPDATE institutions SET name = 'Renamed' WHERE code = 'JHAR'")
+        conn.execute("INSERT INTO institutions (code, name, seal_image_path, signature_image_path) "
+                     "VALUES ('GONE', 'Removed', 'seal.png', 'signature.png')")
+        sync_institutions(conn.cursor())
+        conn.commit()
+        rows = {row["code"]: row["name"] for row in conn.execute("SELECT code, name FROM institutions")}
+        assert sorted(rows) == sorted(bundles) and rows["JHAR"] == bundles["JHAR"].name
+        get_pool(path).close_all()
+
+
+if __name__ == "__main__":
+    test_pool_keeps_one_wal_connection_per_thread()
+    test_schema_enforces_unique_certificates_and_indexes_the_hash_probe()
+    test_old_certificates_table_gets_the_version_column()
+    test_each_ingest_records_a_registry_version()
+    test_institutions_table_mirrors_the_institutions_file()
+    print("✅ Database pool, schema, registry versions and institutions table work")
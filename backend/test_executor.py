@@ -0,0 +1,60 @@
+# test_executor
+import sys
+import os
+import asyncio
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from app import api
+from app.executor import BoundedExecutor, WorkerPoolFull
+
+
+def test_requests_beyond_workers_and_queue_are_rejected():
+    pool = BoundedExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        admitted = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool.stats()["running"] == 1 and pool.stats()["queue_depth"] == 1
+        try:
+            await pool.run(release.wait)
+        except WorkerPoolFull as e:
+            assert e.retry_after >= 1
+        else:
+            raise AssertionError("third job was admitted")
+
+        release.set()
+        assert await asyncio.gather(*admitted) == [True, True]
+        # Slots free up as jobs finish
+        assert await pool.run(sum, [1, 2]) == 3
+
+    asyncio.run(scenario())
+    stats = pool.stats()
+    assert stats["submitted"] == 3 and stats["completed"] == 3 and stats["rejected"] == 1
+    assert stats["queue_depth"] == 0 and stats["running"] == 0
+
+
+def test_full_pool_answers_503_with_retry_after():
+    full = BoundedExecutor(max_workers=1, max_queue=0)
+    # One certificate running, none queued: a slot is expected within one average run
+    full.in_flight = full.running = full.capacity
+    pool, cache_enabled = api.verification_pool, api.VERDICT_CACHE
+    api.verification_pool, api.VERDICT_CACHE = full, False
+    try:
+        response = TestClient(api.app).post("/api/verify-certificate",
+                                            files={"file": ("certificate.png", b"not an image", "image/png")})
+    finally:
+        api.verification_pool, api.VERDICT_CACHE = pool, cache_enabled
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["success"] is False and full.rejected == 1
+
+
+if __name__ == "__main__":
+    test_requests_beyond_workers_and_queue_are_rejected()
+    test_full_pool_answers_503_with_retry_after()
+    print("✅ Verification pool admits workers + queue jobs and turns the rest away")
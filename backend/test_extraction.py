@@ -0,0 +1,95 @@
+# test_extraction
+import sys
+import os
+import random
+import re
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.extraction import clean_name, engine
+
+INSTITUTIONS = ['Ranchi Tech Institute', 'Jharkhand State University', 'Jharkhand Business School']
+
+
+def regex_extract(text):
+    """Fields as the per-pattern regexes read them before the engine replaced them"""
+    info = {}
+    for pattern in [r'(JH[-_ ]?UNI[-_ ]?\d{4}[-_ ]?\d+)', r'Cert(?:ificate)?\s*No[:\-\s]*([A-Z0-9\-]+)']:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            if 'JH' in pattern:
+                info["certificate_no"] = re.sub(r'[\s\-_]+', '-', match.group(1)).upper()
+            else:
+                info["certificate_no"] = match.group(1).strip()
+            break
+    info.setdefault("certificate_no", "-")
+
+    for institution in INSTITUTIONS:
+        if re.search(institution, text, re.IGNORECASE):
+            info["institution"] = institution
+            break
+
+    match = re.search(r'(?:awarded to|is given to|THIS CERTIFICATE IS GIVEN TO)\s*\n?([A-Za-z\s]+)', text,
+                      re.IGNORECASE)
+    if match:
+        raw_name = re.sub(r'\s+', ' ', match.group(1)).strip()
+        for course_pattern in [r'(BBA|M\.?Sc\s+[A-Za-z]+|BA\s+[A-Za-z]+)', r'(Bachelor.*|Master.*|Diploma.*)']:
+            course_match = re.search(course_pattern, raw_name, re.IGNORECASE)
+            if course_match:
+                info["course"] = course_match.group(1).strip()
+                raw_name = raw_name.replace(info["course"], "").strip()
+                break
+        info["name"] = clean_name(raw_name)
+
+    match = re.search(r'\b(19|20)\d{2}\b', text.replace(info["certificate_no"], ""))
+    if match:
+        info["year"] = match.group(0)
+    return info
+
+
+def ocr_text(rng, number):
+    """OCR-like certificate text with the spellings and orderings seen in scans"""
+    year = rng.randint(1995, 2024)
+    institution = rng.choice(INSTITUTIONS)
+    cert_no = rng.choice([f"Certificate No: RTI-{year}-{number:03d}", f"Cert No - JSU{year}{number}",
+                          f"JH-UNI-{year}-{number:03d}", f"Certificate No: JH UNI {year} {number}",
+                          f"jh_uni_{year}_{number}", f"Cert No:-JH-UNI-{year}-{number}", ""])
+    intro = rng.choice(["This certificate is awarded to", "THIS CERTIFICATE IS GIVEN TO", "is given to", ""])
+    awardee = f"{rng.choice(['Rahul Sharma', 'Anita Kumari', 'Priya Das'])} " \
+              f"{rng.choice(['BBA', 'BA History', 'MSc Physics', 'Bachelor of Commerce', ''])}"
+    lines = [rng.choice([institution, institution.upper()]), cert_no, intro, awardee,
+             f"For completing the program in the year {year}.", "Registrar   Controller of Examinations"]
+    if rng.random() < 0.5:
+        lines[1:3] = lines[2:0:-1]
+    return "\n".join(lines)
+
+
+def test_engine_reads_what_the_regexes_read():
+    rng = random.Random(9)
+    for number in range(2000):
+        text = ocr_text(rng, number)
+        assert engine.extract(text) == regex_extract(text), text
+
+
+def test_university_ids_after_a_label():
+    text = "JHARKHAND STATE UNIVERSITY\nCertificate No: JH UNI 2019 001\nawarded to\nRahul Sharma BBA\n2019"
+    info = engine.extract(text)
+    assert info["certificate_no"] == "JH-UNI-2019-001" and info["year"] == "2019"
+    assert engine.extract("Cert No:-jh_uni_2020_7 issued 2020")["certificate_no"] == "JH-UNI-2020-7"
+
+
+def test_institutions_beyond_the_regexes():
+    # OCR that runs the words together, and configured aliases, still name the institution
+    assert engine.find_institution("JharkhandStateUniversity\nCert No: JSU-2018-77") == "Jharkhand State University"
+    assert engine.find_institution("Issued by RTI, Ranchi") == "Ranchi Tech Institute"
+    # An alias inside a longer word is not a match
+    assert engine.find_institution("Certificate of merit") is None
+    # The institution printed first wins, whatever the configured order
+    text = "Jharkhand Business School, affiliated to Jharkhand State University"
+    assert engine.find_institution(text) == "Jharkhand Business School"
+
+
+if __name__ == "__main__":
+    test_engine_reads_what_the_regexes_read()
+    test_university_ids_after_a_label()
+    test_institutions_beyond_the_regexes()
+    print("✅ Extraction engine matches the per-pattern regexes")
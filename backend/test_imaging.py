@@ -0,0 +1,79 @@
+# test_imaging
+import sys
+import os
+from collections import Counter
+import cv2
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import imaging
+from app.imaging import CertificateImage, as_certificate_image, crop_roi
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_certificates", "JSU_007.png")
+ROI = [0.745, 0.047, 0.933, 0.263]
+
+
+class CountingCv2:
+    """cv2 stand-in that counts the conversions CertificateImage asks for"""
+
+    def __init__(self):
+        self.calls = Counter()
+
+    def __getattr__(self, name):
+        function = getattr(cv2, name)
+        if not callable(function):
+            return function
+
+        def counted(*args, **kwargs):
+            self.calls[name] += 1
+            return function(*args, **kwargs)
+        return counted
+
+
+def test_views_are_computed_once():
+    counting = CountingCv2()
+    imaging.cv2 = counting
+    try:
+        image = CertificateImage(cv2.imread(SAMPLE))
+        for _ in range(3):
+            image.gray, image.rgb, image.binary, image.pyramid(2)
+            image.crop(ROI, "gray"), image.crop(ROI, "binary")
+    finally:
+        imaging.cv2 = cv2
+
+    # gray and rgb are one cvtColor each; binary and the pyramid reuse gray
+    assert counting.calls == {"cvtColor": 2, "threshold": 1, "pyrDown": 2}
+    assert image.gray is image.gray and image.pyramid(1) is image.pyramid(1)
+    assert image.crop(ROI, "gray") is image.crop(ROI, "gray")
+
+
+def test_views_equal_a_fresh_conversion():
+    bgr = cv2.imread(SAMPLE)
+    image = CertificateImage(bgr)
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+
+    assert np.array_equal(image.gray, gray)
+    assert np.array_equal(image.rgb, cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+    assert np.array_equal(image.binary, cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1])
+    assert np.array_equal(image.pyramid(2), cv2.pyrDown(cv2.pyrDown(gray)))
+    assert image.pyramid(0) is image.gray
+
+    # Crops are slices of the full-page view, not copies
+    crop = image.crop(ROI, "gray")
+    assert np.array_equal(crop, crop_roi(gray, ROI)) and np.shares_memory(crop, image.gray)
+    assert np.array_equal(image.crop(ROI), crop_roi(bgr, ROI)) and np.shares_memory(image.crop(ROI), bgr)
+
+
+def test_grayscale_pages_and_existing_wrappers_pass_through():
+    gray = cv2.imread(SAMPLE, cv2.IMREAD_GRAYSCALE)
+    image = CertificateImage(gray)
+    assert image.gray is gray and image.rgb is gray
+    assert as_certificate_image(image) is image
+    assert as_certificate_image(gray).bgr is gray
+
+
+if __name__ == "__main__":
+    test_views_are_computed_once()
+    test_views_equal_a_fresh_conversion()
+    test_grayscale_pages_and_existing_wrappers_pass_through()
+    print("✅ CertificateImage views are computed once and match fresh conversions")
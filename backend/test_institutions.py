@@ -0,0 +1,116 @@
+# test_institutions
+import sys
+import os
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.institutions import BASE_DIR, INSTITUTIONS_FILE, InstitutionRegistry, InstitutionView
+
+
+def copy_institutions(directory):
+    """The bundled institutions file and its reference images, under a temporary repository root"""
+    for folder in ("seals", "signatures"):
+        shutil.copytree(os.path.join(BASE_DIR, "backend", "assets", folder),
+                        os.path.join(directory, "backend", "assets", folder))
+    path = os.path.join(directory, "institutions.yaml")
+    shutil.copy(INSTITUTIONS_FILE, path)
+    return path
+
+
+def rewrite(path, old, new):
+    with open(path) as f:
+        text = f.read()
+    assert old in text
+    with open(path, "w") as f:
+        f.write(text.replace(old, new))
+    # Some filesystems keep coarse mtimes; make sure the edit is seen as one
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def wait_for_reload(registry):
+    for _ in range(500):
+        if not registry._reloading:
+            return
+        time.sleep(0.01)
+    raise AssertionError("reload did not finish")
+
+
+def test_edit_swaps_in_a_new_snapshot_and_keeps_unchanged_bundles():
+    with tempfile.TemporaryDirectory() as directory:
+        path = copy_institutions(directory)
+        registry = InstitutionRegistry(path, refresh_seconds=3600, base_dir=directory)
+        swapped = []
+        registry.subscribe(swapped.append)
+        mapping = InstitutionView(registry, "ocr_mapping")
+        before = registry.current()
+        assert "ranchi tech" not in mapping
+
+        rewrite(path, "aliases: [rti]", "aliases: [rti, ranchi tech]")
+        after = registry.reload()
+        assert after is not before and registry.current() is after and swapped == [after]
+        assert after.version != before.version and registry.stats()["reloads"] == 1
+        # Only the edited institution is rebuilt; the snapshot a request already holds is untouched
+        assert after.get("RANC") is not before.get("RANC") and after.get("JHAR") is before.get("JHAR")
+        assert "ranchi tech" not in before.ocr_mapping
+        assert mapping["ranchi tech"] == "Ranchi Tech Institute"
+        assert after.matcher.find("issued by ranchi tech") == "Ranchi Tech Institute"
+
+        # Nothing changed since: no new snapshot
+        assert registry.reload() is after and swapped == [after]
+
+
+def test_reference_image_change_rebuilds_its_institution():
+    with tempfile.TemporaryDirectory() as directory:
+        path = copy_institutions(directory)
+        registry = InstitutionRegistry(path, refresh_seconds=3600, base_dir=directory)
+        before = registry.current()
+        seal = before.get("JHAR").seal_path
+        with open(seal, "ab") as f:
+            f.write(b"\0")
+
+        after = registry.reload()
+        assert after.get("JHAR") is not before.get("JHAR") and after.get("RANC") is before.get("RANC")
+        assert after.get("JHAR").digests[seal] != before.get("JHAR").digests[seal]
+
+
+def test_failed_file_keeps_the_loaded_institutions():
+    with tempfile.TemporaryDirectory() as directory:
+        path = copy_institutions(directory)
+        registry = InstitutionRegistry(path, refresh_seconds=3600, base_dir=directory)
+        loaded = registry.current()
+
+        # A file caught halfway through being rewritten
+        with open(path, "w") as f:
+            f.write("institutions:\n")
+        try:
+            registry.reload()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("an empty institutions file was loaded")
+        assert registry.current() is loaded
+        # The same broken file is not loaded (or reported) again
+        assert registry.reload() is loaded
+
+        # Background reloads report the error and keep serving the loaded snapshot
+        rewrite(path, "institutions:\n", "institutions:\n  RANC: {aliases: [rti]}\n")
+        registry.refresh_seconds = 0
+        assert registry.current() is loaded
+        wait_for_reload(registry)
+        registry.refresh_seconds = 3600
+        assert registry.current() is loaded
+        assert registry.stats()["errors"] == 1 and "has no name" in registry.stats()["last_error"]
+
+        # Once the file is fixed it is picked up again
+        shutil.copy(INSTITUTIONS_FILE, path)
+        assert registry.reload().version == loaded.version
+
+
+if __name__ == "__main__":
+    test_edit_swaps_in_a_new_snapshot_and_keeps_unchanged_bundles()
+    test_reference_image_change_rebuilds_its_institution()
+    test_failed_file_keeps_the_loaded_institutions()
+    print("✅ Institutions reload atomically and survive a broken file")
@@ -0,0 +1,112 @@
+# test_metrics
+import sys
+import os
+import asyncio
+import re
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.executor import BoundedExecutor
+from app.metrics import Histogram, StageTimer, expose_metrics, format_labels, request_seconds, stage_seconds
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_certificates", "JSU_007.png")
+
+
+def samples(text):
+    """{'name{labels}': value} for every sample line of an exposition"""
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+            for line in text.splitlines() if line and not line.startswith("#")}
+
+
+def test_histogram_buckets_are_cumulative_with_sum_and_count():
+    histogram = Histogram("test_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, stage="ocr")
+    histogram.observe(0.2, stage="seal")
+
+    lines = histogram.expose().splitlines()
+    assert lines[:2] == ["# HELP test_seconds Test.", "# TYPE test_seconds histogram"]
+    values = samples(histogram.expose())
+    assert values['test_seconds_bucket{stage="ocr",le="0.1"}'] == 1
+    assert values['test_seconds_bucket{stage="ocr",le="1.0"}'] == 3
+    assert values['test_seconds_bucket{stage="ocr",le="+Inf"}'] == 4
+    assert values['test_seconds_sum{stage="ocr"}'] == 4.05 and values['test_seconds_count{stage="ocr"}'] == 4
+    assert values['test_seconds_bucket{stage="seal",le="0.1"}'] == 0
+    assert values['test_seconds_count{stage="seal"}'] == 1
+
+    unlabelled = Histogram("test_wait_seconds", "Test.", (), buckets=(1.0,))
+    unlabelled.observe(0.5)
+    assert samples(unlabelled.expose()) == {'test_wait_seconds_bucket{le="1.0"}': 1,
+                                            'test_wait_seconds_bucket{le="+Inf"}': 1,
+                                            'test_wait_seconds_sum': 0.5, 'test_wait_seconds_count': 1}
+
+
+def test_label_values_are_escaped():
+    assert format_labels([("institution", 'A "B"\\C\nD')]) == 'institution="A \\"B\\"\\\\C\\nD"'
+    histogram = Histogram("test_seconds", "Test.", ("institution",), buckets=(1.0,))
+    histogram.observe(0.5, institution='say "hi"\n')
+    assert 'test_seconds_count{institution="say \\"hi\\"\\n"} 1' in histogram.expose().splitlines()
+
+
+def test_stage_timer_records_every_stage_under_the_institution():
+    timer = StageTimer()
+    with timer.stage("ocr"):
+        pass
+    with timer.stage("ocr"):
+        pass
+    with timer.stage("seal"):
+        pass
+    timer.set_institution(None)
+    assert timer.institution == "unknown"
+    timer.set_institution("TEST_TIMER")
+    before = samples(expose_metrics())
+    timer.observe("/test")
+
+    after = samples(stage_seconds.expose() + "\n" + request_seconds.expose())
+    for stage in ("ocr", "seal"):
+        key = f'verification_stage_seconds_count{{stage="{stage}",institution="TEST_TIMER"}}'
+        assert after[key] == before.get(key, 0) + 1
+    key = 'verification_request_seconds_count{endpoint="/test",institution="TEST_TIMER"}'
+    assert after[key] == before.get(key, 0) + 1
+
+    header = timer.timing_headers()
+    assert header["Timing-Allow-Origin"] == "*"
+    entries = header["Server-Timing"].split(", ")
+    assert [entry.split(";")[0] for entry in entries] == ["ocr", "seal", "total"]
+    assert all(re.fullmatch(r"\w+;dur=\d+\.\d", entry) for entry in entries)
+
+
+def test_verify_response_carries_server_timing_and_metrics_include_the_pool():
+    client = TestClient(main.app)
+    with open(SAMPLE, "rb") as f:
+        response = client.post("/verify", files={"file": ("JSU_007.png", f, "image/png")})
+    assert response.status_code == 200
+    stages = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+    assert stages[:3] == ["decode", "align", "seal_id"] and stages[-1] == "total"
+
+    metrics = client.get("/metrics")
+    values = samples(metrics.text)
+    assert values['verification_request_seconds_count{endpoint="/verify",institution="JHAR"}'] >= 1
+    assert values["verification_pool_queue_depth"] == 0 and values["verification_pool_completed_total"] >= 1
+    assert values['verification_pool_wait_seconds_bucket{le="+Inf"}'] == values["verification_pool_wait_seconds_count"]
+
+
+def test_pool_exposes_queue_depth_and_waits():
+    pool = BoundedExecutor(max_workers=1, max_queue=2)
+    asyncio.run(pool.run(sum, [1, 2]))
+    values = samples(pool.expose())
+    assert values["verification_pool_workers"] == 1 and values["verification_pool_queue_capacity"] == 2
+    assert values["verification_pool_queue_depth"] == 0 and values["verification_pool_running"] == 0
+    assert values["verification_pool_completed_total"] == 1 and values["verification_pool_rejected_total"] == 0
+    assert values["verification_pool_wait_seconds_count"] == 1
+
+
+if __name__ == "__main__":
+    test_histogram_buckets_are_cumulative_with_sum_and_count()
+    test_label_values_are_escaped()
+    test_stage_timer_records_every_stage_under_the_institution()
+    test_verify_response_carries_server_timing_and_metrics_include_the_pool()
+    test_pool_exposes_queue_depth_and_waits()
+    print("✅ Metrics are exposed in the Prometheus text format with Server-Timing headers")
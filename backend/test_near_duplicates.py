@@ -0,0 +1,122 @@
+# test_near_duplicates
+import sys
+import os
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.near_duplicates import IndexServer, NearDuplicateIndex, fingerprint
+from benchmarks.generate_certificates import DATASET_PATH, layout_for, render_certificate
+
+VERSION = (1, "layouts")
+
+
+def certificate(index):
+    """A rendered certificate of a registry row, and its layout"""
+    row = pd.read_csv(DATASET_PATH).to_dict("records")[index]
+    layout = layout_for(row)
+    return render_certificate(row, layout, 1600, rng=random.Random(index)), layout
+
+
+def verdict(number):
+    return {"success": True, "extracted_info": {"certificate_no": number}, "pipeline": {"ocr": "run"},
+            "validation": {"status": "VERIFIED"}}
+
+
+def recompressed(image, quality=60):
+    _, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+
+def rescaled(image, factor=0.8):
+    return cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+
+
+def test_rescan_of_a_verified_certificate_is_found():
+    image, layout = certificate(0)
+    index = NearDuplicateIndex()
+    index.add(image, layout, verdict("JH-UNI-2018-001"), VERSION)
+
+    for copy in (recompressed(image), rescaled(image), rescaled(recompressed(image, 80), 1.25)):
+        found = index.lookup(copy, VERSION, layout)
+        assert found is not None
+        response, distance = found
+        assert response["extracted_info"]["certificate_no"] == "JH-UNI-2018-001" and distance >= 0
+
+    # Hits share the stored verdict, but what a response adds to stays its own
+    response, _ = index.lookup(image, VERSION, layout)
+    response["pipeline"]["near_duplicate"] = {"distance": 0}
+    response["extracted_info"]["processing_timestamp"] = "now"
+    assert index.lookup(image, VERSION, layout)[0] == verdict("JH-UNI-2018-001")
+    assert index.stats()["hits"] == 5
+
+
+def test_other_certificates_and_versions_miss():
+    image, layout = certificate(0)
+    index = NearDuplicateIndex()
+    index.add(image, layout, verdict("JH-UNI-2018-001"), VERSION)
+
+    other, other_layout = certificate(3)
+    assert other_layout == layout
+    assert index.lookup(other, VERSION, layout) is None
+    # Only the identified layout is looked at; an unidentified one never matches
+    assert index.lookup(image, VERSION, None) is None
+    assert fingerprint(image, None) is None
+    # A new registry or institutions version empties the index
+    assert index.lookup(image, (2, "layouts"), layout) is None
+    assert index.stats()["entries"] == 0
+
+
+def test_requests_on_an_older_registry_leave_the_index_alone():
+    image, layout = certificate(0)
+    index = NearDuplicateIndex()
+    newer = (VERSION[0] + 1, VERSION[1])
+    index.add(image, layout, verdict("cert-new"), newer)
+
+    # A request that captured the previous registry version before a refresh landed
+    assert index.lookup(image, VERSION, layout) is None
+    index.add(image, layout, verdict("cert-old"), VERSION)
+    assert index.stats()["version"] == newer and index.stats()["entries"] == 1
+    assert index.lookup(image, newer, layout)[0]["extracted_info"]["certificate_no"] == "cert-new"
+
+
+def test_oldest_entry_is_evicted_at_the_size_bound():
+    index = NearDuplicateIndex(max_entries=2)
+    certificates = [certificate(row) for row in (0, 3, 6)]
+    for number, (image, layout) in enumerate(certificates):
+        index.add(image, layout, verdict(f"cert-{number}"), VERSION)
+
+    assert index.stats()["entries"] == 2 and index.stats()["evictions"] == 1
+    image, layout = certificates[0]
+    assert index.lookup(image, VERSION, layout) is None
+    for number in (1, 2):
+        image, layout = certificates[number]
+        assert index.lookup(image, VERSION, layout)[0]["extracted_info"]["certificate_no"] == f"cert-{number}"
+
+
+def test_worker_processes_share_the_served_index():
+    image, layout = certificate(0)
+    index = NearDuplicateIndex()
+    remote = IndexServer(index).client()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as workers:
+        # A worker adds a verdict; this process and the worker both find it again from a re-scan
+        workers.submit(remote.remember, fingerprint(image, layout), verdict("cert-0"), VERSION).result()
+        assert index.stats()["entries"] == 1
+        assert index.lookup(recompressed(image), VERSION, layout)[0]["extracted_info"]["certificate_no"] == "cert-0"
+        found = workers.submit(remote.find, fingerprint(rescaled(image), layout), VERSION).result()
+        assert found[0]["extracted_info"]["certificate_no"] == "cert-0"
+        assert workers.submit(remote.find, fingerprint(certificate(3)[0], layout), VERSION).result() is None
+    assert index.stats()["hits"] == 2 and index.stats()["misses"] == 1
+
+
+if __name__ == "__main__":
+    test_rescan_of_a_verified_certificate_is_found()
+    test_other_certificates_and_versions_miss()
+    test_requests_on_an_older_registry_leave_the_index_alone()
+    test_oldest_entry_is_evicted_at_the_size_bound()
+    test_worker_processes_share_the_served_index()
+    print("✅ Near-duplicate index finds re-scans and nothing else")
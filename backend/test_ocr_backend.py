@@ -0,0 +1,182 @@
+# test_ocr_backend
+import sys
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ocr_backend import OcrError, OcrTimeout, TesseractPool
+
+# What the fake engine does with an image, by its first pixel
+ECHO, HANG, CRASH, LEAK = 0, 1, 2, 3
+_leaked = []
+
+
+class FakeEngine:
+    """Stand-in for tesserocr in the worker processes: echoes, hangs, crashes or leaks on request"""
+
+    def __init__(self, lang, refuse_flag=None):
+        # Starts fail while the flag file exists, like an engine whose models went missing
+        if refuse_flag and os.path.exists(refuse_flag):
+            raise RuntimeError("models unavailable")
+        self.lang = lang
+
+    def recognize(self, array, psm):
+        command = int(array.flat[0])
+        if command == HANG:
+            time.sleep(3600)
+        if command == CRASH:
+            os._exit(1)
+        if command == LEAK:
+            _leaked.append(np.ones(200 * 2 ** 20, dtype=np.uint8))
+        return f"{self.lang} psm={psm} {array.shape[1]}x{array.shape[0]} pid={os.getpid()}"
+
+    def close(self):
+        pass
+
+
+class FakeEngineFactory:
+    """Picklable engine factory for the spawned workers"""
+
+    def __init__(self, refuse_flag=None):
+        self.refuse_flag = refuse_flag
+
+    def __call__(self, lang):
+        return FakeEngine(lang, self.refuse_flag)
+
+
+class FallbackBackend:
+    name = "fallback"
+
+    def image_to_string(self, image, psm=None):
+        return "fallback"
+
+
+def job(command=ECHO, width=40):
+    image = np.zeros((20, width), dtype=np.uint8)
+    image.flat[0] = command
+    return image
+
+
+def worker_pid(text):
+    return text.rsplit("pid=", 1)[1]
+
+
+def pool(**options):
+    options.setdefault("engine_factory", FakeEngineFactory())
+    return TesseractPool(lang="fake", fallback=FallbackBackend(), **options)
+
+
+def test_spawned_workers_answer_concurrent_jobs():
+    ocr = pool(size=2)
+    try:
+        ocr.start()
+        ocr.start()
+        assert ocr.stats()["idle"] == 2
+        assert ocr.image_to_string(job(width=64), psm=7).startswith("fake psm=7 64x20 pid=")
+        assert " psm=3 " in ocr.image_to_string(job())
+
+        texts = []
+        threads = [threading.Thread(target=lambda: texts.append(ocr.image_to_string(job()))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(texts) == 8 and len({worker_pid(text) for text in texts}) <= 2
+        assert ocr.stats()["jobs"] == 10 and ocr.stats()["idle"] == 2
+    finally:
+        ocr.stop()
+
+
+def test_hung_and_crashed_workers_are_replaced():
+    ocr = pool(size=1, job_timeout=1)
+    try:
+        first = worker_pid(ocr.image_to_string(job()))
+        try:
+            ocr.image_to_string(job(HANG))
+        except OcrTimeout:
+            pass
+        else:
+            raise AssertionError("a hung job returned")
+        second = worker_pid(ocr.image_to_string(job()))
+        assert second != first
+
+        try:
+            ocr.image_to_string(job(CRASH))
+        except OcrError as e:
+            assert not isinstance(e, OcrTimeout)
+        else:
+            raise AssertionError("a crashed job returned")
+        assert worker_pid(ocr.image_to_string(job())) != second
+        stats = ocr.stats()
+        assert stats["failures"] == 2 and stats["timeouts"] == 1 and stats["idle"] == 1 and stats["lost"] == 0
+    finally:
+        ocr.stop()
+
+
+def test_workers_are_recycled_by_job_count_and_memory():
+    ocr = pool(size=1, max_jobs=2)
+    try:
+        pids = [worker_pid(ocr.image_to_string(job())) for _ in range(4)]
+        assert pids[0] == pids[1] and pids[1] != pids[2] and pids[2] == pids[3]
+        assert ocr.stats()["recycled"] == 2
+
+        ocr.max_jobs = 1000
+        ocr.max_rss_mb = ocr._idle.queue[0].rss_mb + 100
+        leaking = worker_pid(ocr.image_to_string(job(LEAK)))
+        assert worker_pid(ocr.image_to_string(job())) != leaking
+        assert ocr.stats()["recycled"] == 3
+    finally:
+        ocr.stop()
+
+
+def test_lost_workers_fall_back_and_are_restored():
+    with tempfile.TemporaryDirectory() as directory:
+        refuse = os.path.join(directory, "refuse")
+        ocr = pool(size=1, engine_factory=FakeEngineFactory(refuse), restart_backoff=0.2)
+        try:
+            ocr.start()
+            open(refuse, "w").close()
+            try:
+                ocr.image_to_string(job(CRASH))
+            except OcrError:
+                pass
+            # The slot stays empty while starts fail; jobs go to the fallback instead of failing
+            assert ocr.stats()["lost"] == 1
+            assert ocr.image_to_string(job()) == "fallback"
+            time.sleep(0.5)
+            assert ocr.image_to_string(job()) == "fallback" and ocr.stats()["fallbacks"] == 2
+
+            os.remove(refuse)
+            for _ in range(100):
+                if not ocr.stats()["lost"]:
+                    break
+                time.sleep(0.1)
+            assert ocr.stats()["lost"] == 0 and ocr.image_to_string(job()).startswith("fake ")
+        finally:
+            ocr.stop()
+
+
+def test_engine_that_cannot_load_fails_start():
+    with tempfile.TemporaryDirectory() as directory:
+        refuse = os.path.join(directory, "refuse")
+        open(refuse, "w").close()
+        ocr = pool(size=2, engine_factory=FakeEngineFactory(refuse))
+        try:
+            ocr.start()
+        except OcrError as e:
+            assert "models unavailable" in str(e)
+        else:
+            raise AssertionError("the pool started without an engine")
+        assert ocr.stats()["idle"] == 0
+
+
+if __name__ == "__main__":
+    test_spawned_workers_answer_concurrent_jobs()
+    test_hung_and_crashed_workers_are_replaced()
+    test_workers_are_recycled_by_job_count_and_memory()
+    test_lost_workers_fall_back_and_are_restored()
+    test_engine_that_cannot_load_fails_start()
+    print("✅ OCR worker pool replaces, recycles and restores its workers")
@@ -0,0 +1,96 @@
+# test_ocr_cache
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import ocr
+from app.database import get_pool
+from app.extraction import ExtractionEngine, InstitutionMatcher
+from app.ocr_cache import OcrResultCache, cached_extract, config_version, image_key, purge_older_than
+
+
+def test_memory_tier_evicts_the_least_recently_used():
+    cache = OcrResultCache("test", "v1", max_entries=2)
+    cache.put("a", {"name": "A"})
+    cache.put("b", {"name": "B"})
+    assert cache.get("a") == {"name": "A"}
+    cache.put("c", {"name": "C"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"name": "A"} and cache.get("c") == {"name": "C"}
+    # Callers get copies, never the cached dict
+    cache.get("a")["name"] = "changed"
+    assert cache.get("a") == {"name": "A"}
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["memory_hits"] == 5 and stats["misses"] == 1
+
+
+def test_sqlite_tier_serves_a_memory_miss():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.db")
+        OcrResultCache("test", "v1", db_path=path).put("a", {"name": "A"})
+
+        # A restarted (or second) worker starts with an empty memory tier
+        cache = OcrResultCache("test", "v1", db_path=path)
+        assert cache.get("a") == {"name": "A"}
+        assert cache.get("a") == {"name": "A"}
+        assert cache.stats()["disk_hits"] == 1 and cache.stats()["memory_hits"] == 1
+        assert OcrResultCache("other", "v1", db_path=path).get("a") is None
+        get_pool(path).close_all()
+
+
+def test_engine_fingerprint_change_misses_old_entries():
+    engine = ExtractionEngine(institution_mapping={"jsu": "Jharkhand State University"})
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.db")
+        cache = OcrResultCache("test", lambda: config_version(1, engine.fingerprint), db_path=path)
+        extracted = []
+
+        def extract(img):
+            extracted.append(img)
+            return {"institution": engine.find_institution(img)}
+
+        assert cached_extract(cache, b"scan", extract, "issued by jsu") == {"institution": "Jharkhand State University"}
+        assert cached_extract(cache, b"scan", extract, "issued by jsu") and len(extracted) == 1
+        before = cache.version
+
+        # A reloaded alias can change what the same text extracts to
+        engine._matcher = InstitutionMatcher({"jsu": "Jharkhand State University", "issued by jsu": "Other"})
+        assert cache.version != before
+        assert cached_extract(cache, b"scan", extract, "issued by jsu") == {"institution": "Other"}
+        assert len(extracted) == 2
+        get_pool(path).close_all()
+
+    assert ocr.ocr_cache.version == config_version(ocr.OCR_CONFIG_VERSION, ocr.engine.fingerprint, ocr.REQUIRED_FIELDS)
+
+
+def test_purges_drop_stale_versions_and_old_rows():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.db")
+        assert purge_older_than(1, db_path=path) == 0
+        OcrResultCache("test", "v1", db_path=path).put("a", {"name": "A"})
+        OcrResultCache("other", "v1", db_path=path).put("a", {"name": "A"})
+        current = OcrResultCache("test", "v2", db_path=path)
+        current.put(image_key(b"scan"), {"name": "B"})
+
+        assert current.purge_stale() == 1
+        assert OcrResultCache("test", "v1", db_path=path).get("a") is None
+        assert OcrResultCache("other", "v1", db_path=path).get("a") == {"name": "A"}
+
+        conn = get_pool(path).connection()
+        conn.execute("UPDATE ocr_cache SET created_at = datetime('now', '-3 days') WHERE namespace = 'other'")
+        conn.commit()
+        assert purge_older_than(2, db_path=path) == 1
+        assert purge_older_than(2, db_path=path) == 0
+        assert OcrResultCache("test", "v2", db_path=path).get(image_key(b"scan")) == {"name": "B"}
+        assert OcrResultCache("test", "v1").purge_stale() == 0
+        get_pool(path).close_all()
+
+
+if __name__ == "__main__":
+    test_memory_tier_evicts_the_least_recently_used()
+    test_sqlite_tier_serves_a_memory_miss()
+    test_engine_fingerprint_change_misses_old_entries()
+    test_purges_drop_stale_versions_and_old_rows()
+    print("✅ OCR result cache evicts, reads through to SQLite and follows the extraction version")
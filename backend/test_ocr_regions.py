@@ -0,0 +1,95 @@
+# test_ocr_regions
+import sys
+import os
+import random
+import cv2
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import ocr_backend
+from app.config import INSTITUTION_CONFIG
+from app.ocr import extract_certificate_info_regions
+from benchmarks.generate_certificates import DATASET_PATH, box_pixels, layout_for, render_certificate
+
+rows = pd.read_csv(DATASET_PATH).to_dict("records")
+
+
+class PageOcr:
+    """OCR backend stand-in that reads back the text render_certificate drew in each region.
+
+    The pipeline OCRs slices of the page, so a crop is recognized by where
+    it starts on the page; every region it asks for is recorded.
+    """
+
+    def __init__(self, page, row, layout):
+        self.page = page
+        self.texts = {}
+        self.regions = []
+        text = INSTITUTION_CONFIG[layout]["text"]
+        drawn = {"certificate_no": f"Certificate No: {row['certificate_no']}", "institution": row["institution"],
+                 "name": f"{row['name']} {row['course']}", "year": f"In the year {row['year']}"}
+        for field, value in drawn.items():
+            self.texts[box_pixels(page, text[field]["roi"])[:2]] = value
+        self.full_page = "\n".join(drawn.values())
+
+    def region(self, crop):
+        """(x, y) of the crop's top-left corner on the page"""
+        offset = crop.__array_interface__["data"][0] - self.page.__array_interface__["data"][0]
+        y, rest = divmod(offset, self.page.strides[0])
+        return rest // self.page.strides[1], y
+
+    def image_to_string(self, img, psm=3):
+        if img is self.page:
+            self.regions.append("page")
+            return self.full_page
+        assert np.shares_memory(img, self.page)
+        self.regions.append(self.region(img))
+        return self.texts.get(self.region(img), "")
+
+
+def header(page, code):
+    return box_pixels(page, INSTITUTION_CONFIG[code]["text"]["institution"]["roi"])[:2]
+
+
+def read(row, forgery=None, institution_code=None):
+    layout = layout_for(row)
+    page = cv2.cvtColor(render_certificate(row, layout, 1600, forgery=forgery, rng=random.Random(0)), cv2.COLOR_BGR2RGB)
+    fake = PageOcr(page, row, layout)
+    backend, ocr_backend._backend = ocr_backend._backend, fake
+    try:
+        return extract_certificate_info_regions(page, institution_code), fake, page
+    finally:
+        ocr_backend._backend = backend
+
+
+def test_regions_of_the_seal_identified_layout_are_read_first():
+    for row in (rows[3], rows[4], rows[9]):
+        info, fake, page = read(row)
+        assert info["certificate_no"] == row["certificate_no"] and info["name"] == row["name"]
+        assert info["institution"] == row["institution"] and info["year"] == str(row["year"])
+        assert info["course"] == row["course"]
+        # The seal named the layout: no other header was OCRed, and no full-page pass was needed
+        others = {header(page, code) for code in INSTITUTION_CONFIG if code != layout_for(row)}
+        assert not others & set(fake.regions) and "page" not in fake.regions
+
+
+def test_without_a_seal_every_header_is_probed():
+    row = rows[4]
+    info, fake, page = read(row, forgery="seal_missing")
+    assert info["institution"] == row["institution"] and info["certificate_no"] == row["certificate_no"]
+    assert {header(page, code) for code in INSTITUTION_CONFIG} <= set(fake.regions)
+
+
+def test_known_layout_skips_header_detection():
+    row = rows[3]
+    info, fake, page = read(row, institution_code=layout_for(row))
+    assert info["certificate_no"] == row["certificate_no"] and info["name"] == row["name"]
+    assert len(fake.regions) == len(INSTITUTION_CONFIG[layout_for(row)]["text"])
+
+
+if __name__ == "__main__":
+    test_regions_of_the_seal_identified_layout_are_read_first()
+    test_without_a_seal_every_header_is_probed()
+    test_known_layout_skips_header_detection()
+    print("✅ Region OCR reads the identified layout and probes headers only without one")
@@ -0,0 +1,115 @@
+# test_qr_fast_path
+import sys
+import os
+import random
+import tempfile
+import cv2
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import api, qr
+from app.config import INSTITUTION_CONFIG
+from app.registry import CertificateRegistry
+from app.registry_store import LiveRegistry
+from app.qr_verification import parse_qr_data, qr_institution, verify_qr_fast_path
+from benchmarks.generate_certificates import DATASET_PATH, box_pixels, layout_for, paste_fitted, render_certificate
+
+rows = pd.read_csv(DATASET_PATH)
+registry = CertificateRegistry(rows)
+
+
+def certificate(index=0, forgery=None):
+    row = rows.to_dict("records")[index]
+    layout = layout_for(row)
+    return render_certificate(row, layout, 1600, forgery=forgery, rng=random.Random(index)), row, layout
+
+
+def test_qr_formats():
+    assert parse_qr_data("Certificate ID: JH-UNI-2018-001\nDigital Hash:\nabc123") == ("JH-UNI-2018-001", "abc123")
+    assert parse_qr_data("Certificate ID: JH-UNI-2018-001\nDigital Hash: abc123") == ("JH-UNI-2018-001", "abc123")
+    assert parse_qr_data("JH-UNI-2018-001:abc123") == ("JH-UNI-2018-001", "abc123")
+    assert parse_qr_data("no separator") == (None, None) and parse_qr_data("") == (None, None)
+
+
+def test_genuine_qr_verifies_from_any_layout_region():
+    image, row, layout = certificate()
+    for institution_code in (layout, None):
+        result = verify_qr_fast_path(image, registry, institution_code)
+        assert result["authentic"] and result["status"] == "verified"
+        assert result["matched_record"]["certificate_no"] == row["certificate_no"]
+
+
+def test_anything_but_a_registry_match_goes_to_the_full_pipeline():
+    image, row, layout = certificate(forgery="qr_tamper")
+    tampered = verify_qr_fast_path(image, registry)
+    assert not tampered["authentic"] and tampered["status"] == "mismatch" and tampered["matched_record"] is None
+    # The certificate ID still tells which layout to read
+    assert qr_institution(tampered, registry) == layout
+
+    x0, y0, x1, y1 = box_pixels(image, INSTITUTION_CONFIG[layout]["qr"]["roi"])
+    image[y0:y1, x0:x1] = 255
+    assert verify_qr_fast_path(image, registry) == {"authentic": False, "status": "no_qr"}
+    assert qr_institution({"authentic": False, "status": "no_qr"}, registry) is None
+
+    code = cv2.QRCodeEncoder.create().encode("see the registrar")
+    paste_fitted(image, cv2.copyMakeBorder(code, 2, 2, 2, 2, cv2.BORDER_CONSTANT, value=255),
+                 INSTITUTION_CONFIG[layout]["qr"]["roi"])
+    assert verify_qr_fast_path(image, registry)["status"] == "unreadable"
+
+
+def test_revoked_record_does_not_short_circuit():
+    image, row, layout = certificate()
+    revoked = rows.copy()
+    revoked.loc[0, "status"] = "revoked"
+    result = verify_qr_fast_path(image, CertificateRegistry(revoked))
+    assert not result["authentic"] and result["status"] == "inactive" and result["matched_record"] is None
+    assert result["record_status"] == "revoked" and result["cert_id"] == row["certificate_no"]
+    assert qr_institution(result, registry) == layout
+
+    active = rows.copy()
+    active.loc[0, "status"] = " Active"
+    assert verify_qr_fast_path(image, CertificateRegistry(active))["status"] == "verified"
+
+
+def test_verified_qr_skips_ocr_and_forgery_detection():
+    image, row, _ = certificate(1)
+    _, contents = cv2.imencode(".png", image)
+    with tempfile.TemporaryDirectory() as directory:
+        live = LiveRegistry(DATASET_PATH, refresh_seconds=3600, database_path=os.path.join(directory, "registry.db"))
+        previous, api.live_registry = api.live_registry, live
+        try:
+            live.refresh()
+            result = api.run_verification("certificate.png", contents.tobytes())
+        finally:
+            api.live_registry = previous
+
+    assert result["validation"]["status"] == "VERIFIED" and result["validation"]["method"] == "qr"
+    assert result["extracted_info"]["certificate_no"] == row["certificate_no"]
+    assert result["pipeline"]["ocr"] == "skipped" and result["pipeline"]["forgery"] == "skipped"
+    assert result["pipeline"]["registry_version"] == 1
+
+
+def test_lookup_endpoint_reads_the_live_registry():
+    with tempfile.TemporaryDirectory() as directory:
+        live = LiveRegistry(DATASET_PATH, refresh_seconds=3600, database_path=os.path.join(directory, "registry.db"))
+        previous, qr.live_registry = qr.live_registry, live
+        try:
+            client = qr.app.test_client()
+            found = client.get("/verify", query_string={"cert_id": "JH-UNI-2018-001"}).get_json()
+            missing = client.get("/verify", query_string={"cert_id": "JH-UNI-1900-000"}).get_json()
+            assert client.get("/verify").status_code == 400
+        finally:
+            qr.live_registry = previous
+
+    assert found["status"] == "valid" and found["data"]["name"] == "Rajesh Kumar"
+    assert missing["status"] == "invalid"
+
+
+if __name__ == "__main__":
+    test_qr_formats()
+    test_genuine_qr_verifies_from_any_layout_region()
+    test_anything_but_a_registry_match_goes_to_the_full_pipeline()
+    test_revoked_record_does_not_short_circuit()
+    test_verified_qr_skips_ocr_and_forgery_detection()
+    test_lookup_endpoint_reads_the_live_registry()
+    print("✅ QR fast path verifies registry matches and hands everything else to OCR")
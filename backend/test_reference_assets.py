@@ -0,0 +1,36 @@
+# test_reference_assets
+import sys
+import os
+import cv2
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import INSTITUTION_CONFIG
+from app.forgery_detection import extract_roi, verify_seal
+from app.reference_assets import reference_assets
+
+SAMPLES = {"JHAR": "JSU_007.png", "RANC": "RTI2.png", "JHAR_BS": "JBS_013.PNG"}
+
+
+def test_references_are_decoded_once_per_institution():
+    for code in INSTITUTION_CONFIG:
+        assets = reference_assets.get(code)
+        assert assets is reference_assets.get(code)
+        assert assets.seal is not None and assets.seal.ndim == 2
+        assert assets.seal_descriptors is not None and len(assets.seal_keypoints) == len(assets.seal_descriptors)
+    assert reference_assets.get("NOPE") is None
+
+
+def test_cached_descriptors_score_like_fresh_ones():
+    directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_certificates")
+    for code, filename in SAMPLES.items():
+        page = cv2.imread(os.path.join(directory, filename))
+        seal = extract_roi(page, INSTITUTION_CONFIG[code]["seal"]["roi"])
+        assets = reference_assets.get(code)
+        score = verify_seal(seal, assets.seal, assets.seal_descriptors)
+        assert score == verify_seal(seal, assets.seal) and score > 0
+
+
+if __name__ == "__main__":
+    test_references_are_decoded_once_per_institution()
+    test_cached_descriptors_score_like_fresh_ones()
+    print("✅ Reference seals and signatures are decoded once and reused")
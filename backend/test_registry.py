@@ -0,0 +1,258 @@
+# test_registry
+import sys
+import os
+import random
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import fuzz
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.registry import CertificateRegistry, normalize
+from app.registry_columns import (CategoryColumn, DateColumn, HashColumn, IntColumn, RegistryRecords, StringColumn,
+                                  encode_column)
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets", "ocr_dataset.csv")
+
+
+def scan_best_match(info, db, threshold=85):
+    """Reference full-scan implementation the index has to agree with"""
+    best_match = None
+    best_scores = {}
+
+    for _, row in db.iterrows():
+        scores = {}
+        scores['cert'] = fuzz.ratio(normalize(info.get("certificate_no", "")), normalize(str(row["certificate_no"])))
+        scores['name'] = fuzz.ratio(normalize(info.get("name", "")), normalize(str(row["name"])))
+        scores['inst'] = fuzz.ratio(normalize(info.get("institution", "")), normalize(str(row["institution"])))
+        scores['year'] = 100 if info.get("year", "") == str(row["year"]) else 0
+
+        overall_score = (scores['cert'] * 0.4 + scores['name'] * 0.3 + scores['inst'] * 0.2 + scores['year'] * 0.1)
+
+        if (scores['cert'] > threshold and scores['name'] > threshold and
+                scores['inst'] > threshold and scores['year'] > 50):
+            if best_match is None or overall_score > best_scores.get('overall', 0):
+                best_match = row.to_dict()
+                best_scores = scores
+                best_scores['overall'] = overall_score
+
+    return best_match is not None, best_match, best_scores
+
+
+def garble(text, rng, edits=2):
+    """Simulate OCR noise with random substitutions, insertions and deletions"""
+    chars = list(text)
+    for _ in range(edits):
+        pos = rng.randrange(len(chars) + 1)
+        op = rng.choice(["sub", "ins", "del", "space"])
+        if op == "sub" and pos < len(chars):
+            chars[pos] = rng.choice("0O1lI5S8B-_ ")
+        elif op == "ins":
+            chars.insert(pos, rng.choice("abcdeilo0 "))
+        elif op == "del" and pos < len(chars):
+            del chars[pos]
+        else:
+            chars.insert(pos, " ")
+    return "".join(chars)
+
+
+def make_queries(db, count, seed=7):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        row = db.iloc[rng.randrange(len(db))]
+        queries.append({
+            "certificate_no": garble(str(row["certificate_no"]), rng, rng.randrange(3)),
+            "name": garble(str(row["name"]), rng, rng.randrange(3)),
+            "institution": garble(str(row["institution"]), rng, rng.randrange(2)),
+            "year": str(row["year"]) if rng.random() < 0.9 else str(row["year"] + 1),
+        })
+    queries.append({})
+    queries.append({"certificate_no": "", "name": "", "year": "2018"})
+    queries.append({"certificate_no": "JH", "name": "Al", "institution": "Ranchi Tech Institute", "year": "2019"})
+    return queries
+
+
+def test_index_matches_full_scan():
+    db = pd.read_csv(DATASET_PATH)
+    registry = CertificateRegistry(db)
+
+    for threshold in (60, 85, 90):
+        for info in make_queries(db, 200):
+            assert registry.best_match(info, threshold) == scan_best_match(info, db, threshold), info
+
+
+def test_match_batch_matches_best_match():
+    db = pd.read_csv(DATASET_PATH)
+    registry = CertificateRegistry(pd.concat([db, db], ignore_index=True))
+    infos = make_queries(db, 300, seed=11)
+
+    for threshold in (60, 85):
+        expected = [registry.best_match(info, threshold) for info in infos]
+        assert registry.match_batch(infos, threshold) == expected
+
+
+def test_first_match_follows_registry_order():
+    db = pd.read_csv(DATASET_PATH)
+    duplicated = pd.concat([db, db], ignore_index=True)
+    registry = CertificateRegistry(duplicated)
+
+    row = db.iloc[3]
+    info = {"certificate_no": row["certificate_no"], "name": row["name"],
+            "institution": row["institution"], "year": str(row["year"])}
+    valid, record = registry.first_match(info)
+    assert valid and record == db.iloc[3].to_dict()
+    assert registry.candidates(info, 90)[:2] == [3, 3 + len(db)]
+
+
+def records_of(records):
+    return [records.record(row) for row in range(len(records))]
+
+
+def test_merge_replaces_by_id_and_appends_new_ids():
+    names = ["certificate_no", "name", "year", "status"]
+    base = RegistryRecords.from_rows(names, [("JH-1", "Asha", 2018, "valid"), ("JH-2", "Ravi", 2019, "valid"),
+                                             ("JH-3", "Meera", 2019, "valid")], [1, 2, 5])
+    # digital_hash is only in the delta, status only in the base
+    delta = RegistryRecords.from_rows(["certificate_no", "name", "year", "digital_hash"],
+                                      [("JH-2", "Ravi Kumar", 2020, "a" * 64), ("JH-9", "Kiran", 2021, "b" * 64)],
+                                      [2, 7])
+    merged, replaced, added = base.merge(delta)
+
+    assert merged.ids.tolist() == [1, 2, 5, 7]
+    assert replaced.tolist() == [1] and added.tolist() == [3]
+    assert records_of(merged) == [
+        {"certificate_no": "JH-1", "name": "Asha", "year": 2018, "status": "valid", "digital_hash": None},
+        {"certificate_no": "JH-2", "name": "Ravi Kumar", "year": 2020, "status": None, "digital_hash": "a" * 64},
+        {"certificate_no": "JH-3", "name": "Meera", "year": 2019, "status": "valid", "digital_hash": None},
+        {"certificate_no": "JH-9", "name": "Kiran", "year": 2021, "status": None, "digital_hash": "b" * 64},
+    ]
+    # The base is left as it was
+    assert records_of(base)[1] == {"certificate_no": "JH-2", "name": "Ravi", "year": 2019, "status": "valid"}
+
+    # A new id below an existing one re-sorts every row
+    merged, replaced, _ = merged.merge(RegistryRecords.from_rows(names, [("JH-0", "Dev", 2017, "valid")], [3]))
+    assert replaced is None and merged.ids.tolist() == [1, 2, 3, 5, 7]
+    assert merged.record(2)["certificate_no"] == "JH-0" and merged.record(4)["name"] == "Kiran"
+
+
+def test_take_keeps_rows_in_order():
+    db = pd.read_csv(DATASET_PATH)
+    records = RegistryRecords.from_frame(db)
+    taken = records.take([5, 0, 5])
+    assert taken.ids.tolist() == [5, 0, 5]
+    assert records_of(taken) == [db.iloc[5].to_dict(), db.iloc[0].to_dict(), db.iloc[5].to_dict()]
+
+
+def test_merged_registry_matches_a_fresh_build():
+    db = pd.read_csv(DATASET_PATH)
+    records = RegistryRecords.from_frame(db)
+    registry = CertificateRegistry(records)
+
+    changes = db.iloc[[3, 5, 8]].copy()
+    changes.loc[changes.index[0], "name"] = "Renamed Student"
+    changes.loc[changes.index[1], "year"] = changes.loc[changes.index[1], "year"] + 1
+    changes.loc[changes.index[2], "status"] = "revoked"
+    new_rows = db.iloc[[0, 1]].copy()
+    new_rows["certificate_no"] = ["NEW-CERT-001", "NEW-CERT-002"]
+    new_rows.index = [len(db), len(db) + 1]
+    merged, replaced, added = records.merge(RegistryRecords.from_frame(pd.concat([changes, new_rows])))
+    assert replaced.tolist() == [3, 5, 8] and added.tolist() == [len(db), len(db) + 1]
+
+    incremental, fresh = registry.merged(merged, replaced, added), CertificateRegistry(merged)
+    frame = pd.DataFrame(records_of(merged))
+    infos = make_queries(frame, 200, seed=13)
+    for threshold in (60, 85):
+        for info in infos:
+            assert incremental.candidates(info, threshold) == fresh.candidates(info, threshold), info
+            assert incremental.best_match(info, threshold) == fresh.best_match(info, threshold), info
+        assert incremental.match_batch(infos, threshold) == fresh.match_batch(infos, threshold)
+    assert incremental.lookup("NEW-CERT-002") == [len(db) + 1]
+
+
+def test_each_column_kind_reads_back_its_values():
+    digest = "0123456789abcdef" * 4
+    cases = [
+        ("certificate_no", ["JH-001", "JH-002", "झारखंड-003", ""], StringColumn),
+        ("status", ["valid", "revoked", "valid", "valid"], CategoryColumn),
+        ("year", [2018, 2019, -5, 2 ** 40], IntColumn),
+        ("dob", ["1997-05-14", "2000-02-29", "1999-12-31", "1999-12-31"], DateColumn),
+        ("digital_hash", [digest, "f" * 64, "0" * 64, digest], HashColumn),
+    ]
+    for name, values, kind in cases:
+        column = encode_column(values, name=name)
+        assert type(column) is kind, name
+        assert len(column) == len(values) and column.values() == values and not column.exceptions
+        assert [column[row] for row in range(len(values))] == values
+        assert column.values([3, 0]) == [values[3], values[0]]
+        assert column.nbytes == column.encoded_nbytes
+
+    assert encode_column([2018, 2019]).array.dtype == np.int16
+    assert encode_column([1, 2 ** 40]).array.dtype == np.int64
+
+
+def test_values_the_encoding_cannot_hold_are_kept_as_exceptions():
+    digest = "ab" * 32
+    years = IntColumn([2018, None, 2019, "2020"])
+    assert years.values() == [2018, None, 2019, "2020"] and set(years.exceptions) == {1, 3}
+
+    dates = DateColumn(["1997-05-14", "14/05/1997", "1997-5-14", None])
+    assert dates.values() == ["1997-05-14", "14/05/1997", "1997-5-14", None] and set(dates.exceptions) == {1, 2, 3}
+
+    hashes = HashColumn([digest, digest.upper(), "not-a-hash", None])
+    assert hashes.values() == [digest, digest.upper(), "not-a-hash", None] and set(hashes.exceptions) == {1, 2, 3}
+    assert hashes.nbytes > hashes.encoded_nbytes
+
+    strings = StringColumn(["a", None, 5])
+    assert strings.values() == ["a", None, 5] and strings[1] is None
+
+
+def test_hash_column_matches_like_the_hex_strings_did():
+    digest = "ab" * 32
+    hashes = HashColumn([digest, digest.upper()])
+    assert hashes.matches(0, digest) and hashes.matches(0, f"  {digest.upper()} ")
+    assert hashes.matches(1, digest) and hashes.matches(1, digest.upper())
+    assert not hashes.matches(0, "cd" * 32) and not hashes.matches(0, "xyz") and not hashes.matches(0, "")
+
+
+def test_updated_columns_widen_and_keep_exceptions():
+    years = IntColumn([2018, 2019])
+    updated = years.updated([1], [None], [2 ** 40, 2020])
+    assert updated.values() == [2018, None, 2 ** 40, 2020] and updated.array.dtype == np.int64
+    assert years.values() == [2018, 2019] and years.array.dtype == np.int16
+
+    status = CategoryColumn(["valid"] * 3)
+    assert status.updated([0], ["revoked"], ["suspended"]).values() == ["revoked", "valid", "valid", "suspended"]
+
+    names = StringColumn([f"name {row}" for row in range(100)])
+    patched = names.updated([7], ["renamed"], ["new"])
+    assert patched[7] == "renamed" and patched[100] == "new" and patched.buffer.startswith(names.buffer)
+    # Past the override share the column is encoded afresh
+    rewritten = names.updated(list(range(10)), ["x"] * 10, [])
+    assert not rewritten.exceptions and rewritten.values()[:11] == ["x"] * 10 + ["name 10"]
+
+
+def test_record_gives_back_the_source_row():
+    db = pd.read_csv(DATASET_PATH)
+    years = db["year"].tolist()
+    years[2] = None
+    db["year"] = pd.Series(years, dtype=object)
+    db.loc[4, "dob"] = "14/05/1997"
+    db.loc[6, "digital_hash"] = db.loc[6, "digital_hash"].upper()
+    records = RegistryRecords.from_frame(db)
+    assert "certificate_no" in records and "missing" not in records
+    assert records_of(records) == db.to_dict("records")
+
+
+if __name__ == "__main__":
+    test_index_matches_full_scan()
+    test_match_batch_matches_best_match()
+    test_first_match_follows_registry_order()
+    test_merge_replaces_by_id_and_appends_new_ids()
+    test_take_keeps_rows_in_order()
+    test_merged_registry_matches_a_fresh_build()
+    test_each_column_kind_reads_back_its_values()
+    test_values_the_encoding_cannot_hold_are_kept_as_exceptions()
+    test_hash_column_matches_like_the_hex_strings_did()
+    test_updated_columns_widen_and_keep_exceptions()
+    test_record_gives_back_the_source_row()
+    print("✅ Registry index agrees with the full scan")
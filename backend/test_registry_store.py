@@ -0,0 +1,116 @@
+# test_registry_store
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import get_pool
+from app.registry_store import LiveRegistry, ingest_csv, publish, stage_csv
+
+HEADER = "certificate_no,name,dob,course,year,grade,institution,issued_on,certificate_type,institution_code,status,digital_hash\n"
+
+
+def row(cert, name, year=2019, status="valid"):
+    return f"{cert},{name},2000-01-01,B.Tech,{year},A,Ranchi Tech Institute,2019-06-01,degree,RTI,{status},\n"
+
+
+def write_csv(directory, filename, lines):
+    path = os.path.join(directory, filename)
+    with open(path, "w") as f:
+        f.write(HEADER + "".join(lines))
+    return path
+
+
+def loaded_rows(database_path):
+    """What a server starting now would load: {certificate_no: record}, and the version"""
+    live = LiveRegistry(seed_csv=None, database_path=database_path)
+    live.refresh()
+    records = live.records
+    return live.version, {records.record(index)["certificate_no"]: records.record(index)
+                          for index in range(len(records))}
+
+
+def staged_count(database_path):
+    return get_pool(database_path).connection().execute("SELECT COUNT(*) FROM certificates_staging").fetchone()[0]
+
+
+def test_ingest_is_invisible_until_published():
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, "registry.db")
+        seed = write_csv(directory, "seed.csv", [row("RTI-001", "Asha"), row("RTI-002", "Ravi"), row("RTI-003", "Meera")])
+        live = LiveRegistry(seed_csv=seed, refresh_seconds=3600, database_path=database_path)
+        assert live.refresh() == 1 and len(live.records) == 3
+
+        delta = write_csv(directory, "delta.csv", [row("RTI-002", "Ravi", status="revoked"), row("RTI-004", "Kiran")])
+        conn = get_pool(database_path).connection()
+        columns, rows_read = stage_csv(delta, "batch-1", chunk_size=1, conn=conn)
+
+        # Mid-ingest: every chunk is written, none of it is visible yet
+        version, rows = loaded_rows(database_path)
+        assert version == 1 and sorted(rows) == ["RTI-001", "RTI-002", "RTI-003"]
+        assert rows["RTI-002"]["status"] == "valid"
+
+        assert publish("batch-1", columns, delta, rows_read, conn=conn) == (2, 2)
+        assert live.refresh() == 2
+        rows = {live.records.record(index)["certificate_no"]: live.records.record(index)
+                for index in range(len(live.records))}
+        assert sorted(rows) == ["RTI-001", "RTI-002", "RTI-003", "RTI-004"]
+        assert rows["RTI-002"]["status"] == "revoked"
+        get_pool(database_path).close_all()
+
+
+def test_failed_ingest_leaves_registry_unchanged():
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, "registry.db")
+        seed = write_csv(directory, "seed.csv", [row("RTI-001", "Asha"), row("RTI-002", "Ravi")])
+        assert ingest_csv(seed, database_path=database_path) == (1, 2, 2)
+        before = loaded_rows(database_path)
+
+        # The first chunk stages fine; the unclosed quote in the second makes the run fail
+        broken = write_csv(directory, "broken.csv", [row("RTI-001", "Asha", status="revoked"), row("RTI-005", "Dev"),
+                                                     'RTI-006,"Tara\n'])
+        try:
+            ingest_csv(broken, chunk_size=2, database_path=database_path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("a malformed CSV row should fail the ingest")
+
+        assert loaded_rows(database_path) == before
+        assert staged_count(database_path) == 0
+
+        # A later run publishes normally, as the next version
+        assert ingest_csv(write_csv(directory, "delta.csv", [row("RTI-005", "Dev")]),
+                          database_path=database_path) == (2, 1, 1)
+        get_pool(database_path).close_all()
+
+
+def test_readers_never_wait_for_a_refresh():
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, "registry.db")
+        seed = write_csv(directory, "seed.csv", [row("RTI-001", "Asha"), row("RTI-002", "Ravi")])
+        live = LiveRegistry(seed_csv=seed, refresh_seconds=0, database_path=database_path)
+        first = live.current()
+        ingest_csv(write_csv(directory, "delta.csv", [row("RTI-003", "Meera")]), database_path=database_path)
+
+        # While a merge is still building, readers get the registry in hand straight away
+        with live._refresh_lock:
+            started = time.monotonic()
+            assert live.current() is first and live.version == 1
+            assert time.monotonic() - started < 1
+
+        deadline = time.monotonic() + 10
+        while (live.version < 2 or live._refreshing) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        live.refresh_seconds = 3600
+        assert live.version == 2
+        assert live.current() is not first and len(live.current()) == 3 and len(first) == 2
+        get_pool(database_path).close_all()
+
+
+if __name__ == "__main__":
+    test_ingest_is_invisible_until_published()
+    test_failed_ingest_leaves_registry_unchanged()
+    test_readers_never_wait_for_a_refresh()
+    print("✅ Registry ingests are published atomically")
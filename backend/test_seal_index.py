@@ -0,0 +1,106 @@
+# test_seal_index
+import sys
+import os
+import random
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import cv2
+import pandas as pd
+
+from app.config import INSTITUTION_CONFIG
+from app.imaging import CertificateImage
+from app.institutions import BASE_DIR, institutions
+from app.seal_index import SEAL_INDEX_SIZES, SealIndex
+from generate_certificates import DATASET_PATH, load_reference, paste_fitted, render_certificate
+
+SAMPLES = {"JHAR": "JSU_007.png", "RANC": "RTI2.png", "JHAR_BS": "JBS_013.PNG"}
+row = pd.read_csv(DATASET_PATH).iloc[0]
+
+
+def sample(code):
+    return cv2.imread(os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_certificates", SAMPLES[code]))
+
+
+def page_with_seals(layout, *codes):
+    """Rendered certificate with the given institutions' seals side by side in the layout's seal ROI"""
+    page = render_certificate(row, layout, 1400, forgery="seal_missing", rng=random.Random(0))
+    x0, y0, x1, y1 = INSTITUTION_CONFIG[layout]["seal"]["roi"]
+    step = (x1 - x0) / 2
+    for i, code in enumerate(codes):
+        paste_fitted(page, load_reference(INSTITUTION_CONFIG[code]["seal"]["reference_image"]),
+                     [x0 + i * step, y0, x0 + (i + 1) * step, y1])
+    return page
+
+
+class CountingMatcher:
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.queries = 0
+
+    def knnMatch(self, descriptors, k):
+        self.queries += 1
+        return self.matcher.knnMatch(descriptors, k=k)
+
+
+def test_build_indexes_every_reference_seal_at_each_size():
+    index = SealIndex()
+    index.build()
+    assert index.stats() == {'institutions': len(INSTITUTION_CONFIG),
+                             'references': len(INSTITUTION_CONFIG) * len(SEAL_INDEX_SIZES)}
+
+    only_jhar = SealIndex(["JHAR"])
+    assert only_jhar.identify(sample("JHAR")) == "JHAR"
+    assert only_jhar.identify(sample("RANC")) is None
+
+
+def test_identify_finds_each_institution_with_one_query():
+    index = SealIndex(refresh_seconds=3600)
+    index.build()
+    index.matcher = CountingMatcher(index.matcher)
+    for code in SAMPLES:
+        assert index.identify(sample(code)) == code
+        assert index.identify(CertificateImage(sample(code))) == code
+    assert index.matcher.queries == 2 * len(SAMPLES)
+    assert index.identify(page_with_seals("JHAR")) is None
+
+
+def test_seal_that_does_not_clearly_beat_the_runner_up_is_rejected():
+    index = SealIndex()
+    assert index.identify(page_with_seals("JHAR", "JHAR")) == "JHAR"
+    # Half the ROI votes for another institution: no clear winner
+    assert index.identify(page_with_seals("JHAR", "JHAR", "RANC")) is None
+
+
+def test_index_follows_institution_changes():
+    path, base_dir = institutions.path, institutions.base_dir
+    with tempfile.TemporaryDirectory() as directory:
+        for folder in ("seals", "signatures"):
+            shutil.copytree(os.path.join(BASE_DIR, "backend", "assets", folder),
+                            os.path.join(directory, "backend", "assets", folder))
+        copy = os.path.join(directory, "institutions.yaml")
+        with open(path) as f:
+            text = f.read()
+        with open(copy, "w") as f:
+            f.write(text.replace("\n  RANC:\n", "\n  RTI:\n"))
+        index = SealIndex(refresh_seconds=0)
+        assert index.identify(sample("RANC")) == "RANC"
+        try:
+            institutions.path, institutions.base_dir = copy, directory
+            institutions.reload()
+            assert index.identify(sample("RANC")) == "RTI"
+            assert index.identify(sample("JHAR")) == "JHAR" and "RANC" not in index.institution_codes
+        finally:
+            institutions.path, institutions.base_dir = path, base_dir
+            institutions.reload()
+    assert index.identify(sample("RANC")) == "RANC"
+
+
+if __name__ == "__main__":
+    test_build_indexes_every_reference_seal_at_each_size()
+    test_identify_finds_each_institution_with_one_query()
+    test_seal_that_does_not_clearly_beat_the_runner_up_is_rejected()
+    test_index_follows_institution_changes()
+    print("✅ Seal index identifies institutions with one query and follows institution changes")
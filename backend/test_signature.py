@@ -0,0 +1,83 @@
+# test_signature
+import sys
+import os
+import glob
+import random
+import cv2
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import INSTITUTION_CONFIG
+from app.forgery_detection import extract_roi, verify_signature
+from app.reference_assets import SignatureTemplates
+from benchmarks.generate_certificates import DATASET_PATH, REPO_DIR, layout_for, render_certificate
+
+# float32 rounding; the dataset and sample scans differ by up to about 1.2e-5
+TOLERANCE = 5e-5
+
+references = {code: cv2.imread(os.path.join(REPO_DIR, config["signature"]["reference_image"]), cv2.IMREAD_GRAYSCALE)
+              for code, config in INSTITUTION_CONFIG.items()}
+
+
+def match_template(crop, reference):
+    """The score as it was computed before templates were cached"""
+    resized = cv2.resize(reference, (crop.shape[1], crop.shape[0]))
+    return float(cv2.matchTemplate(crop, resized, cv2.TM_CCOEFF_NORMED)[0][0])
+
+
+def signature_crops():
+    """Grayscale signature crops of rendered (genuine and swapped) and sample certificates at three scales"""
+    pages = []
+    rows = pd.read_csv(DATASET_PATH).to_dict("records")
+    for index in range(0, len(rows), 20):
+        layout = layout_for(rows[index])
+        for forgery in (None, "signature_swap"):
+            pages.append((render_certificate(rows[index], layout, 1600, forgery, random.Random(index)), layout))
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_certificates", "*"))):
+        pages.append((cv2.imread(path), None))
+
+    for page, layout in pages:
+        for scale in (0.5, 1.0, 2.0):
+            scaled = cv2.resize(page, None, fx=scale, fy=scale)
+            for code in [layout] if layout else INSTITUTION_CONFIG:
+                crop = extract_roi(scaled, INSTITUTION_CONFIG[code]["signature"]["roi"])
+                yield cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+
+
+def test_scores_match_template_matching():
+    templates = {code: SignatureTemplates(reference) for code, reference in references.items()}
+    checked = 0
+    for crop in signature_crops():
+        for code, reference in references.items():
+            expected = match_template(crop, reference)
+            assert abs(verify_signature(crop, reference) - expected) <= TOLERANCE
+            assert abs(verify_signature(crop, None, templates[code]) - expected) <= TOLERANCE
+            checked += 1
+    assert checked > 100
+
+
+def test_templates_are_kept_per_crop_size():
+    templates = SignatureTemplates(references["JHAR"], max_sizes=2)
+    first = templates.get((200, 80))
+    assert templates.get((200, 80)) is first
+    templates.get((100, 40))
+    templates.get((400, 160))
+    # The least recently used size was dropped and is prepared again
+    assert templates.get((200, 80)) is not first
+    template, norm = first
+    assert template.shape == (80, 200) and abs(float(template.mean())) < 1e-3
+    assert abs(norm - float(np.linalg.norm(template))) < 1e-3 * norm
+
+
+def test_blank_crop_scores_zero():
+    blank = np.full((60, 180), 255, dtype=np.uint8)
+    assert verify_signature(blank, references["RANC"]) == 0.0
+    assert verify_signature(blank, None, SignatureTemplates(references["RANC"])) == 0.0
+
+
+if __name__ == "__main__":
+    test_scores_match_template_matching()
+    test_templates_are_kept_per_crop_size()
+    test_blank_crop_scores_zero()
+    print("✅ Cached signature templates score like cv2.matchTemplate")
@@ -0,0 +1,89 @@
+# test_verdict_cache
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import get_pool
+from app.registry_store import LiveRegistry, ingest_csv
+from app.verdict_cache import VerdictCache
+
+HEADER = "certificate_no,name,dob,course,year,grade,institution,issued_on,certificate_type,institution_code,status,digital_hash\n"
+
+
+def row(cert, name, status="valid"):
+    return f"{cert},{name},2000-01-01,B.Tech,2019,A,Ranchi Tech Institute,2019-06-01,degree,RTI,{status},\n"
+
+
+def write_csv(directory, filename, lines):
+    path = os.path.join(directory, filename)
+    with open(path, "w") as f:
+        f.write(HEADER + "".join(lines))
+    return path
+
+
+def verdict(certificate_no, matched=True):
+    result = {"success": True, "extracted_info": {"certificate_no": certificate_no}}
+    result["ocr_validation"] = {"matched_record": {"certificate_no": certificate_no} if matched else None}
+    return result
+
+
+def test_put_ignores_verdicts_older_than_the_registry():
+    cache = VerdictCache("test", "v1")
+    cache.put("new", verdict("RTI-001"), 2)
+    cache.put("old", verdict("RTI-002"), 1)
+    assert cache.get("old", "verify") is None
+    assert cache.get("new", "verify")["pipeline"]["verdict_cache"] == "hit"
+    assert cache.stats()["entries"] == 1 and cache.stats()["registry_version"] == 2
+
+    cache.put("failed", {"success": False}, 2)
+    assert cache.get("failed", "verify") is None
+
+
+def test_registry_delta_drops_only_the_certificates_it_touched():
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, "registry.db")
+        seed = write_csv(directory, "seed.csv", [row("RTI-001", "Asha"), row("RTI-002", "Ravi")])
+        live = LiveRegistry(seed_csv=seed, refresh_seconds=3600, database_path=database_path)
+        cache = VerdictCache("test", "v1", live)
+        version = live.refresh()
+
+        cache.put("asha", verdict("RTI-001"), version)
+        cache.put("ravi", verdict("rti-002 "), version)
+        cache.put("unknown", verdict("RTI-999", matched=False), version)
+
+        ingest_csv(write_csv(directory, "revoke.csv", [row("RTI-002", "Ravi", status="revoked")]),
+                   database_path=database_path)
+        assert live.refresh() == version + 1
+
+        assert cache.get("asha", "verify") is not None
+        # The revoked certificate and the verdict that matched no record may now decide differently
+        assert cache.get("ravi", "verify") is None and cache.get("unknown", "verify") is None
+        assert cache.stats()["invalidations"] == 2 and cache.stats()["registry_version"] == version + 1
+        get_pool(database_path).close_all()
+
+
+def test_entries_expire_after_ttl():
+    cache = VerdictCache("test", "v1", ttl=0)
+    cache.put("asha", verdict("RTI-001"), 1)
+    assert cache.get("asha", "verify") is None
+    assert cache.stats()["expirations"] == 1 and cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VerdictCache("test", "v1", max_entries=2)
+    cache.put("a", verdict("RTI-001"), 1)
+    cache.put("b", verdict("RTI-002"), 1)
+    assert cache.get("a", "verify") is not None
+    cache.put("c", verdict("RTI-003"), 1)
+    assert cache.get("b", "verify") is None
+    assert cache.get("a", "verify") is not None and cache.get("c", "verify") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+if __name__ == "__main__":
+    test_put_ignores_verdicts_older_than_the_registry()
+    test_registry_delta_drops_only_the_certificates_it_touched()
+    test_entries_expire_after_ttl()
+    test_least_recently_used_entry_is_evicted()
+    print("✅ Verdict cache keeps, expires and invalidates entries as expected")